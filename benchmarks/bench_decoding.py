@@ -0,0 +1,77 @@
+"""
+Compare the CPU cost of decoding OpenGIN entity and relation responses.
+
+    python -m benchmarks.bench_decoding [count]
+
+- baseline: json.loads + model_validate per item (the original decode path)
+- adapter: cached TypeAdapter validating the raw bytes in one pass (current path)
+"""
+import json
+import sys
+import time
+from src.models.organisation_schemas import Entity, Relation
+from src.utils.response_decoder import decode_entities, decode_relations
+
+
+def build_payloads(count: int) -> tuple[bytes, bytes]:
+    entities = {
+        "body": [
+            {
+                "id": f"entity_{i}",
+                "name": json.dumps({"typeUrl": "type.googleapis.com/google.protobuf.StringValue", "value": "0a0b4d696e6973747279"}),
+                "kind": {"major": "Organisation", "minor": "department"},
+                "created": "2020-01-01T00:00:00Z",
+                "terminated": "",
+            }
+            for i in range(count)
+        ]
+    }
+    relations = [
+        {
+            "id": f"relation_{i}",
+            "name": "AS_DEPARTMENT",
+            "relatedEntityId": f"entity_{i}",
+            "startTime": "2020-01-01T00:00:00Z",
+            "endTime": "",
+            "direction": "OUTGOING",
+            "activeAt": "",
+        }
+        for i in range(count)
+    ]
+    return json.dumps(entities).encode(), json.dumps(relations).encode()
+
+
+def cpu_seconds(fn, repeat: int = 5) -> float:
+    fn()  # warm up
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.process_time()
+        fn()
+        best = min(best, time.process_time() - started)
+    return best
+
+
+def main(count: int = 10_000):
+    entity_raw, relation_raw = build_payloads(count)
+
+    cases = {
+        "entities": {
+            "baseline": lambda: [Entity.model_validate(item) for item in json.loads(entity_raw).get("body", [])],
+            "adapter": lambda: decode_entities(entity_raw),
+        },
+        "relations": {
+            "baseline": lambda: [Relation.model_validate(item) for item in json.loads(relation_raw)],
+            "adapter": lambda: decode_relations(relation_raw),
+        },
+    }
+
+    print(f"CPU time to decode {count} items (best of 5)")
+    for name, variants in cases.items():
+        results = {variant: cpu_seconds(fn) for variant, fn in variants.items()}
+        baseline = results["baseline"]
+        for variant, seconds in results.items():
+            print(f"  {name:<10} {variant:<10} {seconds * 1000:8.2f} ms   saved {(baseline - seconds) * 1000:8.2f} ms ({baseline / seconds:4.1f}x)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000)
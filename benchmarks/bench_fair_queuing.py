@@ -0,0 +1,76 @@
+"""
+Compare the latency of regular clients during a scraping burst with and without fair queuing.
+
+    python -m benchmarks.bench_fair_queuing [scraper requests] [users]
+
+One client sends a burst of requests, at the same time each user sends a request every few milliseconds.
+Requests take 5ms once admitted and THROTTLING_MAX_CONCURRENT is 8, so the scraper alone keeps the service busy.
+
+- fifo: queued requests admitted in arrival order
+- fair: queued requests shared between clients with deficit round robin (current default)
+"""
+import asyncio
+import statistics
+import sys
+import time
+from unittest.mock import patch
+from src.core.config import settings
+from src.middleware.throttling import ThrottlingMiddleware
+
+SERVICE_SECONDS = 0.005
+USER_REQUESTS = 20
+USER_INTERVAL_SECONDS = 0.01
+
+
+async def app(scope, receive, send):
+    await asyncio.sleep(SERVICE_SECONDS)
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+async def receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def send(message):
+    pass
+
+
+async def request(middleware: ThrottlingMiddleware, client: str) -> float:
+    scope = {"type": "http", "method": "GET", "path": "/v1/test", "headers": [], "client": (client, 50000)}
+    started = time.perf_counter()
+    await middleware(scope, receive, send)
+    return time.perf_counter() - started
+
+
+async def user(middleware: ThrottlingMiddleware, client: str) -> list[float]:
+    latencies = []
+    for _ in range(USER_REQUESTS):
+        latencies.append(await request(middleware, client))
+        await asyncio.sleep(USER_INTERVAL_SECONDS)
+    return latencies
+
+
+async def run(fair_queuing: bool, scraper_requests: int, users: int) -> list[float]:
+    with patch.object(settings, "THROTTLING_MAX_CONCURRENT", 8), \
+            patch.object(settings, "THROTTLING_TIMEOUT", 60), \
+            patch.object(settings, "THROTTLING_FAIR_QUEUING_ENABLED", fair_queuing):
+        middleware = ThrottlingMiddleware(app)
+
+    scraper = [asyncio.ensure_future(request(middleware, "scraper")) for _ in range(scraper_requests)]
+    results = await asyncio.gather(*[user(middleware, f"user-{index}") for index in range(users)])
+    await asyncio.gather(*scraper)
+    return sorted(latency for latencies in results for latency in latencies)
+
+
+async def main(scraper_requests: int = 2000, users: int = 5):
+    print(f"{scraper_requests} scraper requests, {users} users sending {USER_REQUESTS} requests each")
+    for name, fair_queuing in (("fifo", False), ("fair", True)):
+        latencies = await run(fair_queuing, scraper_requests, users)
+        p50 = statistics.median(latencies) * 1000
+        p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000
+        print(f"  {name:<5} user p50 {p50:8.1f} ms   p99 {p99:8.1f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(*(int(arg) for arg in sys.argv[1:3])))
@@ -0,0 +1,84 @@
+"""
+Compare the CPU cost of building OpenGIN request bodies for entity and relation lookups.
+
+    python -m benchmarks.bench_request_payloads [calls]
+
+Each call builds what one lookup needs before the request goes out: the request key, the headers and
+the body payload aiohttp sends, for a handful of query shapes like the ones the routers send.
+
+- baseline: model_dump for the key and again for the body, a new headers dict, aiohttp encoding the JSON
+- templates: one pre-encoded bytes body per query shape, reused for the key and sent as is,
+  shared read only headers (current path)
+"""
+import json
+import sys
+import time
+from aiohttp.payload import BytesPayload, JsonPayload
+from multidict import CIMultiDict
+from src.models.organisation_schemas import Entity, Kind, Relation
+from src.services.opengin_service import OpenGINService
+from src.utils.request_payloads import JSON_HEADERS, PayloadCache
+
+
+def build_queries() -> list:
+    relations = [
+        Relation(name=name, activeAt=f"{year}-01-01T00:00:00Z", direction="OUTGOING")
+        for name in ("AS_APPOINTED", "AS_MINISTER", "AS_DEPARTMENT")
+        for year in (2020, 2022, 2024)
+    ]
+    entities = [Entity(id=f"entity_{i}") for i in range(5)]
+    entities.append(Entity(kind=Kind(major="Organisation", minor="department")))
+    return relations + entities
+
+
+def baseline(query):
+    key = OpenGINService.request_key("query", query.model_dump(mode="json"))
+    headers = {"Content-Type": "application/json"}
+    body = JsonPayload(query.model_dump(mode="json"))
+    return key, CIMultiDict(headers), body
+
+
+def templates(payloads: PayloadCache, query):
+    payload = payloads.encode(query)
+    key = OpenGINService.request_key("query", payload)
+    body = BytesPayload(payloads.encode(query))
+    return key, CIMultiDict(JSON_HEADERS), body
+
+
+def run(fn, queries: list, calls: int) -> float:
+    """CPU seconds for `calls` request builds, cycling through the queries (fresh models per call)"""
+    copies = [[query.model_copy(deep=True) for query in queries] for _ in range(calls // len(queries) + 1)]
+    started = time.process_time()
+    done = 0
+    for batch in copies:
+        for query in batch:
+            if done == calls:
+                return time.process_time() - started
+            fn(query)
+            done += 1
+    return time.process_time() - started
+
+
+def main(calls: int = 200_000):
+    queries = build_queries()
+    payloads = PayloadCache()
+    cases = {
+        "baseline": baseline,
+        "templates": lambda query: templates(payloads, query),
+    }
+
+    # both variants must send the same JSON
+    for query in queries:
+        assert json.loads(templates(payloads, query)[2]._value) == query.model_dump(mode="json")
+
+    print(f"{calls} request builds over {len(queries)} query shapes")
+    results = {}
+    for name, fn in cases.items():
+        run(fn, queries, calls // 10)  # warm up
+        results[name] = run(fn, queries, calls)
+        print(f"  {name:<10} {results[name] / calls * 1e6:6.2f} us per call")
+    print(f"  templates use {results['templates'] / results['baseline']:.0%} of the baseline CPU")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
@@ -0,0 +1,92 @@
+"""
+Compare buffered and streaming decoding of large OpenGIN responses.
+
+    python -m benchmarks.bench_streaming [count] [chunk_size]
+
+The response body is fed in chunks with a small delay per chunk to mimic a network read.
+
+- buffered: read the whole body, then decode it (OPENGIN_STREAMING_DECODE=false)
+- streaming: decode items while the chunks arrive (OPENGIN_STREAMING_DECODE=true)
+
+Reported per case:
+- transient: peak memory (tracemalloc) above what the decoded result itself keeps, i.e. the raw body
+  and any intermediate objects that only exist while decoding
+- latency: wall time until the decoded result is ready, measured without tracemalloc
+- cpu: CPU time spent, the streaming parser trades some CPU for overlapping decoding with the read
+"""
+import asyncio
+import json
+import sys
+import time
+import tracemalloc
+from benchmarks.bench_decoding import build_payloads
+from src.utils.response_decoder import decode_entities, stream_entities, stream_object
+
+CHUNK_DELAY = 0.001
+
+
+def build_attributes(count: int) -> bytes:
+    # the attributes endpoint returns the dataset table as one JSON encoded string
+    table = {"columns": ["id", "name", "value"], "rows": [[i, f"row {i}", i * 1.5] for i in range(count)]}
+    return json.dumps({"start": "2024-01-01T00:00:00Z", "end": "", "value": json.dumps(table)}).encode()
+
+
+async def network(raw: bytes, chunk_size: int):
+    for start in range(0, len(raw), chunk_size):
+        await asyncio.sleep(CHUNK_DELAY)
+        yield raw[start:start + chunk_size]
+
+
+async def buffered_read(raw: bytes, chunk_size: int) -> bytes:
+    return b"".join([chunk async for chunk in network(raw, chunk_size)])
+
+
+def measure(make_coroutine) -> tuple[float, float, float]:
+    """Returns (transient MiB, wall seconds, cpu seconds)"""
+    asyncio.run(make_coroutine())  # warm up
+    wall, cpu = time.perf_counter(), time.process_time()
+    asyncio.run(make_coroutine())
+    wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+
+    tracemalloc.start()
+    result = asyncio.run(make_coroutine())
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return (peak - retained) / 2**20, wall, cpu
+
+
+def main(count: int = 10_000, chunk_size: int = 65536):
+    entity_raw, _ = build_payloads(count)
+    attributes_raw = build_attributes(count)
+
+    async def buffered_entities():
+        return decode_entities(await buffered_read(entity_raw, chunk_size))
+
+    async def streaming_entities():
+        return await stream_entities(network(entity_raw, chunk_size))
+
+    async def buffered_attributes():
+        return json.loads(await buffered_read(attributes_raw, chunk_size))
+
+    async def streaming_attributes():
+        return await stream_object(network(attributes_raw, chunk_size))
+
+    cases = {
+        f"entities ({len(entity_raw) / 2**20:.1f} MiB)": {"buffered": buffered_entities, "streaming": streaming_entities},
+        f"attributes ({len(attributes_raw) / 2**20:.1f} MiB)": {"buffered": buffered_attributes, "streaming": streaming_attributes},
+    }
+
+    print(f"{count} items, {chunk_size} byte chunks, {CHUNK_DELAY * 1000:.1f} ms per chunk")
+    for name, variants in cases.items():
+        print(f"  {name}")
+        for variant, make_coroutine in variants.items():
+            transient, wall, cpu = measure(make_coroutine)
+            print(f"    {variant:<10} transient {transient:7.2f} MiB   latency {wall * 1000:8.2f} ms   cpu {cpu * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 10_000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 65536,
+    )
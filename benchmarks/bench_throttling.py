@@ -0,0 +1,105 @@
+"""
+Compare the per-request overhead of the throttling middleware on a trivial endpoint.
+
+    python -m benchmarks.bench_throttling [requests] [concurrency]
+
+Every variant serves the same tiny JSON endpoint through httpx's in-process ASGI transport, so the numbers
+are the cost of the middleware stack itself, not of the network or OpenGIN.
+
+- none: no throttling middleware
+- base_http: the previous BaseHTTPMiddleware implementation (extra task and memory stream per request)
+- asgi: the plain ASGI ThrottlingMiddleware (current)
+- stack: the middleware stack main.py builds (server timing, deadline and throttling, all plain ASGI)
+
+Latency includes the time a request waits for the event loop behind the other clients' requests, so at a
+fixed concurrency it follows the throughput. Without middleware nothing yields and the clients take turns.
+"""
+import asyncio
+import statistics
+import sys
+import time
+import httpx
+from fastapi import FastAPI
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from src.core.config import settings
+from src.middleware.deadline import DeadlineMiddleware
+from src.middleware.server_timing import ServerTimingMiddleware
+from src.middleware.throttling import ThrottlingMiddleware
+
+
+class BaseHTTPThrottlingMiddleware(BaseHTTPMiddleware):
+    """The BaseHTTPMiddleware implementation ThrottlingMiddleware replaced, kept for comparison"""
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.timeout = settings.THROTTLING_TIMEOUT
+        self.semaphore = asyncio.Semaphore(settings.THROTTLING_MAX_CONCURRENT)
+
+    async def dispatch(self, request: Request, call_next):
+        try:
+            await asyncio.wait_for(self.semaphore.acquire(), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            return JSONResponse(status_code=429, content={"detail": "Server is busy. Please try again shortly."})
+        try:
+            return await call_next(request)
+        finally:
+            self.semaphore.release()
+
+
+def build_app(middleware: tuple) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    # added innermost first, like main.py
+    for cls in middleware:
+        app.add_middleware(cls)
+    return app
+
+
+async def run(app: FastAPI, requests: int, concurrency: int) -> tuple[float, list[float]]:
+    """Wall seconds for `requests` requests sent by `concurrency` clients, and every request's latency"""
+    latencies = []
+    remaining = iter(range(requests))
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def worker():
+            for _ in remaining:
+                started = time.perf_counter()
+                response = await client.get("/ping")
+                latencies.append(time.perf_counter() - started)
+                assert response.status_code == 200
+
+        started = time.perf_counter()
+        await asyncio.gather(*[worker() for _ in range(concurrency)])
+        return time.perf_counter() - started, latencies
+
+
+async def main(requests: int = 20_000, concurrency: int = 50):
+    cases = {
+        "none": (),
+        "base_http": (BaseHTTPThrottlingMiddleware,),
+        "asgi": (ThrottlingMiddleware,),
+        "stack": (ThrottlingMiddleware, DeadlineMiddleware, ServerTimingMiddleware),
+    }
+
+    print(f"{requests} requests from {concurrency} concurrent clients, THROTTLING_MAX_CONCURRENT={settings.THROTTLING_MAX_CONCURRENT}")
+    results = {}
+    for name, middleware in cases.items():
+        app = build_app(middleware)
+        await run(app, requests // 10, concurrency)  # warm up
+        elapsed, latencies = await run(app, requests, concurrency)
+        latencies.sort()
+        results[name] = requests / elapsed
+        p50 = statistics.median(latencies) * 1000
+        p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000
+        print(f"  {name:<10} {results[name]:8.0f} req/s   p50 {p50:6.2f} ms   p99 {p99:6.2f} ms")
+    print(f"  asgi serves {results['asgi'] / results['base_http']:.2f}x the requests per second of base_http")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(*(int(arg) for arg in sys.argv[1:3])))
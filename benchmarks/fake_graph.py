@@ -0,0 +1,102 @@
+"""
+Generate a synthetic OpenGIN graph for the fake OpenGIN transport (OPENGIN_TRANSPORT=fake).
+
+    python -m benchmarks.fake_graph [path] [ministries] [departments per ministry] [datasets per category]
+
+The shape follows what the services walk:
+- gov_01 -AS_PRESIDENT-> president, -AS_PRIME_MINISTER-> prime minister
+- president -AS_MINISTER-> ministries
+- ministry -AS_APPOINTED-> minister, -AS_DEPARTMENT-> departments
+- parent category -AS_CATEGORY-> child categories -IS_ATTRIBUTE-> datasets (with tabular attributes)
+- persons have a `<id>_profile` attribute only for every other person, like the real data
+
+Two government terms are generated so that historical and current activeAt dates both resolve.
+benchmarks/fixtures/opengin_graph.json is this generator's output with the default small sizes.
+"""
+import json
+import sys
+
+TERMS = (("2015-01-09T00:00:00Z", "2019-11-18T00:00:00Z"), ("2019-11-18T00:00:00Z", ""))
+
+
+def build_graph(ministries: int = 3, departments: int = 2, datasets: int = 2) -> dict:
+    entities, relations, attributes = [], [], {}
+    metadata = {}
+
+    def entity(entity_id: str, name: str, major: str, minor: str, created: str = "2015-01-09T00:00:00Z", terminated: str = ""):
+        entities.append({
+            "id": entity_id,
+            "name": name,
+            "kind": {"major": major, "minor": minor},
+            "created": created,
+            "terminated": terminated,
+        })
+
+    def relation(source: str, name: str, target: str, start: str, end: str):
+        relations.append({
+            "id": f"{source}_{name.lower()}_{target}",
+            "source": source,
+            "target": target,
+            "name": name,
+            "startTime": start,
+            "endTime": end,
+        })
+
+    entity("gov_01", "Government of Sri Lanka", "Organisation", "government")
+    metadata["gov_01"] = {"description": "Root of the government structure"}
+
+    for term, (start, end) in enumerate(TERMS, start=1):
+        president, prime_minister = f"person_president_{term}", f"person_pm_{term}"
+        entity(president, f"President {term}", "Person", "citizen", start)
+        entity(prime_minister, f"Prime Minister {term}", "Person", "citizen", start)
+        relation("gov_01", "AS_PRESIDENT", president, start, end)
+        relation("gov_01", "AS_PRIME_MINISTER", prime_minister, start, end)
+
+        for m in range(1, ministries + 1):
+            ministry, minister = f"ministry_{term}_{m}", f"person_{term}_{m}"
+            entity(ministry, f"Ministry of Subject {m}", "Organisation", "cabinetMinister", start, end)
+            entity(minister, f"Minister {term}.{m}", "Person", "citizen", start)
+            relation(president, "AS_MINISTER", ministry, start, end)
+            relation(ministry, "AS_APPOINTED", minister, start, end)
+            if m % 2:
+                attributes.setdefault(minister, {})[f"{minister}_profile"] = {
+                    "columns": ["name", "political_party", "date_of_birth"],
+                    "rows": [[f"Minister {term}.{m}", "Party", "1960-01-01"]],
+                }
+
+            for d in range(1, departments + 1):
+                department = f"department_{m}_{d}"
+                if term == 1:
+                    entity(department, f"Department {m}.{d}", "Organisation", "department")
+                relation(ministry, "AS_DEPARTMENT", department, start, end)
+
+    entity("category_parent", "Economy", "Category", "parentCategory")
+    for c in range(1, 3):
+        category = f"category_{c}"
+        entity(category, f"Economy Topic {c}", "Category", "childCategory")
+        relation("category_parent", "AS_CATEGORY", category, TERMS[0][0], "")
+        for s in range(1, datasets + 1):
+            dataset, dataset_name = f"dataset_{c}_{s}", f"topic_{c}_table_{s}"
+            entity(dataset, dataset_name, "Dataset", "tabular")
+            relation(category, "IS_ATTRIBUTE", dataset, TERMS[0][0], "")
+            attributes.setdefault(category, {})[dataset_name] = {
+                "columns": ["year", "value"],
+                "rows": [[2015 + year, year * 10.5] for year in range(10)],
+            }
+
+    return {"entities": entities, "relations": relations, "metadata": metadata, "attributes": attributes}
+
+
+def main(path: str = "benchmarks/fixtures/opengin_graph.json", ministries: int = 3, departments: int = 2, datasets: int = 2):
+    graph = build_graph(ministries, departments, datasets)
+    with open(path, "w", encoding="utf-8") as graph_file:
+        json.dump(graph, graph_file, indent=1)
+        graph_file.write("\n")
+    print(f"{path}: {len(graph['entities'])} entities, {len(graph['relations'])} relations")
+
+
+if __name__ == "__main__":
+    main(
+        sys.argv[1] if len(sys.argv) > 1 else "benchmarks/fixtures/opengin_graph.json",
+        *(int(arg) for arg in sys.argv[2:5]),
+    )
@@ -1,22 +1,34 @@
-from fastapi import FastAPI
-from src.routers import organisation_router, data_router, search_router, person_router
+from fastapi import FastAPI, Depends
+from src.routers import organisation_router, data_router, search_router, person_router, metrics_router
 from src.core.config import settings
 from fastapi.middleware.cors import CORSMiddleware
 from src.middleware.throttling import ThrottlingMiddleware
+from src.middleware.server_timing import ServerTimingMiddleware
+from src.middleware.deadline import DeadlineMiddleware
 from src.utils.http_client import http_client
+from src.utils.request_scope import request_scope
+from src.utils.disk_cache import disk_cache
+from src.utils.shared_cache import shared_cache
 from contextlib import asynccontextmanager
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await http_client.start()
+    for store in (disk_cache, shared_cache):
+        if store is not None:
+            await store.start()
     yield
     await http_client.close()
+    for store in (disk_cache, shared_cache):
+        if store is not None:
+            await store.close()
 
 app = FastAPI(
     title="GI - Service",     
     description="API Adapter to the OpenGIn (Open General Information Network)",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    dependencies=[Depends(request_scope)]
 )
 
 allowed_origins = [origin.strip() for origin in settings.ALLOWED_ORIGINS.split(",") if origin.strip()]
@@ -32,11 +44,21 @@ app.add_middleware(
     allow_credentials=False,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "X-Upstream-Calls", "X-Upstream-Bytes", "X-Degraded", "Retry-After"],
 )
 
 app.add_middleware(ThrottlingMiddleware)
 
+# wraps the throttling middleware so the request budget also covers the wait for a slot
+app.add_middleware(DeadlineMiddleware)
+
+# added last so it wraps the throttling middleware and also times the wait for a slot
+app.add_middleware(ServerTimingMiddleware)
+
 app.include_router(organisation_router)
 app.include_router(data_router)
 app.include_router(search_router)
 app.include_router(person_router)
+
+if settings.METRICS_ENABLED:
+    app.include_router(metrics_router)
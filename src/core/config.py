@@ -1,6 +1,11 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
 class Settings(BaseSettings):
     BASE_URL_QUERY: str
+    OPENGIN_TRANSPORT: str = "http"
+    OPENGIN_FAKE_GRAPH: str = "benchmarks/fixtures/opengin_graph.json"
+    OPENGIN_FAKE_LATENCY_MS: float = 0
+    OPENGIN_FAKE_JITTER_MS: float = 0
+    OPENGIN_FAKE_ERROR_RATE: float = 0
     ALLOWED_ORIGINS: str
     HTTP_POOL_SIZE: int = 50 
     HTTP_POOL_SIZE_PER_HOST: int = 40
@@ -9,8 +14,73 @@ class Settings(BaseSettings):
     HTTP_TIMEOUT_CONNECT: int = 30
     HTTP_TIMEOUT_SOCK_CONNECT: int = 30
     HTTP_TIMEOUT_SOCK_READ: int = 90
+    BULKHEAD_ENABLED: bool = True
+    BULKHEAD_ENTITY_SLOTS: int = 16
+    BULKHEAD_RELATION_SLOTS: int = 16
+    BULKHEAD_ATTRIBUTE_SLOTS: int = 8
     THROTTLING_MAX_CONCURRENT: int = 200
     THROTTLING_TIMEOUT: int = 30
+    THROTTLING_ADAPTIVE_ENABLED: bool = False
+    THROTTLING_MIN_CONCURRENT: int = 10
+    THROTTLING_ADAPTIVE_LATENCY_TOLERANCE: float = 2.0
+    THROTTLING_ADAPTIVE_ERROR_RATE: float = 0.1
+    THROTTLING_WEIGHTED_ENABLED: bool = False
+    THROTTLING_ROUTE_COSTS: str = ""
+    THROTTLING_MAX_REQUEST_COST: float = 50
+    THROTTLING_HEAVY_SHARE: float = 0.5
+    THROTTLING_FAIR_QUEUING_ENABLED: bool = True
+    THROTTLING_CLIENT_HEADER: str = ""
+    THROTTLING_CLIENT_HEADER_HOPS: int = 1
+    THROTTLING_SHED_ENABLED: bool = True
+    THROTTLING_LIFO_AFTER: float = 0
+    REQUEST_DEADLINE_SECONDS: float = 60
+    ENTITY_CACHE_ENABLED: bool = True
+    ENTITY_CACHE_MAX_SIZE: int = 10000
+    ENTITY_CACHE_TTL: int = 3600
+    RELATION_CACHE_ENABLED: bool = True
+    RELATION_CACHE_MAX_SIZE: int = 20000
+    RELATION_CACHE_CURRENT_TTL: int = 300
+    RELATION_CACHE_HISTORICAL_TTL: int = 86400
+    RELATION_CACHE_HISTORICAL_AFTER_DAYS: int = 30
+    CACHE_STALE_WHILE_REVALIDATE: int = 60
+    CACHE_STALE_IF_ERROR: int = 3600
+    NEGATIVE_CACHE_ENABLED: bool = True
+    NEGATIVE_CACHE_MAX_SIZE: int = 10000
+    NEGATIVE_CACHE_TTL: int = 60
+    DISK_CACHE_ENABLED: bool = False
+    DISK_CACHE_PATH: str = ".cache/opengin_cache.sqlite3"
+    DISK_CACHE_MAX_MB: int = 256
+    DISK_CACHE_TTL: int = 2592000
+    DISK_CACHE_COMPACT_EVERY: int = 500
+    SHARED_CACHE_BACKEND: str = "none"
+    SHARED_CACHE_URL: str = ""
+    SHARED_CACHE_MAX_SIZE: int = 10000
+    SHARED_CACHE_MAX_MB: int = 256
+    SHARED_CACHE_POOL_SIZE: int = 4
+    SHARED_CACHE_TIMEOUT: float = 0.5
+    ENTITY_BATCH_CONCURRENCY: int = 10
+    CIRCUIT_BREAKER_ENABLED: bool = True
+    CIRCUIT_BREAKER_WINDOW_SECONDS: int = 30
+    CIRCUIT_BREAKER_MIN_CALLS: int = 20
+    CIRCUIT_BREAKER_ERROR_RATE: float = 0.5
+    CIRCUIT_BREAKER_SLOW_CALL_SECONDS: float = 5.0
+    CIRCUIT_BREAKER_SLOW_CALL_RATE: float = 0.8
+    CIRCUIT_BREAKER_OPEN_SECONDS: int = 15
+    CIRCUIT_BREAKER_HALF_OPEN_CALLS: int = 3
+    RETRY_BUDGET_ENABLED: bool = True
+    RETRY_BUDGET_RATIO: float = 0.1
+    RETRY_BUDGET_MIN_PER_SECOND: float = 1.0
+    RETRY_BUDGET_MAX_TOKENS: float = 10.0
+    HEDGING_ENABLED: bool = False
+    HEDGING_PERCENTILE: float = 0.95
+    HEDGING_MAX_RATIO: float = 0.05
+    HEDGING_MIN_SAMPLES: int = 20
+    OPENGIN_STREAMING_DECODE: bool = False
+    OPENGIN_STREAM_CHUNK_SIZE: int = 65536
+    METRICS_ENABLED: bool = True
+    METRICS_PATH: str = "/metrics"
+    SERVER_TIMING_ENABLED: bool = True
+    UPSTREAM_ACCOUNTING_HEADERS: bool = True
 
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
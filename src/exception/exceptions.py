@@ -1,3 +1,4 @@
+from typing import Optional
 from fastapi import HTTPException, status
 
 class NotFoundError(HTTPException):
@@ -13,8 +14,9 @@ class InternalServerError(HTTPException):
         super().__init__(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=message)
 
 class ServiceUnavailableError(HTTPException):
-    def __init__(self, message: str):
-        super().__init__(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=message)
+    def __init__(self, message: str, retry_after: Optional[int] = None):
+        headers = {"Retry-After": str(retry_after)} if retry_after is not None else None
+        super().__init__(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=message, headers=headers)
 
 class GatewayTimeoutError(HTTPException):
     def __init__(self, message: str):
@@ -0,0 +1,97 @@
+import asyncio
+import logging
+import time
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from src.core.config import settings
+from src.utils.deadline import current_deadline
+from src.utils.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+requests_abandoned = registry.counter(
+    "gi_requests_abandoned_total", "Requests whose remaining work was cancelled", ["reason"]
+)
+
+
+class DeadlineMiddleware:
+    """
+    Gives every request REQUEST_DEADLINE_SECONDS from arrival (the throttling wait included) and puts the deadline
+    into a contextvar, OpenGINService bounds its calls and retries by what is left of it.
+
+    The request is handled in its own task which is cancelled, together with every upstream call it fanned out,
+    when the deadline passes (answered with 504 if nothing was sent yet) or the client disconnects.
+    Incoming messages are read by the middleware so a disconnect is noticed even while the endpoint does not read.
+
+    Written as a plain ASGI middleware, BaseHTTPMiddleware does not pass the disconnect on.
+    Must be added after ThrottlingMiddleware so that it wraps it and the budget covers the wait for a slot.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.seconds = settings.REQUEST_DEADLINE_SECONDS
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or self.seconds <= 0 or scope["path"] == settings.METRICS_PATH:
+            await self.app(scope, receive, send)
+            return
+
+        token = current_deadline.set(time.perf_counter() + self.seconds)
+        try:
+            await self._handle(scope, receive, send)
+        finally:
+            current_deadline.reset(token)
+
+    async def _handle(self, scope: Scope, receive: Receive, send: Send):
+        messages: asyncio.Queue[Message] = asyncio.Queue()
+        disconnected = asyncio.Event()
+        response_started = False
+        response_complete = False
+
+        async def listen():
+            while not disconnected.is_set():
+                message = await receive()
+                if message["type"] == "http.disconnect":
+                    disconnected.set()
+                messages.put_nowait(message)
+
+        async def app_receive() -> Message:
+            if disconnected.is_set() and messages.empty():
+                return {"type": "http.disconnect"}
+            return await messages.get()
+
+        async def app_send(message: Message):
+            nonlocal response_started, response_complete
+            if message["type"] == "http.response.start":
+                response_started = True
+            elif message["type"] == "http.response.body" and not message.get("more_body", False):
+                response_complete = True
+            await send(message)
+
+        handler = asyncio.ensure_future(self.app(scope, app_receive, app_send))
+        listener = asyncio.ensure_future(listen())
+        disconnect = asyncio.ensure_future(disconnected.wait())
+        try:
+            timeout = current_deadline.get() - time.perf_counter()
+            done, _ = await asyncio.wait({handler, disconnect}, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if handler in done or (disconnect in done and response_complete):
+                # finished, or the server reports the disconnect after the whole response went out
+                await handler
+                return
+
+            handler.cancel()
+            await asyncio.gather(handler, return_exceptions=True)
+            if disconnect in done:
+                requests_abandoned.inc(reason="disconnect")
+                logger.info(f"Client disconnected, cancelled {scope['method']} {scope['path']}")
+                return
+
+            requests_abandoned.inc(reason="deadline")
+            logger.warning(f"Request deadline of {self.seconds}s exceeded: {scope['method']} {scope['path']}")
+            if not response_started:
+                response = JSONResponse(status_code=504, content={"detail": "Request deadline exceeded"})
+                await response(scope, app_receive, send)
+        finally:
+            for task in (handler, listener, disconnect):
+                if not task.done():
+                    task.cancel()
@@ -0,0 +1,48 @@
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from src.core.config import settings
+from src.utils.request_timing import RequestTiming, current_request_timing
+
+
+class ServerTimingMiddleware:
+    """
+    Reports where the time of each request went in a `Server-Timing` header.
+
+    The middleware puts a RequestTiming into a contextvar that ThrottlingMiddleware, OpenGINService, Util and
+    the routes add to. With UPSTREAM_ACCOUNTING_HEADERS enabled the number of OpenGIN calls and the bytes
+    they returned are reported as `X-Upstream-Calls` and `X-Upstream-Bytes`.
+    Responses built from stale cached data because OpenGIN failed are marked with `X-Degraded: stale`.
+    Must be added after ThrottlingMiddleware so that it wraps it and sees the throttling wait.
+
+    Written as a plain ASGI middleware, the headers are added to the response start message as it goes out
+    and the body is passed on untouched.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timing = RequestTiming()
+
+        async def send_with_timing(message: Message):
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", [])
+                headers = MutableHeaders(scope=message)
+                if settings.SERVER_TIMING_ENABLED:
+                    headers["Server-Timing"] = timing.server_timing()
+                if settings.UPSTREAM_ACCOUNTING_HEADERS:
+                    headers["X-Upstream-Calls"] = str(timing.upstream_calls)
+                    headers["X-Upstream-Bytes"] = str(timing.upstream_bytes)
+                if timing.degraded:
+                    headers["X-Degraded"] = "stale"
+            await send(message)
+
+        token = current_request_timing.set(timing)
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_request_timing.reset(token)
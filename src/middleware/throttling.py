@@ -1,42 +1,206 @@
 import asyncio
 import logging
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
+import math
+import time
+from typing import Hashable, Optional
 from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
 from src.core.config import settings
+from src.utils.adaptive_limit import AdaptiveLimit
+from src.utils.admission import RouteCosts, WeightedSemaphore
+from src.utils.deadline import remaining
+from src.utils.metrics import registry
+from src.utils.request_timing import current_request_timing, record
 
 logger = logging.getLogger(__name__)
 
-class ThrottlingMiddleware(BaseHTTPMiddleware):
+# How fast the service time estimate follows the time completed requests held their slot
+SERVICE_TIME_SMOOTHING = 0.1
+
+throttle_capacity = registry.gauge("gi_throttle_capacity", "Requests (units with weighted throttling) processed concurrently")
+throttle_in_flight = registry.gauge("gi_throttle_in_flight", "Requests currently holding a throttling slot")
+throttle_units_in_use = registry.gauge("gi_throttle_units_in_use", "Throttling units held by the requests in flight")
+throttle_waiting = registry.gauge("gi_throttle_waiting", "Requests currently queued for a throttling slot")
+throttle_waiting_clients = registry.gauge("gi_throttle_waiting_clients", "Clients with requests queued for a throttling slot")
+throttle_queue_wait = registry.histogram("gi_throttle_queue_wait_seconds", "Time requests waited for a throttling slot")
+throttle_rejected = registry.counter("gi_throttle_rejected_total", "Requests rejected with 429 after waiting too long")
+throttle_shed = registry.counter("gi_throttle_shed_total", "Requests rejected with 429 on arrival because the expected wait was too long")
+
+class ThrottlingMiddleware:
     """
     Throttling middleware that queues excess requests instead of rejecting them.
     
-    Uses an asyncio.Semaphore to limit the number of concurrently processed requests.
+    Limits the number of concurrently processed requests to THROTTLING_MAX_CONCURRENT.
     When the limit is reached, new requests WAIT in a queue instead of getting 503'd.
+    With THROTTLING_ADAPTIVE_ENABLED the limit is tuned between THROTTLING_MIN_CONCURRENT and
+    THROTTLING_MAX_CONCURRENT from the latency and upstream errors of completed requests (see AdaptiveLimit).
+
+    With THROTTLING_WEIGHTED_ENABLED the limit counts units instead of requests and each request takes the cost
+    of its route (see RouteCosts), so a few requests that fan out into hundreds of OpenGIN calls fill it as much
+    as many cheap ones. Requests costing more than one unit may together hold at most THROTTLING_HEAVY_SHARE
+    of the limit, a burst of them queues among themselves and leaves the rest to cheap requests.
+
+    With THROTTLING_FAIR_QUEUING_ENABLED queued requests are grouped by client, the client IP or the value of
+    THROTTLING_CLIENT_HEADER, and freed slots are shared between the clients with deficit round robin, so one
+    client paging through every date can not push everybody else's requests to the back of the queue.
+
+    With THROTTLING_SHED_ENABLED a request is rejected on arrival, with a Retry-After header, when the wait expected
+    from the units queued ahead of it and the recent service time is longer than it may wait (the timeout or what
+    is left of the request deadline), instead of holding a connection until the timeout.
+    With THROTTLING_LIFO_AFTER a client's queue serves its newest requests first once its oldest has waited that long.
     
     If a request waits longer than `timeout` seconds, it gets a 429 Too Many Requests
     response (which is the correct HTTP status for throttling).
+
+    Written as a plain ASGI middleware: the request runs in the caller's task and response messages,
+    streamed bodies included, go straight to the server. A slot is held until the response is fully sent.
+
+    The metrics endpoint is not throttled so it can still be scraped while the service is saturated.
     """
     
-    def __init__(self, app):
-        super().__init__(app)
+    def __init__(self, app: ASGIApp):
+        self.app = app
         self.timeout = settings.THROTTLING_TIMEOUT
-        self.semaphore = asyncio.Semaphore(settings.THROTTLING_MAX_CONCURRENT)
+        self.limit = AdaptiveLimit(
+            min_limit=settings.THROTTLING_MIN_CONCURRENT,
+            max_limit=settings.THROTTLING_MAX_CONCURRENT,
+            tolerance=settings.THROTTLING_ADAPTIVE_LATENCY_TOLERANCE,
+            error_rate=settings.THROTTLING_ADAPTIVE_ERROR_RATE,
+            enabled=settings.THROTTLING_ADAPTIVE_ENABLED,
+        )
+        self.costs = RouteCosts(
+            RouteCosts.parse(settings.THROTTLING_ROUTE_COSTS),
+            max_cost=settings.THROTTLING_MAX_REQUEST_COST,
+            enabled=settings.THROTTLING_WEIGHTED_ENABLED,
+        )
+        self.heavy_share = settings.THROTTLING_HEAVY_SHARE
+        self.fair_queuing = settings.THROTTLING_FAIR_QUEUING_ENABLED
+        self.client_header = settings.THROTTLING_CLIENT_HEADER.lower().encode("latin-1")
+        self.trusted_hops = max(1, settings.THROTTLING_CLIENT_HEADER_HOPS)
+        self.shedding = settings.THROTTLING_SHED_ENABLED
+        # seconds completed requests held their slot, None until the first one completes
+        self.service_time: Optional[float] = None
+        self.slots = WeightedSemaphore(lambda: self.limit.current, lifo_after=settings.THROTTLING_LIFO_AFTER)
+        self.heavy_slots = WeightedSemaphore(lambda: self.heavy_share * self.limit.current, lifo_after=settings.THROTTLING_LIFO_AFTER)
+        throttle_capacity.set(self.limit.current)
+
+    @property
+    def in_flight(self) -> int:
+        return self.slots.holders
+
+    def client_key(self, scope: Scope) -> Hashable:
+        """Who a queued request is counted against, None puts every request into one arrival ordered queue"""
+        if not self.fair_queuing:
+            return None
+        if self.client_header:
+            chain = [
+                entry.strip()
+                for name, value in scope.get("headers", ())
+                if name == self.client_header
+                for entry in value.decode("latin-1").split(",")
+            ]
+            if chain:
+                # entries of a forwarding chain like X-Forwarded-For are appended by each proxy, only the ones our
+                # own proxies added can be trusted: the client is the entry added by the outermost of them
+                return chain[-min(self.trusted_hops, len(chain))]
+        client = scope.get("client")
+        return client[0] if client else None
+
+    def expected_wait(self, cost: float = 1, key: Hashable = None) -> Optional[float]:
+        """Seconds a new request would queue for a slot, None while there is no service time to go by"""
+        if not len(self.slots) and self.slots.in_use + cost <= self.limit.current:
+            return 0.0
+        if self.service_time is None:
+            return None
+        # every unit of the limit frees up once per service time
+        return self.slots.units_ahead(cost, key) * self.service_time / self.limit.current
+
+    async def _reject(self, scope: Scope, receive: Receive, send: Send, retry_after: Optional[float]):
+        headers = {"Retry-After": str(max(1, math.ceil(retry_after)))} if retry_after is not None else None
+        response = JSONResponse(
+            status_code=429,
+            content={"detail": "Server is busy. Please try again shortly."},
+            headers=headers,
+        )
+        await response(scope, receive, send)
+
+    async def _acquire(self, cost: float, key: Hashable):
+        if cost <= 1:
+            await self.slots.acquire(cost, key)
+            return
+
+        await self.heavy_slots.acquire(cost, key)
+        try:
+            await self.slots.acquire(cost, key)
+        except BaseException:
+            self.heavy_slots.release(cost)
+            raise
+
+    def _release(self, cost: float):
+        self.slots.release(cost)
+        if cost > 1:
+            self.heavy_slots.release(cost)
     
-    async def dispatch(self, request: Request, call_next):
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["path"] == settings.METRICS_PATH:
+            await self.app(scope, receive, send)
+            return
+
+        route = self.costs.route(scope) if self.costs.enabled else None
+        cost = self.costs.cost(route)
+        key = self.client_key(scope)
+        if self.shedding:
+            expected = self.expected_wait(cost, key)
+            left = remaining()
+            budget = self.timeout if left is None else min(self.timeout, left)
+            if expected is not None and expected > budget:
+                throttle_shed.inc()
+                logger.info(f"Request shed, expected wait {expected:.1f}s exceeds {budget:.1f}s: {scope['method']} {scope['path']}")
+                await self._reject(scope, receive, send, expected)
+                return
+
+        started = time.perf_counter()
+        throttle_waiting.inc()
         try:
             # Wait for a slot to open up (with timeout)
-            await asyncio.wait_for(self.semaphore.acquire(), timeout=self.timeout)
+            await asyncio.wait_for(self._acquire(cost, key), timeout=self.timeout)
+            acquired = True
         except asyncio.TimeoutError:
+            acquired = False
+        finally:
+            waited = time.perf_counter() - started
+            throttle_waiting.dec()
+            throttle_waiting_clients.set(self.slots.clients)
+            throttle_queue_wait.observe(waited)
+            record("throttle", waited)
+
+        if not acquired:
             # Only reject if the request has been waiting too long
-            logger.warning(f"Request throttled after {self.timeout}s wait: {request.method} {request.url.path}")
-            return JSONResponse(
-                status_code=429,
-                content={"detail": "Server is busy. Please try again shortly."}
-            )
+            throttle_rejected.inc()
+            logger.warning(f"Request throttled after {self.timeout}s wait: {scope['method']} {scope['path']}")
+            await self._reject(scope, receive, send, self.expected_wait(cost, key))
+            return
         
+        throttle_in_flight.inc()
+        throttle_units_in_use.set(self.slots.in_use)
+        timing = current_request_timing.get()
+        admitted = time.perf_counter()
+        failed: Optional[bool] = True
         try:
-            response = await call_next(request)
-            return response
+            await self.app(scope, receive, send)
+            failed = timing is not None and timing.upstream_errors > 0
+        except asyncio.CancelledError:
+            # abandoned by the client or the deadline, says nothing about how the request would have gone
+            failed = None
+            raise
         finally:
-            self.semaphore.release()
+            if failed is not None:
+                held = time.perf_counter() - admitted
+                self.service_time = held if self.service_time is None else self.service_time + SERVICE_TIME_SMOOTHING * (held - self.service_time)
+                self.limit.sample(held, failed, self.slots.in_use)
+                throttle_capacity.set(self.limit.current)
+                if timing is not None:
+                    self.costs.observe(route, timing.upstream_calls)
+            throttle_in_flight.dec()
+            self._release(cost)
+            throttle_units_in_use.set(self.slots.in_use)
@@ -5,8 +5,9 @@ from src.services.data_service import DataService
 from src.services.opengin_service import OpenGINService
 from fastapi import APIRouter
 from pydantic import BaseModel, Field
+from src.utils.request_timing import TimedRoute
 
-router = APIRouter(prefix="/v1/data", tags=["Data"])
+router = APIRouter(prefix="/v1/data", tags=["Data"], route_class=TimedRoute)
 
 def get_data_service():
     opengin_service = OpenGINService()
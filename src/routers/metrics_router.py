@@ -0,0 +1,21 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from src.core.config import settings
+from src.utils.metrics import registry
+
+# the components below register their collectors on import
+import src.utils.cache  # noqa: F401
+import src.utils.circuit_breaker  # noqa: F401
+import src.utils.hedging  # noqa: F401
+import src.utils.http_client  # noqa: F401
+import src.utils.retry_budget  # noqa: F401
+
+router = APIRouter(tags=["Metrics"])
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@router.get(settings.METRICS_PATH, response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    """Process metrics in the Prometheus text format"""
+    return PlainTextResponse(registry.render(), media_type=PROMETHEUS_CONTENT_TYPE)
@@ -2,8 +2,9 @@ from fastapi import APIRouter, Depends, Query, Body, Path
 from src.models.organisation_schemas import Date
 from src.services import OpenGINService, OrganisationService
 from typing import Sequence
+from src.utils.request_timing import TimedRoute
 
-router = APIRouter(prefix="/v1/organisation", tags=["Organisation"])
+router = APIRouter(prefix="/v1/organisation", tags=["Organisation"], route_class=TimedRoute)
 
 def get_organisation_service():
     opengin_service = OpenGINService()
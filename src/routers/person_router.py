@@ -1,7 +1,8 @@
 from fastapi import APIRouter, Depends, Path
 from src.services import OpenGINService, PersonService
+from src.utils.request_timing import TimedRoute
 
-router = APIRouter(prefix="/v1/person", tags=["Person"])
+router = APIRouter(prefix="/v1/person", tags=["Person"], route_class=TimedRoute)
 
 def get_person_service():
     opengin_service = OpenGINService()
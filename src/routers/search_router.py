@@ -4,8 +4,9 @@ from datetime import datetime
 from src.services.search_service import SearchService
 from src.services.opengin_service import OpenGINService
 from src.models.search_schemas import SearchResponse
+from src.utils.request_timing import TimedRoute
 
-router = APIRouter(prefix="/v1/search", tags=["Search"])
+router = APIRouter(prefix="/v1/search", tags=["Search"], route_class=TimedRoute)
 
 
 def get_search_service():
@@ -4,6 +4,7 @@ from typing import Dict
 from src.enums import KindMajorEnum, KindMinorEnum, RelationNameEnum, RelationDirectionEnum
 from src.exception.exceptions import InternalServerError, NotFoundError
 from src.exception.exceptions import BadRequestError
+from src.exception.exceptions import ServiceUnavailableError, GatewayTimeoutError
 from src.models.organisation_schemas import Relation
 from src.utils.util_functions import Util
 from src.models.organisation_schemas import Kind
@@ -60,7 +61,7 @@ class DataService:
             async with self.lock:
                 dataset_dictionary.setdefault(actual_name_title_case, set()).add(dataset.id)
 
-        except (BadRequestError):
+        except (BadRequestError, ServiceUnavailableError, GatewayTimeoutError):
             raise
         except Exception as e:
             logger.error(f"failed to enrich dataset {e}")
@@ -97,7 +98,7 @@ class DataService:
             async with self.lock:
                 categories_dictionary.setdefault(actual_name_title_case, set()).add(category.id)
         
-        except (BadRequestError):
+        except (BadRequestError, ServiceUnavailableError, GatewayTimeoutError):
             raise
         except Exception as e:
             logger.error(f"failed to enrich category {e}")
@@ -199,7 +200,7 @@ class DataService:
                     "datasets": datasets
                 }
                 
-        except (BadRequestError):
+        except (BadRequestError, ServiceUnavailableError, GatewayTimeoutError):
             raise
         except Exception as e:
             logger.error(f"failed to fetch data catalog {e}")
@@ -224,15 +225,20 @@ class DataService:
             if not dataset_ids:
                 raise BadRequestError("Dataset ID list is required")
 
-            # prepare the dataset entities
-            dataset_entities = [Entity(id=dataset_id) for dataset_id in dataset_ids]
+            # batched lookup of the dataset entities with bounded concurrency
+            dataset_entity_map = await self.opengin_service.get_entities_many(dataset_ids)
 
-            # parallel execution of tasks
-            dataset_entity_tasks = [self.opengin_service.get_entities(entity=entity) for entity in dataset_entities]
-            dataset_entities = await asyncio.gather(*dataset_entity_tasks)
+            # any failed lookup fails the whole request
+            for dataset_entity in dataset_entity_map.values():
+                if isinstance(dataset_entity, Exception):
+                    raise dataset_entity
+            # ids that differ only in whitespace resolve to the same dataset
+            dataset_entities = list({entity.id: entity for entity in dataset_entity_map.values()}.values())
+            if not dataset_entities:
+                raise BadRequestError("Dataset ID list is required")
 
             # get the dataset name task
-            dataset_first_datum = dataset_entities[0][0]
+            dataset_first_datum = dataset_entities[0]
 
             # decode the protobuf value
             dataset_name = Util.decode_protobuf_attribute_name(dataset_first_datum.name)
@@ -246,8 +252,8 @@ class DataService:
             # get the dataset years
             dataset_years = [
                 {
-                    "datasetId": entity[0].id,
-                    "year": entity[0].created.split("-")[0] if entity[0].created else "Unknown"
+                    "datasetId": entity.id,
+                    "year": entity.created.split("-")[0] if entity.created else "Unknown"
                 }
                 for entity in dataset_entities
             ]
@@ -260,7 +266,7 @@ class DataService:
                 "years": dataset_years
             }
 
-        except (BadRequestError, NotFoundError):
+        except (BadRequestError, NotFoundError, ServiceUnavailableError, GatewayTimeoutError):
             raise
         except Exception as e:
             logger.error(f"failed to fetch dataset available years {e}")
@@ -316,7 +322,7 @@ class DataService:
             
             return formatted_attributes
 
-        except (BadRequestError, NotFoundError):
+        except (BadRequestError, NotFoundError, ServiceUnavailableError, GatewayTimeoutError):
             raise
         except Exception as e:
             logger.error(f"failed to fetch data attributes {e}")
@@ -378,7 +384,7 @@ class DataService:
             
             return root_entity_data
 
-        except (BadRequestError, NotFoundError):
+        except (BadRequestError, NotFoundError, ServiceUnavailableError, GatewayTimeoutError):
             raise
         except Exception as e:
             logger.error(f"Failed to fetch dataset root for dataset {dataset_id}: {e}")
@@ -444,7 +450,7 @@ class DataService:
                 "categories": categories
             }
 
-        except (BadRequestError, NotFoundError):
+        except (BadRequestError, NotFoundError, ServiceUnavailableError, GatewayTimeoutError):
             raise
         except Exception as e:
             logger.error(f"Failed to fetch categories for dataset {dataset_id}: {e}")
@@ -543,7 +549,7 @@ class DataService:
             parent_category_id = parent_relations[0].relatedEntityId
             return await self.find_root_department_or_minister(parent_category_id)
 
-        except (BadRequestError, NotFoundError):
+        except (BadRequestError, NotFoundError, ServiceUnavailableError, GatewayTimeoutError):
             raise
         except Exception as e:
             logger.error(f"Failed to find root department, state minister or cabinet minister for category {category_id}: {e}")
@@ -1,16 +1,39 @@
 from asyncio import timeout
 from google.api_core.exceptions import GoogleAPICallError
 from google.api_core.retry import if_transient_error
+from google.api_core.retry import RetryFailureReason, build_retry_error
 from src.models.organisation_schemas import Entity, Relation
 from src.exception.exceptions import BadRequestError
 from src.exception.exceptions import InternalServerError
 from src.exception.exceptions import NotFoundError
 from google.api_core import retry_async
 from google.api_core import exceptions
-from aiohttp import ClientSession
-from src.utils.http_client import http_client
+from src.utils.http_client import bulkheaded
+from src.utils.transport import Transport, transport
+from src.utils.single_flight import SingleFlight
+from src.utils.request_scope import load_once
+from src.utils.request_payloads import JSON_HEADERS, request_payloads
+from src.utils.circuit_breaker import circuit_protected
+from src.utils.retry_budget import retry_budget
+from src.utils.hedging import hedged
+from src.utils.deadline import allows_retry, bounded_backoff, within_deadline
+from src.utils.metrics import instrumented, record_retry, count_chunks, record_response_bytes
+from src.utils.response_decoder import decode_entities, decode_relations, stream_entities, stream_relations, stream_object
+from src.utils.response_decoder import entity_list_adapter, relation_list_adapter
+from src.utils.disk_cache import disk_cache
+from src.utils.shared_cache import CacheStore, shared_cache
+from pydantic import TypeAdapter, ValidationError
+from src.utils.cache import TTLCache, entity_cache, relation_cache, relation_ttl_policy, negative_cache, negative_cache_hits
+from src.utils.background_refresh import background_refresher
+from src.utils.request_timing import mark_degraded
+from src.utils.util_functions import Util
 from src.core.config import settings
+import asyncio
+import functools
+import json
 import logging
+import time
+from typing import Any, Callable, Iterable, Optional
 
 logger = logging.getLogger(__name__)
 
@@ -18,57 +41,293 @@ def custom_retry_predicate(exception: Exception) -> bool:
     """
     Determine if the request should be retried based on the exception type.
     Returns False for BadRequestError to skip retries.
+    Retryable errors are only retried while the request deadline leaves room for another attempt,
+    the retry budget is checked by DeadlineRetry once the retry is actually scheduled.
     """
     if isinstance(exception, (BadRequestError, NotFoundError)):
         return False
     
     if isinstance(exception, (InternalServerError)):
-        return True
+        return allows_retry()
 
-api_retry_decorator = retry_async.AsyncRetry(
-    predicate=custom_retry_predicate,
-    initial=1.0,
-    maximum=6.0,
-    multiplier=2.0,
-    timeout=10.0 # retry for 10 seconds
-)
+class DeadlineRetry(retry_async.AsyncRetry):
+    """
+    AsyncRetry bounded by the request deadline: backoff sleeps leave enough of the remaining budget for the
+    next attempt. The deadline is read again before every retry (by the sleeps and custom_retry_predicate)
+    rather than fixed when the call starts, since a single-flight call gets more time when a request with a
+    later deadline joins it.
+
+    A retry takes a token from the retry budget only once it is certain to be made, i.e. after the
+    predicate and the retry timeout allowed it. Without a token the last error is raised as is.
+    """
+
+    def _budgeted(self, sleeps: Iterable[float], deadline: Optional[float], errors: list[Exception]):
+        for sleep in sleeps:
+            if deadline is not None and time.monotonic() + sleep > deadline:
+                final_exc, source_exc = build_retry_error(errors, RetryFailureReason.TIMEOUT, self._timeout)
+                raise final_exc from source_exc
+            if not retry_budget.try_spend():
+                raise errors[-1] from None
+            yield sleep
+
+    def __call__(self, func, on_error=None):
+        on_error = self._on_error or on_error
+
+        @functools.wraps(func)
+        async def retry_wrapped_func(*args, **kwargs):
+            deadline = None if self._timeout is None else time.monotonic() + self._timeout
+            # the retryable errors so far, on_error runs right before the next sleep is drawn
+            errors: list[Exception] = []
+
+            def on_retryable_error(exc: Exception):
+                errors.append(exc)
+                if on_error is not None:
+                    on_error(exc)
+
+            sleeps = retry_async.exponential_sleep_generator(self._initial, self._maximum, multiplier=self._multiplier)
+            # the retry timeout is applied by _budgeted, before a token is spent
+            return await retry_async.retry_target(
+                functools.partial(func, *args, **kwargs),
+                predicate=self._predicate,
+                sleep_generator=self._budgeted(bounded_backoff(sleeps), deadline, errors),
+                timeout=None,
+                on_error=on_retryable_error,
+            )
+        return retry_wrapped_func
+
+def api_retry(operation: str) -> retry_async.AsyncRetry:
+    """Retry decorator for one upstream operation, every scheduled retry is counted in the metrics"""
+    # the sleep generator applies full jitter: each delay is uniform in [0, current backoff]
+    return DeadlineRetry(
+        predicate=custom_retry_predicate,
+        initial=1.0,
+        maximum=6.0,
+        multiplier=2.0,
+        timeout=10.0, # retry for 10 seconds
+        on_error=record_retry(operation),
+    )
+
+# shared across service instances so concurrent requests coalesce onto the same upstream call
+upstream_single_flight = SingleFlight()
 
 class OpenGINService:
     """
     The OpenGINService directly interfaces with the OpenGIN APIs to retrieve data.
     """
     def __init__(self):
-        pass
+        self.single_flight = upstream_single_flight
+        self.entity_cache = entity_cache
+        self.relation_cache = relation_cache
+        self.negative_cache = negative_cache
+        self.relation_ttl_policy = relation_ttl_policy
+        self.background_refresher = background_refresher
+        self.disk_cache = disk_cache
+        self.shared_cache = shared_cache
+        self.transport: Transport = transport
+
+    # helpers: read the response body while recording its size
+    @staticmethod
+    async def _read_body(operation: str, response) -> bytes:
+        raw = await response.read()
+        record_response_bytes(operation, len(raw))
+        return raw
+
+    @staticmethod
+    def _stream_body(operation: str, response):
+        return count_chunks(operation, response.content.iter_chunked(settings.OPENGIN_STREAM_CHUNK_SIZE))
+
+    # helper: normalized key for a request payload
+    @staticmethod
+    def request_key(operation: str, *parts) -> tuple:
+        """Build a hashable key that is identical for equivalent upstream requests (encoded payloads are used as is)"""
+        return (operation, *(json.dumps(part, sort_keys=True) if isinstance(part, dict) else part for part in parts))
 
-    @property
-    def session(self) -> ClientSession:
-        return http_client.session
-    
-    @api_retry_decorator
     async def get_entities(self,entity: Entity):
 
         if not entity:
             raise BadRequestError("Entity is required")
 
+        key = self.request_key("entities", request_payloads.encode(entity))
+        return await load_once(key, lambda: self._remember_missing(key, lambda: self._cached_get_entities(key, entity)))
+
+    async def _cached_get_entities(self, key: tuple, entity: Entity):
+        # id-only lookups are served from the entity cache
+        if not self.is_id_lookup(entity):
+            return list(await self.single_flight.do(key, lambda: self._get_entities(entity)))
+
+        def fetch_upstream():
+            return self.single_flight.do(key, lambda: self._get_entities(entity))
+
+        def fetch_persisted():
+            # a terminated entity does not change any more, so it can be kept on disk
+            return self._read_through(
+                self.disk_cache, "entities", entity.id, entity_list_adapter, fetch_upstream,
+                persist_if=lambda entities: all(item.terminated for item in entities),
+            )
+
+        def fetch_shared():
+            return self._read_through(
+                self.shared_cache, "entities", entity.id, entity_list_adapter, fetch_persisted, ttl=self.entity_cache.ttl
+            )
+
+        result = await self._serve_cached(self.entity_cache, entity.id, fetch_shared)
+        return list(result)
+
+    async def _serve_cached(self, cache: TTLCache, cache_key, fetch, ttl: Optional[float] = None):
+        """
+        Serve from the cache, going upstream through `fetch` when needed.
+
+        - fresh entry: served as is
+        - within the stale-while-revalidate window: served as is while one background refresh runs
+        - past that: fetched upstream, if that fails and the entry is still within the stale-if-error
+          window it is served anyway and the request is marked as degraded
+        NotFoundError and BadRequestError are answers, not failures, so they are never hidden by stale data.
+        """
+        entry = cache.lookup(cache_key)
+        if entry is not None and entry.fresh:
+            return entry.value
+
+        if entry is not None and entry.revalidate:
+            self.background_refresher.refresh(cache_key, lambda: self._refresh(cache, cache_key, fetch, ttl))
+            return entry.value
+
+        try:
+            result = await fetch()
+        except (NotFoundError, BadRequestError):
+            raise
+        except Exception as e:
+            if entry is None:
+                raise
+            logger.warning(f"Serving stale cache entry for {cache_key} after upstream error: {str(e)}")
+            cache.stale_on_error += 1
+            mark_degraded()
+            return entry.value
+
+        cache.set(cache_key, result, ttl=ttl)
+        return result
+
+    async def _remember_missing(self, key: tuple, fetch):
+        """
+        Answer from the negative cache when OpenGIN recently said the data is missing (404) or the
+        request is invalid (400), otherwise call `fetch` and remember such an answer for a short while
+        """
+        remembered = self.negative_cache.get(key)
+        if remembered is not None:
+            error_type, status_code, detail = remembered
+            negative_cache_hits.inc(operation=key[0], status=status_code)
+            # a fresh exception per caller, only what is needed to build it is cached so that the
+            # original exception and its traceback (with the frames it references) can be collected
+            raise error_type(detail)
+
+        try:
+            return await fetch()
+        except (NotFoundError, BadRequestError) as e:
+            self.negative_cache.set(key, (type(e), e.status_code, e.detail))
+            raise
+
+    @staticmethod
+    async def _read_through(
+        store: Optional[CacheStore],
+        namespace: str,
+        cache_key,
+        adapter: TypeAdapter,
+        fetch,
+        persist_if: Optional[Callable[[Any], bool]] = None,
+        ttl: Optional[float] = None,
+    ):
+        """
+        Read through a byte store tier (the shared cache or the disk cache) before calling `fetch`,
+        results are written back unless `persist_if` rejects them
+        """
+        if store is None:
+            return await fetch()
+
+        store_key = json.dumps(cache_key)
+        raw = await store.get(namespace, store_key)
+        if raw is not None:
+            try:
+                return adapter.validate_json(raw)
+            except ValidationError as e:
+                logger.warning(f"Ignoring unreadable cache entry {namespace} {store_key}: {str(e)}")
+
+        result = await fetch()
+        if persist_if is None or persist_if(result):
+            await store.set(namespace, store_key, adapter.dump_json(result), ttl=ttl)
+        return result
+
+    @staticmethod
+    async def _refresh(cache: TTLCache, cache_key, fetch, ttl: Optional[float] = None):
+        try:
+            result = await fetch()
+        except NotFoundError:
+            # gone upstream, stop serving it
+            cache.invalidate(cache_key)
+            return
+        cache.set(cache_key, result, ttl=ttl)
+
+    async def get_entities_many(self, entity_ids: Iterable[str], concurrency: Optional[int] = None) -> dict[str, Entity | Exception]:
+        """
+        Resolve many entity ids with bounded concurrency.
+
+        Ids are looked up once each after stripping whitespace, empty ids are dropped, at most `concurrency` lookups
+        (ENTITY_BATCH_CONCURRENCY by default) are in flight at once. Returns a map of id -> Entity, or id -> Exception
+        for ids that failed, keyed by the ids as the caller passed them.
+        """
+        requested = [entity_id for entity_id in entity_ids if entity_id and str(entity_id).strip()]
+        unique_ids = list(dict.fromkeys(str(entity_id).strip() for entity_id in requested))
+        if not unique_ids:
+            return {}
+
+        semaphore = asyncio.Semaphore(concurrency or settings.ENTITY_BATCH_CONCURRENCY)
+
+        async def fetch(entity_id: str) -> Entity:
+            async with semaphore:
+                entities = await self.get_entities(Entity(id=entity_id))
+            if not entities:
+                raise NotFoundError(f"Read API Error: Entity not found for id {entity_id}")
+            return entities[0]
+
+        results = dict(zip(unique_ids, await asyncio.gather(*[fetch(entity_id) for entity_id in unique_ids], return_exceptions=True)))
+        return {entity_id: results[str(entity_id).strip()] for entity_id in requested}
+
+    # helper: check if the entity search is a plain lookup by id
+    @staticmethod
+    def is_id_lookup(entity: Entity) -> bool:
+        return bool(entity.id) and entity.model_dump(exclude_defaults=True).keys() == {"id"}
+
+    def invalidate_entity(self, entity_id: str) -> bool:
+        """Drop a cached entity (or a remembered NotFound for it) so the next lookup goes upstream"""
+        missing = self.negative_cache.invalidate(self.request_key("entities", request_payloads.encode(Entity(id=entity_id))))
+        return self.entity_cache.invalidate(entity_id) or missing
+
+    @api_retry("search")
+    @within_deadline("search")
+    @bulkheaded("search")
+    @circuit_protected("search")
+    @retry_budget.tracked
+    @hedged("search")
+    @instrumented("search")
+    async def _get_entities(self, entity: Entity):
+
         url = f"{settings.BASE_URL_QUERY}/v1/entities/search"
-        headers = {"Content-Type":"application/json"}      
-        payload = entity.model_dump(mode="json")
+        payload = request_payloads.encode(entity)
 
         try:
-            async with self.session.post(url, json=payload, headers=headers) as response:
+            async with self.transport.post(url, data=payload, headers=JSON_HEADERS) as response:
                 if response.status == 404:
                     raise NotFoundError(f"Read API Error: Entity not found for id {entity.id}")
                 if response.status == 400:
                     raise BadRequestError(f"Read API Error: Bad request for id {entity.id}")
                 
                 response.raise_for_status()
-                res_json = await response.json()
-                response_list = res_json.get("body", [])
+                if settings.OPENGIN_STREAMING_DECODE:
+                    result = await stream_entities(self._stream_body("search", response))
+                else:
+                    result = decode_entities(await self._read_body("search", response))
 
-                if not response_list:
+                if not result:
                     raise NotFoundError(f"Read API Error: Entity not found for id {entity.id}")
 
-                result = [Entity.model_validate(response) for response in response_list]
                 return result    
                 
         except NotFoundError:
@@ -79,7 +338,6 @@ class OpenGINService:
             logger.error(f'Read API Error: {str(e)}')
             raise InternalServerError("An unexpected error occurred") from e
     
-    @api_retry_decorator
     async def fetch_relation(self, entityId: str, relation: Relation):
         
         if not entityId or not relation:
@@ -88,21 +346,74 @@ class OpenGINService:
         stripped_entity_id = str(entityId).strip()
         if not stripped_entity_id:
             raise BadRequestError("Entity ID can not be empty")
-        
+
+        key = self.request_key("relations", stripped_entity_id, request_payloads.encode(relation))
+        return await load_once(key, lambda: self._remember_missing(key, lambda: self._cached_fetch_relation(key, entityId, stripped_entity_id, relation)))
+
+    async def _cached_fetch_relation(self, key: tuple, entityId: str, stripped_entity_id: str, relation: Relation):
+        cache_key = self.relation_cache_key(stripped_entity_id, relation)
+
+        def fetch_upstream():
+            return self.single_flight.do(key, lambda: self._fetch_relation(entityId, stripped_entity_id, relation))
+
+        historical = self.relation_ttl_policy.is_historical(cache_key[3])
+        ttl = self.relation_ttl_policy.ttl_for(cache_key[3])
+
+        def fetch_persisted():
+            # relations as of a historical date do not change any more, so they can be kept on disk
+            if not historical:
+                return fetch_upstream()
+            return self._read_through(self.disk_cache, "relations", cache_key, relation_list_adapter, fetch_upstream)
+
+        def fetch_shared():
+            return self._read_through(self.shared_cache, "relations", cache_key, relation_list_adapter, fetch_persisted, ttl=ttl)
+
+        result = await self._serve_cached(self.relation_cache, cache_key, fetch_shared, ttl=ttl)
+        return list(result)
+
+    # helper: cache key for a relation query
+    @staticmethod
+    def relation_cache_key(entity_id: str, relation: Relation) -> tuple:
+        """(entityId, name, direction, normalized activeAt, ...remaining filters)"""
+        return (
+            entity_id,
+            relation.name,
+            relation.direction,
+            Util.normalize_timestamp(relation.activeAt),
+            relation.relatedEntityId,
+            relation.startTime,
+            relation.endTime,
+            relation.id,
+        )
+
+    def invalidate_relations(self, entity_id: str) -> int:
+        """Drop every cached relation answer for the given entity, returns the number removed"""
+        stripped_entity_id = str(entity_id).strip()
+        self.negative_cache.invalidate_where(lambda key: key[0] == "relations" and key[1] == stripped_entity_id)
+        return self.relation_cache.invalidate_where(lambda key: key[0] == stripped_entity_id)
+
+    @api_retry("relations")
+    @within_deadline("relations")
+    @bulkheaded("relations")
+    @circuit_protected("relations")
+    @retry_budget.tracked
+    @hedged("relations")
+    @instrumented("relations")
+    async def _fetch_relation(self, entityId: str, stripped_entity_id: str, relation: Relation):
+
         url = f"{settings.BASE_URL_QUERY}/v1/entities/{stripped_entity_id}/relations"
-        headers = {"Content-Type": "application/json"}  
-        payload = relation.model_dump(mode="json")
+        payload = request_payloads.encode(relation)
 
         try:
-            async with self.session.post(url, json=payload, headers=headers) as response:
+            async with self.transport.post(url, data=payload, headers=JSON_HEADERS) as response:
                 if response.status == 404:
                     raise NotFoundError(f"Read API Error: Relation not found for id {entityId}")
                 if response.status == 400:
                     raise BadRequestError(f"Read API Error: Bad request for id {entityId}")
                 response.raise_for_status()
-                data = await response.json()
-                result = [Relation.model_validate(item) for item in data]
-                return result
+                if settings.OPENGIN_STREAMING_DECODE:
+                    return await stream_relations(self._stream_body("relations", response))
+                return decode_relations(await self._read_body("relations", response))
 
         except NotFoundError:
             raise    
@@ -112,7 +423,6 @@ class OpenGINService:
             logger.error(f'Read API Error: {str(e)}')
             raise InternalServerError("An unexpected error occurred") from e
 
-    @api_retry_decorator
     async def get_metadata(self, entityId: str):
 
         if not entityId:
@@ -121,17 +431,31 @@ class OpenGINService:
         stripped_entity_id = str(entityId).strip()
         if not stripped_entity_id:
             raise BadRequestError("Entity ID can not be empty")
-        
+
+        key = self.request_key("metadata", stripped_entity_id)
+        return await load_once(key, lambda: self._remember_missing(key, lambda: self._get_metadata(entityId)))
+
+    @api_retry("metadata")
+    @within_deadline("metadata")
+    @bulkheaded("metadata")
+    @circuit_protected("metadata")
+    @retry_budget.tracked
+    @instrumented("metadata")
+    async def _get_metadata(self, entityId: str):
+
         url = f"{settings.BASE_URL_QUERY}/v1/entities/{entityId}/metadata"
-        headers = {"Content-Type": "application/json"}
-                
+
         try:
-            async with self.session.get(url, headers=headers) as response:
+            async with self.transport.get(url, headers=JSON_HEADERS) as response:
                 if response.status == 404:
                     raise NotFoundError(f"Read API Error: Metadata not found for id {entityId}")
                 if response.status == 400:
                     raise BadRequestError(f"Read API Error: Bad request for id {entityId}")
                 response.raise_for_status()
+                if settings.OPENGIN_STREAMING_DECODE:
+                    return await stream_object(self._stream_body("metadata", response))
+                # json() reuses the body that was already read
+                await self._read_body("metadata", response)
                 return await response.json()
         except NotFoundError:
             raise    
@@ -141,7 +465,6 @@ class OpenGINService:
             logger.error(f'Read API Error: {str(e)}')
             raise InternalServerError("An unexpected error occurred") from e 
 
-    @api_retry_decorator
     async def get_attributes(self,category_id: str, dataset_name: str):
         if not category_id:
             raise BadRequestError("Category ID is required")
@@ -156,17 +479,31 @@ class OpenGINService:
         stripped_dataset_name = str(dataset_name).strip()
         if not stripped_dataset_name:
             raise BadRequestError("Dataset name can not be empty")
-        
+
+        key = self.request_key("attributes", stripped_category_id, stripped_dataset_name)
+        return await load_once(key, lambda: self._remember_missing(key, lambda: self._get_attributes(category_id, dataset_name)))
+
+    @api_retry("attributes")
+    @within_deadline("attributes")
+    @bulkheaded("attributes")
+    @circuit_protected("attributes")
+    @retry_budget.tracked
+    @instrumented("attributes")
+    async def _get_attributes(self, category_id: str, dataset_name: str):
+
         url = f"{settings.BASE_URL_QUERY}/v1/entities/{category_id}/attributes/{dataset_name}"
-        headers = {"Content-Type": "application/json"}
-                
+
         try:
-            async with self.session.get(url, headers=headers) as response:
+            async with self.transport.get(url, headers=JSON_HEADERS) as response:
                 if response.status == 404:
                     raise NotFoundError(f"Read API Error: Attributes not found for category id {category_id} and dataset name {dataset_name}")
                 if response.status == 400:
                     raise BadRequestError(f"Read API Error: Bad request for category id {category_id} and dataset name {dataset_name}")
                 response.raise_for_status()
+                if settings.OPENGIN_STREAMING_DECODE:
+                    return await stream_object(self._stream_body("attributes", response))
+                # json() reuses the body that was already read
+                await self._read_body("attributes", response)
                 return await response.json()
         except NotFoundError:
             raise    
@@ -3,6 +3,8 @@ from src.enums.relationEnum import RelationNameEnum
 from src.exception.exceptions import BadRequestError
 from src.exception.exceptions import NotFoundError
 from src.exception.exceptions import InternalServerError
+from src.exception.exceptions import ServiceUnavailableError
+from src.exception.exceptions import GatewayTimeoutError
 import asyncio
 from src.utils.util_functions import Util
 from aiohttp import ClientSession
@@ -67,7 +69,7 @@ class OrganisationService:
                 "isNew": is_new,
                 "isPresident": is_president
             }
-        except (BadRequestError, NotFoundError):
+        except (BadRequestError, NotFoundError, ServiceUnavailableError, GatewayTimeoutError):
             raise
         except Exception as e:
             logger.error(f'Error fetching person data: {e}')
@@ -139,7 +141,7 @@ class OrganisationService:
 
             return portfolio_dict
 
-        except (BadRequestError, NotFoundError):
+        except (BadRequestError, NotFoundError, ServiceUnavailableError, GatewayTimeoutError):
             raise  
         except Exception as e:
             logger.error(f"Error enriching portfolio item: {e}")
@@ -159,7 +161,7 @@ class OrganisationService:
 
             return results
 
-        except (BadRequestError, NotFoundError):
+        except (BadRequestError, NotFoundError, ServiceUnavailableError, GatewayTimeoutError):
             raise
         except Exception as e:
             logger.error(f"Error fetching portfolio item: {e}")
@@ -258,7 +260,7 @@ class OrganisationService:
 
             return finalResult
 
-        except (BadRequestError, NotFoundError):
+        except (BadRequestError, NotFoundError, ServiceUnavailableError, GatewayTimeoutError):
             raise
         except Exception as e:
             raise InternalServerError("An unexpected error occurred") from e
@@ -356,7 +358,7 @@ class OrganisationService:
 
             return finalResult
 
-        except (BadRequestError, NotFoundError):
+        except (BadRequestError, NotFoundError, ServiceUnavailableError, GatewayTimeoutError):
             raise
         except Exception as e:
             raise InternalServerError("An unexpected error occurred") from e
@@ -415,7 +417,7 @@ class OrganisationService:
 
             return final_result
         
-        except (BadRequestError, NotFoundError):
+        except (BadRequestError, NotFoundError, ServiceUnavailableError, GatewayTimeoutError):
             raise
         except Exception as e:
             raise InternalServerError("An unexpected error occurred") from e
@@ -470,7 +472,7 @@ class OrganisationService:
                     flattened_results.extend(result)
             return flattened_results
 
-        except (BadRequestError, NotFoundError):
+        except (BadRequestError, NotFoundError, ServiceUnavailableError, GatewayTimeoutError):
             raise
         except Exception as e:
             raise InternalServerError("An unexpected error occurred") from e
@@ -597,20 +599,13 @@ class OrganisationService:
                 for (source, target), value in links_counter.items()
             ]
             
-            unique_ids = list({node['id'] for node in nodes})
-            tasks_for_getting_names = [
-                self.opengin_service.get_entities(
-                    entity= Entity(id=id)
-                )
-                for id in unique_ids
-            ]
-            name_output = await asyncio.gather(*tasks_for_getting_names, return_exceptions=True) 
+            unique_ids = [node['id'] for node in nodes]
+            name_output = await self.opengin_service.get_entities_many(unique_ids)
             
-            for name_obj in name_output:
+            for name_obj in name_output.values():
                 if isinstance(name_obj, Exception):
                     continue
-                for name in name_obj:
-                    name_lookup[name.id] = Util.decode_protobuf_attribute_name(name.name)
+                name_lookup[name_obj.id] = Util.decode_protobuf_attribute_name(name_obj.name)
                         
             for node in nodes:
                 node["name"] = name_lookup.get(node['id'])
@@ -620,7 +615,7 @@ class OrganisationService:
                 "links": links,
                 "dates": date_status,
             }
-        except (BadRequestError, NotFoundError):
+        except (BadRequestError, NotFoundError, ServiceUnavailableError, GatewayTimeoutError):
             raise
         except Exception as e:
             raise InternalServerError("An unexpected error occurred") from e
@@ -644,13 +639,12 @@ class OrganisationService:
 
     # helper : fetch entities in parallel and map them by id
     async def _fetch_and_map_entities(self, entity_ids: list[str]) -> dict[str, Entity]:
-        """Fetch multiple entities in parallel and return a map by ID."""
-        tasks = [self.opengin_service.get_entities(Entity(id=entity_id)) for entity_id in entity_ids]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        """Fetch multiple entities with bounded concurrency and return a map by ID."""
+        results = await self.opengin_service.get_entities_many(entity_ids)
         entity_map = {}
-        for result in results:
+        for result in results.values():
             if not isinstance(result, Exception) and result:
-                entity_map[result[0].id] = result[0]
+                entity_map[result.id] = result
         return entity_map
 
     # helper : fetch relations for multiple entities in parallel and map them by id
@@ -797,6 +791,8 @@ class OrganisationService:
 
             return collapsed
 
+        except (ServiceUnavailableError, GatewayTimeoutError):
+            raise
         except Exception as e:
             logger.error(f"Error in enrich_department_timeline: {e}")
             raise InternalServerError("An unexpected error occurred") from e
@@ -3,6 +3,8 @@ from src.enums.relationEnum import RelationNameEnum
 from src.exception.exceptions import BadRequestError
 from src.exception.exceptions import NotFoundError
 from src.exception.exceptions import InternalServerError
+from src.exception.exceptions import ServiceUnavailableError
+from src.exception.exceptions import GatewayTimeoutError
 import asyncio
 from src.utils.util_functions import Util
 from aiohttp import ClientSession
@@ -143,7 +145,7 @@ class PersonService:
 
             return final_result
 
-        except (BadRequestError, NotFoundError):
+        except (BadRequestError, NotFoundError, ServiceUnavailableError, GatewayTimeoutError):
             raise
         except Exception as e:
             logger.error(f"Error fetching person history: {e}")
@@ -194,7 +196,7 @@ class PersonService:
                     category_id=person_id,
                     dataset_name=f"{person_id}_profile",
                 )
-            except (BadRequestError, NotFoundError, InternalServerError) as e:
+            except (BadRequestError, NotFoundError, InternalServerError, ServiceUnavailableError, GatewayTimeoutError) as e:
                 logger.info(f"Person profile not available for person {person_id}, falling back to name only. Reason: {type(e).__name__}")
                 person_name = Util.decode_protobuf_attribute_name(person_data_res[0].name)
                 return PersonResponse(name=person_name)
@@ -231,7 +233,7 @@ class PersonService:
 
             return person_profile_res
             
-        except (BadRequestError, NotFoundError):
+        except (BadRequestError, NotFoundError, ServiceUnavailableError, GatewayTimeoutError):
             raise
         except Exception as e:
             logger.error(f"Error fetching person profile: {e}")
@@ -293,6 +295,8 @@ class PersonService:
             )
             president_relations, organization_gazettes, person_gazettes = results
             
+            if isinstance(president_relations, (ServiceUnavailableError, GatewayTimeoutError)):
+                raise president_relations
             if isinstance(president_relations, Exception):
                 logger.error(f"Failed to fetch president relations: {president_relations}")
                 raise InternalServerError("An unexpected error occurred while fetching president relations")
@@ -333,14 +337,12 @@ class PersonService:
             unique_president_ids = list(presidents_map.keys())
             
             # Fetch president details - name
-            tasks = [self.opengin_service.get_entities(Entity(id=president_id)) for president_id in unique_president_ids]
-            entities_results = await asyncio.gather(*tasks, return_exceptions=True)
+            entities_results = await self.opengin_service.get_entities_many(unique_president_ids)
 
             # Update the map with names
-            for i, president_id in enumerate(unique_president_ids):
-                entity_data = entities_results[i]
-                if not isinstance(entity_data, Exception) and entity_data:
-                    entity = entity_data[0]
+            for president_id in unique_president_ids:
+                entity = entities_results.get(president_id)
+                if entity and not isinstance(entity, Exception):
                     decoded_name = Util.decode_protobuf_attribute_name(entity.name)
                     presidents_map[president_id]["name"] = decoded_name
 
@@ -395,6 +397,8 @@ class PersonService:
             )
 
             return {"presidents": presidents_list}
+        except (BadRequestError, NotFoundError, ServiceUnavailableError, GatewayTimeoutError):
+            raise
         except Exception as e:
             logger.error(f"Error fetching all presidents: {e}")
             raise InternalServerError("An unexpected error occurred") from e
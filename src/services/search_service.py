@@ -2,7 +2,7 @@ import asyncio
 import logging
 from typing import List, Dict, Any, Optional
 from src.enums import KindMajorEnum, KindMinorEnum
-from src.exception.exceptions import BadRequestError, InternalServerError
+from src.exception.exceptions import BadRequestError, InternalServerError, ServiceUnavailableError, GatewayTimeoutError
 from src.models.organisation_schemas import Entity, Kind
 from src.models.search_schemas import SearchResult, SearchResponse
 from src.utils.util_functions import Util
@@ -75,6 +75,9 @@ class SearchService:
             all_results: List[Dict[str, Any]] = []
 
             for i, result in enumerate(results):
+                if isinstance(result, (ServiceUnavailableError, GatewayTimeoutError)):
+                    # an incomplete answer would look like fewer matches, report the outage instead
+                    raise result
                 if isinstance(result, Exception):
                     logger.error(f"Error searching {search_type_names[i]}: {result}")
                 else:
@@ -96,7 +99,7 @@ class SearchService:
                 results=search_results
             )
 
-        except BadRequestError:
+        except (BadRequestError, ServiceUnavailableError, GatewayTimeoutError):
             raise
         except Exception as e:
             logger.error(f"Unified search failed: {e}")
@@ -163,7 +166,7 @@ class SearchService:
             # Apply limit if specified
             return matching[:limit] if limit else matching
 
-        except BadRequestError:
+        except (BadRequestError, ServiceUnavailableError, GatewayTimeoutError):
             raise
         except Exception as e:
             logger.error(f"Error in generic_search for {major}/{minor}: {e}")
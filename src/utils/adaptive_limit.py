@@ -0,0 +1,94 @@
+import logging
+from typing import Optional
+from src.utils.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# Completed requests per adjustment window
+WINDOW_SAMPLES = 50
+
+# Factor the limit is multiplied by when a window shows overload
+BACKOFF_RATIO = 0.9
+
+# How fast the latency baseline follows the window latency, falling quickly and rising slowly so that
+# a period of overload does not immediately become the new normal
+BASELINE_FALL_SMOOTHING = 0.5
+BASELINE_RISE_SMOOTHING = 0.05
+
+limit_changes = registry.counter(
+    "gi_throttle_limit_changes_total", "Adjustments of the adaptive throttling limit", ["direction", "reason"]
+)
+
+
+class AdaptiveLimit:
+    """
+    Concurrency limit for the throttling middleware that follows what OpenGIN can take (AIMD).
+
+    Completed requests are collected in windows of WINDOW_SAMPLES, at the end of each window:
+
+    - decrease: when more than `error_rate` of the requests saw an upstream error, or their mean latency is
+      above `tolerance` times the baseline latency, the limit is multiplied by BACKOFF_RATIO
+    - increase: otherwise, when at least half of the limit was in use during the window, it grows by one
+
+    The baseline is a moving average of the window latencies. The limit stays within
+    [`min_limit`, `max_limit`] and starts at `max_limit`. A disabled limit always stays at `max_limit`.
+    """
+
+    def __init__(self, min_limit: int, max_limit: int, tolerance: float = 2.0, error_rate: float = 0.1, enabled: bool = False):
+        self.min_limit = min(min_limit, max_limit)
+        self.max_limit = max_limit
+        self.tolerance = tolerance
+        self.error_rate = error_rate
+        self.enabled = enabled
+        self.reset()
+
+    def reset(self):
+        self.limit = float(self.max_limit)
+        self.baseline: Optional[float] = None
+        self._reset_window()
+
+    def _reset_window(self):
+        self._samples = 0
+        self._latency_sum = 0.0
+        self._errors = 0
+        self._peak_in_flight = 0
+
+    @property
+    def current(self) -> int:
+        return int(self.limit)
+
+    def sample(self, latency: float, failed: bool, in_flight: int):
+        """Record one completed request, `in_flight` counts the requests being processed alongside it"""
+        if not self.enabled:
+            return
+
+        self._samples += 1
+        self._latency_sum += latency
+        self._errors += failed
+        self._peak_in_flight = max(self._peak_in_flight, in_flight)
+        if self._samples >= WINDOW_SAMPLES:
+            self._adjust()
+            self._reset_window()
+
+    def _adjust(self):
+        latency = self._latency_sum / self._samples
+        error_rate = self._errors / self._samples
+        baseline = latency if self.baseline is None else self.baseline
+
+        if error_rate > self.error_rate:
+            self._decrease("errors", f"{error_rate:.0%} of requests saw upstream errors")
+        elif latency > self.tolerance * baseline:
+            self._decrease("latency", f"latency {latency * 1000:.0f}ms against a baseline of {baseline * 1000:.0f}ms")
+        elif self._peak_in_flight * 2 >= self.limit and self.limit < self.max_limit:
+            self.limit = min(self.max_limit, self.limit + 1)
+            limit_changes.inc(direction="increase", reason="headroom")
+
+        smoothing = BASELINE_FALL_SMOOTHING if latency < baseline else BASELINE_RISE_SMOOTHING
+        self.baseline = baseline + smoothing * (latency - baseline)
+
+    def _decrease(self, reason: str, detail: str):
+        limit = max(self.min_limit, self.limit * BACKOFF_RATIO)
+        if limit < self.limit:
+            logger.info(f"Lowering the throttling limit from {self.current} to {int(limit)}: {detail}")
+            self.limit = limit
+            limit_changes.inc(direction="decrease", reason=reason)
@@ -0,0 +1,191 @@
+import asyncio
+import time
+from collections import OrderedDict, deque
+from typing import Callable, Hashable, Mapping, Optional
+from starlette.routing import Match
+from starlette.types import Scope
+from src.utils.metrics import registry
+
+# How fast a learned route cost follows the upstream calls of new requests
+COST_SMOOTHING = 0.1
+
+# Units a client may take per deficit round robin round
+QUANTUM = 1.0
+
+route_cost = registry.gauge("gi_throttle_route_cost", "Throttling units one request of a route takes", ["route"])
+
+
+class WeightedSemaphore:
+    """
+    Semaphore over a capacity of units where every acquirer takes `cost` units.
+
+    Waiters are queued per client key and the queues are served with deficit round robin: each client with
+    waiters earns QUANTUM units per round and its oldest waiter is admitted once its earned units cover the
+    cost and the cost fits into the capacity. A client sending many requests therefore gets the same share of
+    freed units as one sending a few, and waiters of a single client (or without keys) are admitted in arrival order.
+
+    With `lifo_after` a client queue whose oldest waiter has waited longer than that many seconds is overloaded
+    and serves its newest waiter first (adaptive LIFO): the ones admitted still have time left to be useful,
+    the oldest give up on their own.
+
+    The capacity is read through a callable so it can follow a limit that changes at runtime. A cost above
+    the whole capacity is admitted once nothing else holds units, so no request waits forever.
+    """
+
+    def __init__(self, capacity: Callable[[], float], lifo_after: float = 0):
+        self.capacity = capacity
+        self.lifo_after = lifo_after
+        self.in_use = 0.0
+        self.holders = 0
+        # per client: waiters as (cost, future, queued at), the units they ask for and the deficit round robin credit
+        self._flows: OrderedDict[Hashable, deque[tuple[float, asyncio.Future, float]]] = OrderedDict()
+        self._units: dict[Hashable, float] = {}
+        self._deficits: dict[Hashable, float] = {}
+
+    def __len__(self) -> int:
+        return sum(len(queue) for queue in self._flows.values())
+
+    @property
+    def clients(self) -> int:
+        """Clients with queued waiters"""
+        return len(self._flows)
+
+    def units_ahead(self, cost: float = 1, key: Hashable = None) -> float:
+        """
+        Units admitted before a new waiter of `cost` from `key` would be, itself included: round robin lets every
+        other client in for as many units as this client still asks for, or all of theirs if that is less
+        """
+        own = self._units.get(key, 0.0) + cost
+        return own + sum(min(units, own) for other, units in self._units.items() if other != key)
+
+    def _fits(self, cost: float) -> bool:
+        return self.in_use + cost <= self.capacity() or self.holders == 0
+
+    def _take(self, cost: float):
+        self.in_use += cost
+        self.holders += 1
+
+    async def acquire(self, cost: float = 1, key: Hashable = None):
+        if not self._flows and self._fits(cost):
+            self._take(cost)
+            return
+
+        waiter = (cost, asyncio.get_running_loop().create_future(), time.perf_counter())
+        if key not in self._flows:
+            self._flows[key] = deque()
+            self._units[key] = 0.0
+            self._deficits[key] = QUANTUM
+        self._flows[key].append(waiter)
+        self._units[key] += cost
+        try:
+            await waiter[1]
+        except asyncio.CancelledError:
+            if waiter[1].done() and not waiter[1].cancelled():
+                # the units were handed over just as the wait was given up
+                self.release(cost)
+            else:
+                queue = self._flows.get(key)
+                if queue is not None and waiter in queue:
+                    queue.remove(waiter)
+                    self._dequeued(key, cost)
+                # a costly waiter at the head may have held back cheaper ones that fit now
+                self._wake()
+            raise
+
+    def release(self, cost: float = 1):
+        self.in_use -= cost
+        self.holders -= 1
+        self._wake()
+
+    def _dequeued(self, key: Hashable, cost: float):
+        self._units[key] -= cost
+        if not self._flows[key]:
+            del self._flows[key]
+            del self._units[key]
+            del self._deficits[key]
+
+    def _wake(self):
+        # the capacity may have grown or shrunk since the units were taken
+        while self._flows:
+            key, queue = next(iter(self._flows.items()))
+            overloaded = self.lifo_after > 0 and time.perf_counter() - queue[0][2] > self.lifo_after
+            index = -1 if overloaded else 0
+            cost, future, _ = queue[index]
+            if future.done():
+                # cancelled, the waiter has not cleaned up after itself yet
+                del queue[index]
+                self._dequeued(key, cost)
+                continue
+            if self._deficits[key] < cost:
+                # the client used up its share of this round, its next turn comes after the others
+                self._deficits[key] += QUANTUM
+                self._flows.move_to_end(key)
+                continue
+            if not self._fits(cost):
+                return
+
+            del queue[index]
+            self._deficits[key] -= cost
+            self._dequeued(key, cost)
+            self._take(cost)
+            future.set_result(None)
+
+
+class RouteCosts:
+    """
+    Cost of a request in throttling units, by route template (e.g. /v1/organisation/cabinet-flow/{president_id}).
+
+    A route costs what is configured for it, otherwise what was learned: a moving average of the OpenGIN calls
+    its requests made (cache hits cost nothing). Costs are kept between 1 and `max_cost`, routes that were not
+    configured or seen yet and paths that match no route cost 1. A disabled RouteCosts prices everything at 1.
+    """
+
+    def __init__(self, configured: Mapping[str, float], max_cost: float, enabled: bool = False):
+        self.max_cost = max(1.0, max_cost)
+        self.enabled = enabled
+        self.configured = {route: self._bounded(cost) for route, cost in configured.items()}
+        self.learned: dict[str, float] = {}
+        for route, cost in self.configured.items():
+            route_cost.set(cost, route=route)
+
+    @staticmethod
+    def parse(value: str) -> dict[str, float]:
+        """Parse "route=cost,route=cost" as configured in THROTTLING_ROUTE_COSTS"""
+        costs = {}
+        for item in value.split(","):
+            if not item.strip():
+                continue
+            route, separator, cost = item.rpartition("=")
+            if not separator or not route.strip():
+                raise ValueError(f"Invalid THROTTLING_ROUTE_COSTS entry '{item.strip()}', expected route=cost")
+            costs[route.strip()] = float(cost)
+        return costs
+
+    def _bounded(self, cost: float) -> float:
+        return min(self.max_cost, max(1.0, cost))
+
+    @staticmethod
+    def route(scope: Scope) -> Optional[str]:
+        """Template of the application route the request goes to, None when no route matches"""
+        router = getattr(scope.get("app"), "router", None)
+        for candidate in getattr(router, "routes", ()):
+            match, _ = candidate.matches(scope)
+            if match == Match.FULL:
+                return getattr(candidate, "path", None)
+        return None
+
+    def cost(self, route: Optional[str]) -> float:
+        if not self.enabled or route is None:
+            return 1.0
+        if route in self.configured:
+            return self.configured[route]
+        return self._bounded(self.learned.get(route, 1.0))
+
+    def observe(self, route: Optional[str], upstream_calls: int):
+        """Learn from the OpenGIN calls one completed request of the route made"""
+        if not self.enabled or route is None or route in self.configured:
+            return
+        previous = self.learned.get(route)
+        learned = upstream_calls if previous is None else previous + COST_SMOOTHING * (upstream_calls - previous)
+        self.learned[route] = learned
+        route_cost.set(self._bounded(learned), route=route)
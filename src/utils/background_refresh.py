@@ -0,0 +1,50 @@
+import asyncio
+import contextvars
+import logging
+from typing import Awaitable, Callable, Hashable
+from src.utils.bulkhead import Priority, current_priority
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundRefresher:
+    """
+    Runs cache refreshes in the background, at most one at a time per key.
+
+    Refreshes run in an empty context so they do not count towards, or get cancelled with,
+    the request that happened to trigger them. Their upstream calls queue behind interactive ones.
+    """
+
+    def __init__(self):
+        self._tasks: dict[Hashable, asyncio.Task] = {}
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._tasks
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    def refresh(self, key: Hashable, fn: Callable[[], Awaitable]) -> bool:
+        """Start a refresh for the key, returns False when one is already running"""
+        if key in self._tasks:
+            return False
+
+        context = contextvars.Context()
+        context.run(current_priority.set, Priority.BACKGROUND)
+        task = asyncio.create_task(fn(), context=context)
+        self._tasks[key] = task
+        task.add_done_callback(lambda finished: self._finished(key, finished))
+        return True
+
+    def _finished(self, key: Hashable, task: asyncio.Task):
+        self._tasks.pop(key, None)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"Background refresh failed for {key}: {task.exception()}")
+
+    async def wait(self):
+        """Wait for the running refreshes to finish"""
+        while self._tasks:
+            await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+
+
+background_refresher = BackgroundRefresher()
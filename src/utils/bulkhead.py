@@ -0,0 +1,102 @@
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+from typing import Optional
+from src.utils.metrics import registry
+from src.utils.request_timing import record
+
+
+class Priority(IntEnum):
+    """Lower values are served first when callers queue for an upstream slot"""
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+
+# Priority of the upstream calls made from the current context, API requests are interactive,
+# background refreshes set BACKGROUND for their own context
+current_priority: ContextVar[Priority] = ContextVar("current_priority", default=Priority.INTERACTIVE)
+
+bulkhead_wait = registry.histogram(
+    "gi_bulkhead_wait_seconds", "Time spent queueing for an upstream slot", ["bulkhead", "priority"]
+)
+
+
+class Bulkhead:
+    """
+    Bounded number of concurrent upstream calls for one class of operation, so one slow class
+    (e.g. large attribute downloads) can not take every pooled connection from the others.
+
+    Callers beyond `limit` queue, a freed slot goes to the waiter with the lowest priority value,
+    in arrival order within a priority. A disabled bulkhead lets every call through.
+    """
+
+    def __init__(self, name: str, limit: int, enabled: bool = True):
+        self.name = name
+        self.limit = limit
+        self.enabled = enabled
+        self.in_use = 0
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self.queued = 0
+
+    def waiting(self, priority: Optional[Priority] = None) -> int:
+        return sum(1 for waiter in self._waiters if priority is None or waiter[0] == priority)
+
+    async def acquire(self, priority: Optional[Priority] = None):
+        priority = current_priority.get() if priority is None else priority
+        if self.in_use < self.limit and not self._waiters:
+            self.in_use += 1
+            return
+
+        waiter = (int(priority), next(self._sequence), asyncio.get_running_loop().create_future())
+        heapq.heappush(self._waiters, waiter)
+        self.queued += 1
+        try:
+            await waiter[2]
+        except asyncio.CancelledError:
+            if waiter[2].done() and not waiter[2].cancelled():
+                # the slot was handed over just as the caller got cancelled
+                self.release()
+            else:
+                self._waiters.remove(waiter)
+                heapq.heapify(self._waiters)
+            raise
+
+    def release(self):
+        # hand the slot straight to the next waiter, in_use stays the same
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        self.in_use -= 1
+
+    @asynccontextmanager
+    async def slot(self, priority: Optional[Priority] = None):
+        if not self.enabled:
+            yield
+            return
+
+        priority = current_priority.get() if priority is None else priority
+        started = time.perf_counter()
+        await self.acquire(priority)
+        waited = time.perf_counter() - started
+        bulkhead_wait.observe(waited, bulkhead=self.name, priority=priority.name.lower())
+        if waited > 0.001:
+            record("queue", waited)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self) -> dict:
+        return {
+            "limit": self.limit,
+            "inUse": self.in_use,
+            "waiting": self.waiting(),
+            "queued": self.queued,
+        }
@@ -0,0 +1,234 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Hashable, Optional
+from src.core.config import settings
+from src.utils.metrics import Counter, Gauge, registry
+
+
+@dataclass
+class CacheEntry:
+    """A cached value together with how it may still be used"""
+    value: Any
+    fresh: bool
+    # past the TTL but within the stale-while-revalidate window: serve it and refresh in the background
+    revalidate: bool
+
+
+class TTLCache:
+    """
+    In-process cache bounded by both size (least recently used entries are evicted first)
+    and age (entries expire `ttl` seconds after they were stored).
+
+    `get` returns `None` on a miss, so `None` itself can not be cached.
+
+    Expired entries can be kept around a little longer for `lookup`:
+    - for `stale_while_revalidate` seconds past the TTL they may be served while a refresh runs
+    - for `stale_if_error` seconds past the TTL they may be served when the refresh fails
+    """
+
+    def __init__(self, max_size: int, ttl: float, clock: Callable[[], float] = time.monotonic, stale_while_revalidate: float = 0, stale_if_error: float = 0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        self.stale_while_revalidate = stale_while_revalidate
+        self.stale_if_error = stale_if_error
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.stale_hits = 0
+        self.stale_on_error = 0
+
+    @property
+    def retain_seconds(self) -> float:
+        """How long past its TTL an entry is kept"""
+        return max(self.stale_while_revalidate, self.stale_if_error)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        entry = self._entries.get(key)
+        return entry is not None and entry[0] > self.clock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        now = self.clock()
+        if expires_at <= now:
+            if expires_at + self.retain_seconds <= now:
+                del self._entries[key]
+                self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def lookup(self, key: Hashable) -> Optional[CacheEntry]:
+        """Like `get`, but also returns expired entries that are still within a stale window"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        now = self.clock()
+        if expires_at > now:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return CacheEntry(value=value, fresh=True, revalidate=False)
+
+        if expires_at + self.retain_seconds <= now:
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        revalidate = expires_at + self.stale_while_revalidate > now
+        if revalidate:
+            self.stale_hits += 1
+        else:
+            self.misses += 1
+        return CacheEntry(value=value, fresh=False, revalidate=revalidate)
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        if self.max_size <= 0:
+            return
+
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+
+        self._entries[key] = (self.clock() + ttl, value)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> bool:
+        """Remove a single entry, returns True if it was present"""
+        return self._entries.pop(key, None) is not None
+
+    def invalidate_where(self, predicate: Callable[[Hashable], bool]) -> int:
+        """Remove every entry whose key matches the predicate, returns the number removed"""
+        keys = [key for key in self._entries if predicate(key)]
+        for key in keys:
+            del self._entries[key]
+        return len(keys)
+
+    def clear(self):
+        """Remove every entry and reset the counters"""
+        self._entries.clear()
+        self.hits = self.misses = self.evictions = self.expirations = 0
+        self.stale_hits = self.stale_on_error = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxSize": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "staleHits": self.stale_hits,
+            "staleOnError": self.stale_on_error,
+            "hitRatio": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class RelationTTLPolicy:
+    """
+    Decides how long a relation answer may be cached based on its `activeAt` date.
+
+    - activeAt older than `historical_after_days` -> `historical_ttl` (past cabinets effectively never change)
+    - recent activeAt, or none at all (full history queries) -> `current_ttl`
+    """
+
+    def __init__(self, historical_ttl: float, current_ttl: float, historical_after_days: int, now: Callable[[], datetime] = lambda: datetime.now(timezone.utc)):
+        self.historical_ttl = historical_ttl
+        self.current_ttl = current_ttl
+        self.historical_after_days = historical_after_days
+        self.now = now
+
+    def is_historical(self, active_at: Optional[str]) -> bool:
+        if not active_at:
+            return False
+        try:
+            active_at_date = datetime.fromisoformat(active_at.replace("Z", "+00:00"))
+        except ValueError:
+            return False
+        if active_at_date.tzinfo is None:
+            active_at_date = active_at_date.replace(tzinfo=timezone.utc)
+        return active_at_date < self.now() - timedelta(days=self.historical_after_days)
+
+    def ttl_for(self, active_at: Optional[str]) -> float:
+        return self.historical_ttl if self.is_historical(active_at) else self.current_ttl
+
+
+# Global cache instances shared by every OpenGINService
+entity_cache = TTLCache(
+    max_size=settings.ENTITY_CACHE_MAX_SIZE if settings.ENTITY_CACHE_ENABLED else 0,
+    ttl=settings.ENTITY_CACHE_TTL,
+    stale_while_revalidate=settings.CACHE_STALE_WHILE_REVALIDATE,
+    stale_if_error=settings.CACHE_STALE_IF_ERROR,
+)
+
+relation_cache = TTLCache(
+    max_size=settings.RELATION_CACHE_MAX_SIZE if settings.RELATION_CACHE_ENABLED else 0,
+    ttl=settings.RELATION_CACHE_CURRENT_TTL,
+    stale_while_revalidate=settings.CACHE_STALE_WHILE_REVALIDATE,
+    stale_if_error=settings.CACHE_STALE_IF_ERROR,
+)
+
+# NotFound / BadRequest answers from OpenGIN by request key, so repeated lookups for missing data stay local
+negative_cache = TTLCache(
+    max_size=settings.NEGATIVE_CACHE_MAX_SIZE if settings.NEGATIVE_CACHE_ENABLED else 0,
+    ttl=settings.NEGATIVE_CACHE_TTL,
+)
+
+negative_cache_hits = registry.counter(
+    "gi_negative_cache_hits_total", "Lookups answered with a remembered OpenGIN NotFound/BadRequest", ["operation", "status"]
+)
+
+relation_ttl_policy = RelationTTLPolicy(
+    historical_ttl=settings.RELATION_CACHE_HISTORICAL_TTL,
+    current_ttl=settings.RELATION_CACHE_CURRENT_TTL,
+    historical_after_days=settings.RELATION_CACHE_HISTORICAL_AFTER_DAYS,
+)
+
+
+def collect_metrics():
+    size = Gauge("gi_cache_entries", "Entries held by a cache", ["cache"])
+    max_size = Gauge("gi_cache_max_entries", "Maximum entries a cache may hold", ["cache"])
+    hits = Counter("gi_cache_hits_total", "Cache lookups answered from the cache", ["cache"])
+    misses = Counter("gi_cache_misses_total", "Cache lookups that went upstream", ["cache"])
+    evictions = Counter("gi_cache_evictions_total", "Entries evicted to stay within the size limit", ["cache"])
+    expirations = Counter("gi_cache_expirations_total", "Entries dropped after their TTL", ["cache"])
+    stale_hits = Counter("gi_cache_stale_hits_total", "Expired entries served while a background refresh ran", ["cache"])
+    stale_on_error = Counter("gi_cache_stale_on_error_total", "Expired entries served because the upstream call failed", ["cache"])
+    for name, cache in (("entity", entity_cache), ("relation", relation_cache), ("negative", negative_cache)):
+        stats = cache.stats()
+        size.set(stats["size"], cache=name)
+        max_size.set(stats["maxSize"], cache=name)
+        hits.inc(stats["hits"], cache=name)
+        misses.inc(stats["misses"], cache=name)
+        evictions.inc(stats["evictions"], cache=name)
+        expirations.inc(stats["expirations"], cache=name)
+        stale_hits.inc(stats["staleHits"], cache=name)
+        stale_on_error.inc(stats["staleOnError"], cache=name)
+    return [size, max_size, hits, misses, evictions, expirations, stale_hits, stale_on_error]
+
+
+registry.add_collector(collect_metrics)
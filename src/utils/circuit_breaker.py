@@ -0,0 +1,208 @@
+import asyncio
+import functools
+import logging
+import math
+import time
+from collections import deque
+from typing import Awaitable, Callable
+from src.core.config import settings
+from src.utils.metrics import Counter, Gauge, registry
+from src.exception.exceptions import BadRequestError, NotFoundError, ServiceUnavailableError
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# numeric value of each state, used when the state is exported as a gauge
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker for one class of upstream operation.
+
+    - closed: calls pass through, outcomes are recorded in a sliding time window
+    - open: once the window holds `min_calls` calls and either the error rate or the slow call rate
+      crosses its threshold, every call fails fast with ServiceUnavailableError for `open_seconds`
+    - half_open: up to `half_open_max_calls` probe calls are let through, closes again once that many
+      succeed, any probe failure opens the circuit again
+
+    NotFoundError and BadRequestError are valid upstream answers and count as successes.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        window_seconds: float = 30,
+        min_calls: int = 20,
+        error_rate_threshold: float = 0.5,
+        slow_call_seconds: float = 5,
+        slow_call_rate_threshold: float = 0.8,
+        open_seconds: float = 15,
+        half_open_max_calls: int = 3,
+        enabled: bool = True,
+    ):
+        self.name = name
+        self.window_seconds = window_seconds
+        self.min_calls = min_calls
+        self.error_rate_threshold = error_rate_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate_threshold = slow_call_rate_threshold
+        self.open_seconds = open_seconds
+        self.half_open_max_calls = half_open_max_calls
+        self.enabled = enabled
+        self.reset()
+
+    def reset(self):
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self._calls: deque[tuple[float, bool, bool]] = deque()  # (finished_at, failed, slow)
+        self._half_open_in_flight = 0
+        self._half_open_successes = 0
+        self.rejected = 0
+        self.times_opened = 0
+
+    @property
+    def state_value(self) -> int:
+        return STATE_VALUES[self.state]
+
+    def _transition(self, state: str):
+        if state == self.state:
+            return
+        logger.warning(f"Circuit breaker '{self.name}' {self.state} -> {state}")
+        self.state = state
+        if state == OPEN:
+            self.opened_at = time.monotonic()
+            self.times_opened += 1
+        if state in (OPEN, CLOSED):
+            self._calls.clear()
+        self._half_open_in_flight = 0
+        self._half_open_successes = 0
+
+    def allow(self) -> bool:
+        """Check if a call may go upstream, reserving a probe slot when half open"""
+        if not self.enabled:
+            return True
+
+        if self.state == OPEN:
+            if time.monotonic() - self.opened_at < self.open_seconds:
+                return False
+            self._transition(HALF_OPEN)
+
+        if self.state == HALF_OPEN:
+            if self._half_open_in_flight >= self.half_open_max_calls:
+                return False
+            self._half_open_in_flight += 1
+
+        return True
+
+    def record(self, failed: bool, duration: float):
+        if not self.enabled:
+            return
+
+        if self.state == HALF_OPEN:
+            self._half_open_in_flight = max(0, self._half_open_in_flight - 1)
+            if failed:
+                self._transition(OPEN)
+            else:
+                self._half_open_successes += 1
+                if self._half_open_successes >= self.half_open_max_calls:
+                    self._transition(CLOSED)
+            return
+
+        if self.state == OPEN:
+            # a call that started before the circuit opened, nothing left to decide
+            return
+
+        now = time.monotonic()
+        self._calls.append((now, failed, duration >= self.slow_call_seconds))
+        while self._calls and self._calls[0][0] < now - self.window_seconds:
+            self._calls.popleft()
+
+        total = len(self._calls)
+        if total < self.min_calls:
+            return
+
+        failures = sum(1 for _, call_failed, _ in self._calls if call_failed)
+        slow_calls = sum(1 for _, _, slow in self._calls if slow)
+        if failures / total >= self.error_rate_threshold or slow_calls / total >= self.slow_call_rate_threshold:
+            self._transition(OPEN)
+
+    async def call(self, fn: Callable[[], Awaitable]):
+        if not self.allow():
+            self.rejected += 1
+            # seconds until the circuit lets probes through again
+            retry_after = max(1, math.ceil(self.opened_at + self.open_seconds - time.monotonic()))
+            raise ServiceUnavailableError(f"Upstream '{self.name}' is unavailable, please try again shortly", retry_after=retry_after)
+
+        started = time.monotonic()
+        try:
+            result = await fn()
+        except (NotFoundError, BadRequestError):
+            self.record(failed=False, duration=time.monotonic() - started)
+            raise
+        except asyncio.CancelledError:
+            # abandoned by the caller, says nothing about upstream health
+            if self.state == HALF_OPEN:
+                self._half_open_in_flight = max(0, self._half_open_in_flight - 1)
+            raise
+        except Exception:
+            self.record(failed=True, duration=time.monotonic() - started)
+            raise
+        self.record(failed=False, duration=time.monotonic() - started)
+        return result
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "stateValue": self.state_value,
+            "rejected": self.rejected,
+            "timesOpened": self.times_opened,
+        }
+
+
+def create_circuit_breaker(name: str) -> CircuitBreaker:
+    return CircuitBreaker(
+        name=name,
+        window_seconds=settings.CIRCUIT_BREAKER_WINDOW_SECONDS,
+        min_calls=settings.CIRCUIT_BREAKER_MIN_CALLS,
+        error_rate_threshold=settings.CIRCUIT_BREAKER_ERROR_RATE,
+        slow_call_seconds=settings.CIRCUIT_BREAKER_SLOW_CALL_SECONDS,
+        slow_call_rate_threshold=settings.CIRCUIT_BREAKER_SLOW_CALL_RATE,
+        open_seconds=settings.CIRCUIT_BREAKER_OPEN_SECONDS,
+        half_open_max_calls=settings.CIRCUIT_BREAKER_HALF_OPEN_CALLS,
+        enabled=settings.CIRCUIT_BREAKER_ENABLED,
+    )
+
+
+# One breaker per upstream operation, shared by every OpenGINService
+circuit_breakers: dict[str, CircuitBreaker] = {
+    operation: create_circuit_breaker(operation)
+    for operation in ("search", "relations", "metadata", "attributes")
+}
+
+
+def circuit_protected(operation: str):
+    """Decorator that runs every call of the wrapped coroutine through the operation's circuit breaker"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            return await circuit_breakers[operation].call(lambda: fn(*args, **kwargs))
+        return wrapper
+    return decorator
+
+
+def collect_metrics():
+    state = Gauge("gi_circuit_breaker_state", "Circuit breaker state (0 closed, 1 half open, 2 open)", ["operation"])
+    rejected = Counter("gi_circuit_breaker_rejected_total", "Calls failed fast by an open circuit breaker", ["operation"])
+    opened = Counter("gi_circuit_breaker_opened_total", "Times a circuit breaker opened", ["operation"])
+    for operation, breaker in circuit_breakers.items():
+        state.set(breaker.state_value, operation=operation)
+        rejected.inc(breaker.rejected, operation=operation)
+        opened.inc(breaker.times_opened, operation=operation)
+    return [state, rejected, opened]
+
+
+registry.add_collector(collect_metrics)
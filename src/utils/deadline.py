@@ -0,0 +1,110 @@
+import asyncio
+import functools
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterable, Iterator, Optional
+from src.exception.exceptions import GatewayTimeoutError
+from src.utils.metrics import registry
+
+# A retry is only worth scheduling when at least this much of the request budget is left (the first backoff)
+MIN_RETRY_SECONDS = 1.0
+
+
+class SharedDeadline:
+    """
+    Deadline of work shared by several requests (a single-flight call): the latest of their deadlines.
+
+    A request joining with a later deadline, or none at all, extends it, and calls already bounded by it
+    through `within_deadline` get the extra time as well.
+    """
+
+    def __init__(self, deadline: Optional[float]):
+        self.deadline = deadline
+        self.timeouts: set[asyncio.Timeout] = set()
+
+    def extend(self, deadline: Optional[float]):
+        if self.deadline is None or (deadline is not None and deadline <= self.deadline):
+            return
+        self.deadline = deadline
+        loop = asyncio.get_running_loop()
+        for timeout in self.timeouts:
+            timeout.reschedule(None if deadline is None else loop.time() + deadline - time.perf_counter())
+
+
+# time.perf_counter() value by which the current request must be answered (a SharedDeadline inside
+# work shared by several requests), None outside of a request
+current_deadline: ContextVar[Optional[float | SharedDeadline]] = ContextVar("current_deadline", default=None)
+
+deadline_exceeded = registry.counter(
+    "gi_upstream_deadline_exceeded_total", "OpenGIN calls cut short because the request deadline passed", ["operation"]
+)
+
+
+def deadline_at() -> Optional[float]:
+    """time.perf_counter() value of the current deadline, None when there is no deadline"""
+    deadline = current_deadline.get()
+    return deadline.deadline if isinstance(deadline, SharedDeadline) else deadline
+
+
+def remaining() -> Optional[float]:
+    """Seconds left until the current request's deadline, None when there is no deadline"""
+    deadline = deadline_at()
+    if deadline is None:
+        return None
+    return deadline - time.perf_counter()
+
+
+def allows_retry() -> bool:
+    left = remaining()
+    return left is None or left > MIN_RETRY_SECONDS
+
+
+def bounded_backoff(sleeps: Iterable[float]) -> Iterator[float]:
+    """Backoff delays cut short so that a retry still starts with MIN_RETRY_SECONDS of the request budget left"""
+    for sleep in sleeps:
+        left = remaining()
+        yield sleep if left is None else max(0.0, min(sleep, left - MIN_RETRY_SECONDS))
+
+
+@contextmanager
+def deadline_scope(seconds: float):
+    """Give the code inside the block at most `seconds`, an outer deadline that is sooner still applies"""
+    deadline = time.perf_counter() + seconds
+    outer = deadline_at()
+    token = current_deadline.set(deadline if outer is None else min(outer, deadline))
+    try:
+        yield
+    finally:
+        current_deadline.reset(token)
+
+
+def within_deadline(operation: str):
+    """
+    Decorator that bounds every call of the wrapped upstream coroutine by the remaining request budget,
+    a call that would start after the deadline or runs past it fails with GatewayTimeoutError
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            left = remaining()
+            if left is None:
+                return await fn(*args, **kwargs)
+            if left <= 0:
+                deadline_exceeded.inc(operation=operation)
+                raise GatewayTimeoutError("Request deadline exceeded")
+            shared = current_deadline.get()
+            try:
+                async with asyncio.timeout(left) as timeout:
+                    if not isinstance(shared, SharedDeadline):
+                        return await fn(*args, **kwargs)
+                    shared.timeouts.add(timeout)
+                    try:
+                        return await fn(*args, **kwargs)
+                    finally:
+                        shared.timeouts.discard(timeout)
+            except TimeoutError as e:
+                deadline_exceeded.inc(operation=operation)
+                raise GatewayTimeoutError("Request deadline exceeded") from e
+        return wrapper
+    return decorator
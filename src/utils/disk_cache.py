@@ -0,0 +1,286 @@
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable, Optional
+from src.core.config import settings
+from src.utils.metrics import Counter, registry
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever the table layout or the encoding of stored values changes (e.g. Entity/Relation fields),
+# existing files with another version are wiped on open.
+SCHEMA_VERSION = 1
+
+# Reads noted for the next write before the reading thread writes them itself
+PENDING_READS_FLUSH = 100
+
+
+class DiskCache:
+    """
+    Persistent cache tier in a local sqlite3 file, for data that does not change any more (historical relations
+    and terminated entities), so it survives restarts and deploys and is shared by the workers on one host.
+
+    - values are bytes, stored per (namespace, key) with an expiry time
+    - once the file holds more than `max_bytes` of values, compaction drops expired entries and then the least
+      recently read ones until it is back under 90% of the limit, compaction runs on start and every
+      `compact_every` writes
+    - every sqlite call runs in a worker thread, sqlite and file system errors are logged and treated as a miss,
+      a broken disk cache never fails a request
+    - reads use a connection per worker thread and do not wait for writes (WAL mode), the read time of a hit and
+      the removal of an expired entry are noted and written with the next write
+
+    The same class backs the `sqlite` shared cache, with its file on a tmpfs such as /dev/shm.
+    """
+
+    def __init__(self, path: str, max_bytes: int, ttl: float, compact_every: int = 500, clock: Callable[[], float] = time.time):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.compact_every = compact_every
+        self.clock = clock
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._writes_since_compaction = 0
+        # read only connections by thread id
+        self._readers: dict[int, sqlite3.Connection] = {}
+        # (namespace, key) -> last read time, None when the entry was found expired
+        self._pending: dict[tuple[str, str], Optional[float]] = {}
+        self._pending_lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.errors = 0
+        self.compactions = 0
+        self.evictions = 0
+
+    # sqlite calls, run in a worker thread, writes hold the lock
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is not None:
+            return self._connection
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        connection = sqlite3.connect(self.path, check_same_thread=False, timeout=5, isolation_level=None)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+
+        version = connection.execute("PRAGMA user_version").fetchone()[0]
+        if version != SCHEMA_VERSION:
+            if version:
+                logger.warning(f"Disk cache schema version {version} != {SCHEMA_VERSION}, wiping {self.path}")
+            connection.execute("DROP TABLE IF EXISTS entries")
+            connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS entries (
+                    namespace TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    expires_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL,
+                    PRIMARY KEY (namespace, key)
+                )
+                """
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS entries_accessed_at ON entries (accessed_at)")
+            connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            connection.execute("VACUUM")
+
+        self._connection = connection
+        return connection
+
+    def _reader(self) -> sqlite3.Connection:
+        reader = self._readers.get(threading.get_ident())
+        if reader is not None:
+            return reader
+        if self._connection is None:
+            with self._lock:
+                # the writer connection creates the file and the schema
+                self._connect()
+        reader = sqlite3.connect(self.path, check_same_thread=False, timeout=5, isolation_level=None)
+        self._readers[threading.get_ident()] = reader
+        return reader
+
+    def _get(self, namespace: str, key: str) -> Optional[bytes]:
+        now = self.clock()
+        row = self._reader().execute(
+            "SELECT value, expires_at FROM entries WHERE namespace = ? AND key = ?", (namespace, key)
+        ).fetchone()
+        if row is None:
+            return None
+        value, expires_at = row
+        expired = expires_at <= now
+        with self._pending_lock:
+            self._pending[(namespace, key)] = None if expired else now
+            pending = len(self._pending)
+        if pending >= PENDING_READS_FLUSH:
+            with self._lock:
+                self._flush_locked()
+        return None if expired else value
+
+    def _flush_locked(self):
+        with self._pending_lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        connection = self._connect()
+        now = self.clock()
+        connection.execute("BEGIN")
+        try:
+            connection.executemany(
+                "UPDATE entries SET accessed_at = MAX(accessed_at, ?) WHERE namespace = ? AND key = ?",
+                [(read_at, namespace, key) for (namespace, key), read_at in pending.items() if read_at is not None],
+            )
+            # only while still expired, the entry may have been written again since
+            connection.executemany(
+                "DELETE FROM entries WHERE namespace = ? AND key = ? AND expires_at <= ?",
+                [(namespace, key, now) for (namespace, key), read_at in pending.items() if read_at is None],
+            )
+            connection.execute("COMMIT")
+        except sqlite3.Error:
+            connection.execute("ROLLBACK")
+            raise
+
+    def _set(self, namespace: str, key: str, value: bytes, ttl: float) -> bool:
+        with self._lock:
+            self._flush_locked()
+            connection = self._connect()
+            now = self.clock()
+            connection.execute(
+                "INSERT OR REPLACE INTO entries (namespace, key, value, size, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (namespace, key, value, len(value), now + ttl, now),
+            )
+            self._writes_since_compaction += 1
+            if self._writes_since_compaction >= self.compact_every:
+                self._compact_locked()
+            return True
+
+    def _compact_locked(self):
+        self._flush_locked()
+        connection = self._connect()
+        self._writes_since_compaction = 0
+        self.compactions += 1
+
+        connection.execute("DELETE FROM entries WHERE expires_at <= ?", (self.clock(),))
+        total = connection.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total > self.max_bytes:
+            target = total - int(self.max_bytes * 0.9)
+            removed = 0
+            rows = connection.execute("SELECT namespace, key, size FROM entries ORDER BY accessed_at").fetchall()
+            doomed = []
+            for namespace, key, size in rows:
+                if removed >= target:
+                    break
+                doomed.append((namespace, key))
+                removed += size
+            connection.executemany("DELETE FROM entries WHERE namespace = ? AND key = ?", doomed)
+            self.evictions += len(doomed)
+        connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def _compact(self):
+        with self._lock:
+            self._compact_locked()
+
+    def _usage(self) -> dict:
+        with self._lock:
+            self._flush_locked()
+            connection = self._connect()
+            entries, size = connection.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        return {"entries": entries, "bytes": size}
+
+    def _close(self):
+        with self._lock:
+            for reader in list(self._readers.values()):
+                reader.close()
+            self._readers.clear()
+            if self._connection is not None:
+                try:
+                    self._flush_locked()
+                finally:
+                    self._connection.close()
+                    self._connection = None
+
+    # async API
+
+    async def _run(self, fn, *args):
+        try:
+            return await asyncio.to_thread(fn, *args)
+        except (sqlite3.Error, OSError) as e:
+            self.errors += 1
+            logger.warning(f"Disk cache error on {self.path}: {str(e)}")
+            return None
+
+    async def start(self):
+        """Open the file (wiping it on a schema change) and compact it"""
+        await self._run(self._compact)
+
+    async def get(self, namespace: str, key: str) -> Optional[bytes]:
+        value = await self._run(self._get, namespace, key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(self, namespace: str, key: str, value: bytes, ttl: Optional[float] = None):
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0 or len(value) > self.max_bytes:
+            return
+        if await self._run(self._set, namespace, key, value, ttl):
+            self.writes += 1
+
+    async def compact(self):
+        await self._run(self._compact)
+
+    async def close(self):
+        await self._run(self._close)
+
+    async def usage(self) -> Optional[dict]:
+        """Number of entries and bytes of values currently stored"""
+        return await self._run(self._usage)
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "errors": self.errors,
+            "compactions": self.compactions,
+            "evictions": self.evictions,
+        }
+
+
+disk_cache: Optional[DiskCache] = DiskCache(
+    path=settings.DISK_CACHE_PATH,
+    max_bytes=settings.DISK_CACHE_MAX_MB * 1024 * 1024,
+    ttl=settings.DISK_CACHE_TTL,
+    compact_every=settings.DISK_CACHE_COMPACT_EVERY,
+) if settings.DISK_CACHE_ENABLED else None
+
+
+def collect_metrics():
+    if disk_cache is None:
+        return []
+    counters = {
+        name: Counter(f"gi_disk_cache_{name}_total", description)
+        for name, description in (
+            ("hits", "Disk cache lookups answered from disk"),
+            ("misses", "Disk cache lookups that went upstream"),
+            ("writes", "Entries written to the disk cache"),
+            ("errors", "sqlite errors in the disk cache, treated as misses"),
+            ("compactions", "Disk cache compaction runs"),
+            ("evictions", "Entries dropped by compaction to stay within the size limit"),
+        )
+    }
+    for name, value in disk_cache.stats().items():
+        counters[name].inc(value)
+    return list(counters.values())
+
+
+registry.add_collector(collect_metrics)
@@ -0,0 +1,242 @@
+import asyncio
+import json
+import random
+import re
+from collections import Counter
+from typing import Mapping, Optional
+from urllib.parse import unquote, urlsplit
+from aiohttp import ClientResponseError, RequestInfo
+from google.protobuf.struct_pb2 import Struct
+from google.protobuf.wrappers_pb2 import StringValue
+from multidict import CIMultiDict, CIMultiDictProxy
+from yarl import URL
+
+STRING_VALUE_TYPE_URL = "type.googleapis.com/google.protobuf.StringValue"
+STRUCT_TYPE_URL = "type.googleapis.com/google.protobuf.Struct"
+
+
+def encode_name(name: str) -> str:
+    """Encode a plain name the way OpenGIN returns entity names (a hex encoded protobuf StringValue)"""
+    hex_value = StringValue(value=name).SerializeToString().hex()
+    return json.dumps({"typeUrl": STRING_VALUE_TYPE_URL, "value": hex_value})
+
+
+def encode_attribute(data) -> dict:
+    """Encode plain dataset data (e.g. {"columns": [...], "rows": [...]}) the way OpenGIN returns attributes"""
+    struct = Struct()
+    struct.update({"data": json.dumps(data)})
+    return {"value": json.dumps({"typeUrl": STRUCT_TYPE_URL, "value": struct.SerializeToString().hex()})}
+
+
+class FakeStreamReader:
+    def __init__(self, body: bytes):
+        self._body = body
+
+    async def iter_chunked(self, size: int):
+        for start in range(0, len(self._body), size):
+            yield self._body[start:start + size]
+            await asyncio.sleep(0)
+
+
+class FakeResponse:
+    """Response of the fake OpenGIN, mirrors what OpenGINService reads from an aiohttp response"""
+
+    def __init__(self, method: str, url: str, status: int, body: bytes):
+        self.method = method
+        self.url = url
+        self.status = status
+        self._body = body
+        self.content = FakeStreamReader(body)
+
+    async def read(self) -> bytes:
+        return self._body
+
+    async def json(self):
+        return json.loads(self._body)
+
+    def raise_for_status(self):
+        if self.status >= 400:
+            url = URL(self.url)
+            raise ClientResponseError(
+                RequestInfo(url, self.method, CIMultiDictProxy(CIMultiDict()), url),
+                (),
+                status=self.status,
+                message="Injected error" if self.status >= 500 else "Fake OpenGIN error",
+            )
+
+
+class FakeRequest:
+    """Async context manager that answers one request after the configured latency"""
+
+    def __init__(self, fake: "FakeOpenGIN", method: str, url: str, data: Optional[bytes]):
+        self.fake = fake
+        self.method = method
+        self.url = url
+        self.data = data
+
+    async def __aenter__(self) -> FakeResponse:
+        return await self.fake.handle(self.method, self.url, self.data)
+
+    async def __aexit__(self, exc_type, exc, tb):
+        pass
+
+
+ROUTES = (
+    ("POST", re.compile(r"^/v1/entities/search$"), "search"),
+    ("POST", re.compile(r"^/v1/entities/(?P<entity_id>[^/]+)/relations$"), "relations"),
+    ("GET", re.compile(r"^/v1/entities/(?P<entity_id>[^/]+)/metadata$"), "metadata"),
+    ("GET", re.compile(r"^/v1/entities/(?P<entity_id>[^/]+)/attributes/(?P<dataset_name>[^/]+)$"), "attributes"),
+)
+
+
+class FakeOpenGIN:
+    """
+    In-memory stand-in for the OpenGIN read API, used as a transport by OpenGINService for offline runs,
+    benchmarks and tests. Serves entity search, relations, metadata and attributes from a graph:
+
+        {
+            "entities": [{"id", "name" (plain text), "kind": {"major", "minor"}, "created", "terminated"}],
+            "relations": [{"id", "source", "target", "name", "startTime", "endTime"}],
+            "metadata": {entity id: {...}},
+            "attributes": {entity id: {dataset name: plain data, e.g. {"columns": [...], "rows": [...]}}}
+        }
+
+    A relation is returned as OUTGOING for its source and as INCOMING for its target.
+
+    - every request waits `latency` seconds plus up to `jitter` seconds
+    - a fraction `error_rate` of requests fails with a 500, `fail_next` makes the next requests of one
+      route fail with a given status
+    - `requests` counts requests per route, `max_in_flight` is the highest concurrency seen
+    """
+
+    def __init__(self, graph: Mapping, latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0, seed: Optional[int] = None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._failures: dict[str, list[int]] = {}
+
+        self.entities = {entity["id"]: self._entity(entity) for entity in graph.get("entities", [])}
+        self.relations: dict[str, list[dict]] = {}
+        for relation in graph.get("relations", []):
+            common = {
+                "id": relation["id"],
+                "name": relation["name"],
+                "startTime": relation.get("startTime", ""),
+                "endTime": relation.get("endTime", ""),
+            }
+            self.relations.setdefault(relation["source"], []).append(
+                dict(common, relatedEntityId=relation["target"], direction="OUTGOING")
+            )
+            self.relations.setdefault(relation["target"], []).append(
+                dict(common, relatedEntityId=relation["source"], direction="INCOMING")
+            )
+        self.metadata = dict(graph.get("metadata", {}))
+        self.attributes = {
+            entity_id: {dataset_name: encode_attribute(data) for dataset_name, data in datasets.items()}
+            for entity_id, datasets in graph.get("attributes", {}).items()
+        }
+
+        self.requests: Counter[str] = Counter()
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    @classmethod
+    def from_file(cls, path: str, **kwargs) -> "FakeOpenGIN":
+        with open(path, encoding="utf-8") as graph_file:
+            return cls(json.load(graph_file), **kwargs)
+
+    @staticmethod
+    def _entity(entity: Mapping) -> dict:
+        kind = entity.get("kind", {})
+        return {
+            "id": entity["id"],
+            "name": encode_name(entity.get("name", "")),
+            "plainName": entity.get("name", ""),
+            "kind": {"major": kind.get("major", ""), "minor": kind.get("minor", "")},
+            "created": entity.get("created", ""),
+            "terminated": entity.get("terminated", ""),
+        }
+
+    def fail_next(self, route: str, status: int = 500, times: int = 1):
+        """Answer the next `times` requests of a route (search, relations, metadata, attributes) with `status`"""
+        self._failures.setdefault(route, []).extend([status] * times)
+
+    # transport API
+
+    def post(self, url: str, data: Optional[bytes] = None, headers: Optional[Mapping[str, str]] = None) -> FakeRequest:
+        return FakeRequest(self, "POST", url, data)
+
+    def get(self, url: str, headers: Optional[Mapping[str, str]] = None) -> FakeRequest:
+        return FakeRequest(self, "GET", url, None)
+
+    async def handle(self, method: str, url: str, data: Optional[bytes]) -> FakeResponse:
+        path = urlsplit(url).path
+        for route_method, pattern, route in ROUTES:
+            match = pattern.match(path)
+            if route_method == method and match:
+                break
+        else:
+            return FakeResponse(method, url, 404, b'{"error": "not found"}')
+
+        self.requests[route] += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+            await asyncio.sleep(delay)
+
+            failures = self._failures.get(route)
+            if failures:
+                return FakeResponse(method, url, failures.pop(0), b'{"error": "injected"}')
+            if self.error_rate and self._random.random() < self.error_rate:
+                return FakeResponse(method, url, 500, b'{"error": "injected"}')
+
+            params = {name: unquote(value) for name, value in match.groupdict().items()}
+            query = json.loads(data) if data else {}
+            status, body = getattr(self, f"_{route}")(query, **params)
+            return FakeResponse(method, url, status, json.dumps(body).encode())
+        finally:
+            self.in_flight -= 1
+
+    # routes, each returns (status, body)
+
+    def _search(self, query: dict):
+        kind = query.get("kind") or {}
+        name = (query.get("name") or "").lower()
+        if query.get("id"):
+            candidates = [self.entities[query["id"]]] if query["id"] in self.entities else []
+        else:
+            candidates = self.entities.values()
+
+        matches = [
+            {key: value for key, value in entity.items() if key != "plainName"}
+            for entity in candidates
+            if (not kind.get("major") or entity["kind"]["major"] == kind["major"])
+            and (not kind.get("minor") or entity["kind"]["minor"] == kind["minor"])
+            and (not name or name in entity["plainName"].lower())
+            and (not query.get("created") or entity["created"] == query["created"])
+            and (not query.get("terminated") or entity["terminated"] == query["terminated"])
+        ]
+        return 200, {"body": matches}
+
+    def _relations(self, query: dict, entity_id: str):
+        active_at = query.get("activeAt") or ""
+        matches = [
+            relation
+            for relation in self.relations.get(entity_id, [])
+            if all(not query.get(field) or relation[field] == query[field] for field in ("name", "direction", "relatedEntityId", "id", "startTime", "endTime"))
+            and (not active_at or (relation["startTime"] <= active_at and (not relation["endTime"] or active_at < relation["endTime"])))
+        ]
+        return 200, matches
+
+    def _metadata(self, query: dict, entity_id: str):
+        if entity_id not in self.metadata:
+            return 404, {"error": f"no metadata for {entity_id}"}
+        return 200, self.metadata[entity_id]
+
+    def _attributes(self, query: dict, entity_id: str, dataset_name: str):
+        dataset = self.attributes.get(entity_id, {}).get(dataset_name)
+        if dataset is None:
+            return 404, {"error": f"no attribute {dataset_name} for {entity_id}"}
+        return 200, dataset
@@ -0,0 +1,167 @@
+import asyncio
+import functools
+import logging
+import math
+import time
+from collections import deque
+from typing import Awaitable, Callable, Optional
+from src.core.config import settings
+from src.utils.http_client import http_client
+from src.utils.metrics import Counter, Gauge, registry
+
+logger = logging.getLogger(__name__)
+
+
+class LatencyTracker:
+    """Keeps the most recent call latencies to answer percentile queries"""
+
+    def __init__(self, window: int = 200):
+        self._samples: deque[float] = deque(maxlen=window)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def record(self, seconds: float):
+        self._samples.append(seconds)
+
+    def percentile(self, p: float) -> Optional[float]:
+        if not self._samples:
+            return None
+        # nearest-rank percentile
+        ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, max(0, math.ceil(p * len(ordered)) - 1))
+        return ordered[index]
+
+
+class Hedger:
+    """
+    Hedged requests for idempotent upstream calls.
+
+    When a call has not finished after the `percentile` latency of recent calls, a duplicate is sent
+    and whichever finishes first with an answer wins, the other one is cancelled.
+    Duplicates are capped at `max_hedge_ratio` of all calls, and no hedging happens until
+    `min_samples` latencies have been observed.
+    """
+
+    def __init__(self, name: str, percentile: float = 0.95, max_hedge_ratio: float = 0.05, min_delay: float = 0.01, min_samples: int = 20, window: int = 200, enabled: bool = False):
+        self.name = name
+        self.percentile = percentile
+        self.max_hedge_ratio = max_hedge_ratio
+        self.min_delay = min_delay
+        self.min_samples = min_samples
+        self.window = window
+        self.enabled = enabled
+        self.reset()
+
+    def reset(self):
+        self.latencies = LatencyTracker(self.window)
+        self.calls = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def hedge_delay(self) -> Optional[float]:
+        """Seconds to wait before hedging, None when hedging is not allowed for this call"""
+        if not self.enabled or len(self.latencies) < self.min_samples:
+            return None
+        if self.hedges + 1 > self.max_hedge_ratio * self.calls:
+            return None
+        return max(self.min_delay, self.latencies.percentile(self.percentile))
+
+    async def run(self, fn: Callable[[], Awaitable], hedge_fn: Optional[Callable[[], Awaitable]] = None):
+        """Call `fn`, a duplicate is sent with `hedge_fn` when given"""
+        self.calls += 1
+        started = time.monotonic()
+        primary = asyncio.ensure_future(fn())
+
+        delay = self.hedge_delay()
+        if delay is None:
+            result = await primary
+            self.latencies.record(time.monotonic() - started)
+            return result
+
+        hedge = None
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+            if done:
+                result = primary.result()
+                self.latencies.record(time.monotonic() - started)
+                return result
+
+            self.hedges += 1
+            hedge = asyncio.ensure_future((hedge_fn or fn)())
+            pending = {primary, hedge}
+            while True:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                winner = next((task for task in (primary, hedge) if task in done and task.exception() is None), None)
+                if winner is None and pending:
+                    continue
+                # both requests failed when there is no winner, report the primary's error
+                winner = winner or primary
+                if winner is hedge:
+                    self.hedge_wins += 1
+                self.latencies.record(time.monotonic() - started)
+                return winner.result()
+        finally:
+            # the losing request is no longer needed
+            for task in (primary, hedge):
+                if task is not None and not task.done():
+                    task.cancel()
+
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "hedges": self.hedges,
+            "hedgeWins": self.hedge_wins,
+            "delay": self.latencies.percentile(self.percentile),
+        }
+
+
+def create_hedger(name: str) -> Hedger:
+    return Hedger(
+        name=name,
+        percentile=settings.HEDGING_PERCENTILE,
+        max_hedge_ratio=settings.HEDGING_MAX_RATIO,
+        min_samples=settings.HEDGING_MIN_SAMPLES,
+        enabled=settings.HEDGING_ENABLED,
+    )
+
+
+# Only idempotent lookups are hedged
+hedgers: dict[str, Hedger] = {
+    operation: create_hedger(operation)
+    for operation in ("search", "relations")
+}
+
+
+def hedged(operation: str):
+    """
+    Decorator that runs every call of the wrapped coroutine through the operation's hedger,
+    a duplicate takes a bulkhead slot of its own next to the one the caller holds for the call
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            async def hedge():
+                async with http_client.slot(operation):
+                    return await fn(*args, **kwargs)
+            return await hedgers[operation].run(lambda: fn(*args, **kwargs), hedge)
+        return wrapper
+    return decorator
+
+
+def collect_metrics():
+    calls = Counter("gi_hedging_calls_total", "Calls made through a hedger", ["operation"])
+    hedges = Counter("gi_hedging_hedges_total", "Duplicate requests sent by a hedger", ["operation"])
+    wins = Counter("gi_hedging_hedge_wins_total", "Duplicate requests that answered first", ["operation"])
+    delay = Gauge("gi_hedging_delay_seconds", "Current latency after which a duplicate request is sent", ["operation"])
+    for operation, hedger in hedgers.items():
+        calls.inc(hedger.calls, operation=operation)
+        hedges.inc(hedger.hedges, operation=operation)
+        wins.inc(hedger.hedge_wins, operation=operation)
+        current_delay = hedger.latencies.percentile(hedger.percentile)
+        if current_delay is not None:
+            delay.set(current_delay, operation=operation)
+    return [calls, hedges, wins, delay]
+
+
+registry.add_collector(collect_metrics)
@@ -1,6 +1,21 @@
+import functools
+import logging
 from aiohttp import ClientSession, ClientTimeout, TCPConnector
 from typing import Optional
 from src.core.config import settings
+from src.utils.bulkhead import Bulkhead, Priority
+from src.utils.metrics import Gauge, registry
+
+logger = logging.getLogger(__name__)
+
+# Upstream operations grouped into the classes that get their own share of the connection pool
+OPERATION_BULKHEADS = {
+    "search": "entities",
+    "metadata": "entities",
+    "relations": "relations",
+    "attributes": "attributes",
+}
+
 class HTTPClient:
     "Single HTTP client for the application"
 
@@ -19,9 +34,22 @@ class HTTPClient:
         self.pool_size_per_host = settings.HTTP_POOL_SIZE_PER_HOST
         self.ttl_dns_cache = settings.HTTP_TTL_DNS_CACHE
 
+        # Concurrency slots per operation class in front of the shared pool
+        self.bulkheads = {
+            name: Bulkhead(name, limit, enabled=settings.BULKHEAD_ENABLED)
+            for name, limit in (
+                ("entities", settings.BULKHEAD_ENTITY_SLOTS),
+                ("relations", settings.BULKHEAD_RELATION_SLOTS),
+                ("attributes", settings.BULKHEAD_ATTRIBUTE_SLOTS),
+            )
+        }
+
     async def start(self):
         """Create session on app startup"""
         if self._session is None or self._session.closed:
+            slots = sum(bulkhead.limit for bulkhead in self.bulkheads.values())
+            if settings.BULKHEAD_ENABLED and slots > self.pool_size_per_host:
+                logger.warning(f"Bulkhead slots ({slots}) exceed HTTP_POOL_SIZE_PER_HOST ({self.pool_size_per_host}), classes can still starve each other")
             # Configure TCPConnector with connection pool limits
             connector = TCPConnector(
                 limit=self.pool_size, 
@@ -41,6 +69,22 @@ class HTTPClient:
             await self._session.close()
             self._session = None
     
+    def pool_stats(self) -> dict:
+        """Connection pool usage, read from the connector since aiohttp does not expose it publicly"""
+        if self._session is None or self._session.closed:
+            return {"limit": self.pool_size, "inUse": 0, "idle": 0, "waiting": 0}
+        connector = self._session.connector
+        return {
+            "limit": connector.limit,
+            "inUse": len(connector._acquired),
+            "idle": sum(len(connections) for connections in connector._conns.values()),
+            "waiting": sum(len(waiters) for waiters in connector._waiters.values()),
+        }
+
+    def slot(self, operation: str, priority: Optional[Priority] = None):
+        """Async context manager holding one concurrency slot of the operation's class while the call runs"""
+        return self.bulkheads[OPERATION_BULKHEADS[operation]].slot(priority)
+
     @property
     def session(self) -> ClientSession:
         if self._session is None or self._session.closed:
@@ -48,4 +92,36 @@ class HTTPClient:
         return self._session
 
 # Create a global instance
-http_client = HTTPClient()
\ No newline at end of file
+http_client = HTTPClient()
+
+
+def bulkheaded(operation: str):
+    """Decorator that runs every call of the wrapped coroutine in a concurrency slot of the operation's class"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            async with http_client.slot(operation):
+                return await fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def collect_metrics():
+    pool = Gauge("gi_http_pool_connections", "OpenGIN connection pool usage", ["state"])
+    stats = http_client.pool_stats()
+    pool.set(stats["limit"], state="limit")
+    pool.set(stats["inUse"], state="in_use")
+    pool.set(stats["idle"], state="idle")
+    pool.set(stats["waiting"], state="waiting")
+
+    slots = Gauge("gi_bulkhead_slots", "Upstream concurrency slots per operation class", ["bulkhead", "state"])
+    waiting = Gauge("gi_bulkhead_waiting", "Calls queued for an upstream slot", ["bulkhead", "priority"])
+    for name, bulkhead in http_client.bulkheads.items():
+        slots.set(bulkhead.limit, bulkhead=name, state="limit")
+        slots.set(bulkhead.in_use, bulkhead=name, state="in_use")
+        for priority in Priority:
+            waiting.set(bulkhead.waiting(priority), bulkhead=name, priority=priority.name.lower())
+    return [pool, slots, waiting]
+
+
+registry.add_collector(collect_metrics)
@@ -0,0 +1,132 @@
+import codecs
+import json
+from typing import Any, AsyncIterator, Optional
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\r\n"
+
+
+class _ChunkBuffer:
+    """Text buffer that is filled from an async iterator of byte chunks"""
+
+    def __init__(self, chunks: AsyncIterator[bytes]):
+        self._chunks = chunks.__aiter__()
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self.text = ""
+        self.pos = 0
+        self.eof = False
+
+    async def fill(self) -> bool:
+        """Append the next chunk, returns False once the stream is exhausted"""
+        if self.eof:
+            return False
+        try:
+            chunk = await self._chunks.__anext__()
+        except StopAsyncIteration:
+            self.text += self._utf8.decode(b"", final=True)
+            self.eof = True
+            return False
+        # drop what has already been consumed so the buffer only holds the unparsed tail
+        self.text = self.text[self.pos:] + self._utf8.decode(chunk)
+        self.pos = 0
+        return True
+
+    async def peek(self) -> Optional[str]:
+        """Skip whitespace and return the next character without consuming it, None at the end"""
+        while True:
+            while self.pos < len(self.text) and self.text[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            if not await self.fill():
+                return None
+
+    async def expect(self, char: str):
+        if await self.peek() != char:
+            raise ValueError(f"Invalid JSON stream: expected '{char}' at offset {self.pos}")
+        self.pos += 1
+
+    async def value(self) -> Any:
+        """Decode the next complete JSON value"""
+        await self.peek()
+        # wait until the unparsed tail has doubled before retrying, so a large value is scanned O(n) times overall
+        needed = 0
+        while True:
+            if len(self.text) - self.pos >= needed or self.eof:
+                try:
+                    value, end = _decoder.raw_decode(self.text, self.pos)
+                    # a number at the very end of the buffer may still have digits in the next chunk
+                    if end < len(self.text) or self.eof:
+                        self.pos = end
+                        return value
+                except json.JSONDecodeError:
+                    if self.eof:
+                        raise
+                needed = 2 * (len(self.text) - self.pos)
+            await self.fill()
+
+
+async def _iter_array(buffer: _ChunkBuffer) -> AsyncIterator[Any]:
+    await buffer.expect("[")
+    if await buffer.peek() == "]":
+        buffer.pos += 1
+        return
+    while True:
+        yield await buffer.value()
+        separator = await buffer.peek()
+        buffer.pos += 1
+        if separator == "]":
+            return
+        if separator != ",":
+            raise ValueError(f"Invalid JSON stream: expected ',' or ']' at offset {buffer.pos - 1}")
+
+
+async def iter_json_array(chunks: AsyncIterator[bytes], key: Optional[str] = None) -> AsyncIterator[Any]:
+    """
+    Yield the items of a JSON array as soon as each one has fully arrived.
+
+    - key=None: the document itself is the array, e.g. the relations response `[...]`
+    - key="body": the array is the value of that top level key, e.g. the entity search response `{"body": [...]}`
+      (other keys are skipped, a missing or null value yields nothing)
+    """
+    buffer = _ChunkBuffer(chunks)
+    if key is None:
+        async for item in _iter_array(buffer):
+            yield item
+        return
+
+    await buffer.expect("{")
+    if await buffer.peek() == "}":
+        return
+    while True:
+        field = await buffer.value()
+        await buffer.expect(":")
+        if field == key and await buffer.peek() == "[":
+            async for item in _iter_array(buffer):
+                yield item
+        else:
+            await buffer.value()
+        separator = await buffer.peek()
+        buffer.pos += 1
+        if separator == "}":
+            return
+        if separator != ",":
+            raise ValueError(f"Invalid JSON stream: expected ',' or '}}' at offset {buffer.pos - 1}")
+
+
+async def iter_json_object(chunks: AsyncIterator[bytes]) -> AsyncIterator[tuple[str, Any]]:
+    """Yield the (key, value) pairs of a top level JSON object as each value has fully arrived"""
+    buffer = _ChunkBuffer(chunks)
+    await buffer.expect("{")
+    if await buffer.peek() == "}":
+        return
+    while True:
+        field = await buffer.value()
+        await buffer.expect(":")
+        yield field, await buffer.value()
+        separator = await buffer.peek()
+        buffer.pos += 1
+        if separator == "}":
+            return
+        if separator != ",":
+            raise ValueError(f"Invalid JSON stream: expected ',' or '}}' at offset {buffer.pos - 1}")
@@ -0,0 +1,254 @@
+import asyncio
+import functools
+import math
+import time
+from typing import Callable, Iterable, Optional
+from src.exception.exceptions import BadRequestError, NotFoundError, ServiceUnavailableError
+from src.utils.request_timing import record_upstream_bytes, record_upstream_call
+
+# Upper bounds in seconds, chosen around the OpenGIN latencies we see (tens of ms to a few seconds)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BYTES_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple, values: tuple) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+class Metric:
+    """A named metric with a fixed set of label names, rendered in the Prometheus text format"""
+
+    type = "untyped"
+
+    def __init__(self, name: str, description: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.description = description
+        self.label_names = tuple(labels)
+        self._values: dict[tuple, float] = {}
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def get(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def reset(self):
+        self._values.clear()
+
+    def samples(self) -> Iterable[tuple[str, tuple, tuple, float]]:
+        """(sample name, label names, label values, value)"""
+        # a metric without labels is always exported, starting at zero
+        values = self._values or ({(): 0.0} if not self.label_names else {})
+        for key, value in values.items():
+            yield self.name, self.label_names, key, value
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.type}"]
+        for name, label_names, label_values, value in self.samples():
+            lines.append(f"{name}{_format_labels(label_names, label_values)} {_format_value(value)}")
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(Metric):
+    type = "gauge"
+
+    def set(self, value: float, **labels):
+        self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, description: str, labels: Iterable[str] = (), buckets: Iterable[float] = LATENCY_BUCKETS):
+        super().__init__(name, description, labels)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._series: dict[tuple, tuple[list[int], list]] = {}  # key -> (bucket counts, [sum, count])
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = ([0] * len(self.buckets), [0.0, 0])
+        counts, totals = series
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[index] += 1
+                break
+        totals[0] += value
+        totals[1] += 1
+
+    def count(self, **labels) -> int:
+        series = self._series.get(self._key(labels))
+        return series[1][1] if series else 0
+
+    def sum(self, **labels) -> float:
+        series = self._series.get(self._key(labels))
+        return series[1][0] if series else 0.0
+
+    def reset(self):
+        self._series.clear()
+
+    def samples(self):
+        label_names = self.label_names + ("le",)
+        series = self._series or ({(): ([0] * len(self.buckets), [0.0, 0])} if not self.label_names else {})
+        for key, (counts, (total, count)) in series.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                yield f"{self.name}_bucket", label_names, key + (_format_value(bound),), cumulative
+            yield f"{self.name}_sum", self.label_names, key, total
+            yield f"{self.name}_count", self.label_names, key, count
+
+
+class MetricsRegistry:
+    """
+    Holds the process wide metrics.
+
+    Metrics that are updated as things happen are registered once, components that already keep their own
+    counters (circuit breakers, retry budget, hedgers, caches, the HTTP pool) register a collector instead,
+    which builds fresh metrics from their stats at scrape time.
+    """
+
+    def __init__(self):
+        self._metrics: dict[str, Metric] = {}
+        self._collectors: list[Callable[[], Iterable[Metric]]] = []
+
+    def _register(self, metric: Metric) -> Metric:
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, description: str, labels: Iterable[str] = ()) -> Counter:
+        return self._register(Counter(name, description, labels))
+
+    def gauge(self, name: str, description: str, labels: Iterable[str] = ()) -> Gauge:
+        return self._register(Gauge(name, description, labels))
+
+    def histogram(self, name: str, description: str, labels: Iterable[str] = (), buckets: Iterable[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, description, labels, buckets))
+
+    def add_collector(self, collector: Callable[[], Iterable[Metric]]):
+        self._collectors.append(collector)
+
+    def collect(self) -> list[Metric]:
+        metrics = list(self._metrics.values())
+        for collector in self._collectors:
+            metrics.extend(collector())
+        return metrics
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self.collect()) + "\n"
+
+    def reset(self):
+        """Reset counters and histograms, gauges describe current state and collector backed metrics follow their component"""
+        for metric in self._metrics.values():
+            if not isinstance(metric, Gauge):
+                metric.reset()
+
+
+registry = MetricsRegistry()
+
+# Upstream (OpenGIN) calls, one sample per HTTP attempt, so retries and hedges are counted too
+upstream_requests = registry.counter(
+    "gi_upstream_requests_total", "OpenGIN HTTP attempts by operation and outcome", ["operation", "status"]
+)
+upstream_latency = registry.histogram(
+    "gi_upstream_request_duration_seconds", "Latency of OpenGIN HTTP attempts", ["operation"]
+)
+upstream_retries = registry.counter(
+    "gi_upstream_retries_total", "Retries scheduled for OpenGIN calls", ["operation"]
+)
+upstream_response_bytes = registry.histogram(
+    "gi_upstream_response_bytes", "Size of OpenGIN response bodies", ["operation"], buckets=BYTES_BUCKETS
+)
+
+
+def outcome(error: Optional[BaseException]) -> str:
+    """Status label for the outcome of an upstream attempt"""
+    if error is None:
+        return "ok"
+    if isinstance(error, NotFoundError):
+        return "not_found"
+    if isinstance(error, BadRequestError):
+        return "bad_request"
+    if isinstance(error, ServiceUnavailableError):
+        return "unavailable"
+    if isinstance(error, asyncio.CancelledError):
+        return "cancelled"
+    return "error"
+
+
+def instrumented(operation: str):
+    """Decorator that records the latency and outcome of every call of the wrapped upstream coroutine"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            error = None
+            try:
+                return await fn(*args, **kwargs)
+            except BaseException as e:
+                error = e
+                raise
+            finally:
+                elapsed = time.perf_counter() - started
+                upstream_latency.observe(elapsed, operation=operation)
+                status = outcome(error)
+                upstream_requests.inc(operation=operation, status=status)
+                record_upstream_call(elapsed, failed=status in ("error", "unavailable"))
+        return wrapper
+    return decorator
+
+
+def record_retry(operation: str) -> Callable[[Exception], None]:
+    """on_error callback for the retry decorator of an operation"""
+    def on_error(_: Exception):
+        upstream_retries.inc(operation=operation)
+    return on_error
+
+
+def record_response_bytes(operation: str, size: int):
+    upstream_response_bytes.observe(size, operation=operation)
+    record_upstream_bytes(size)
+
+
+async def count_chunks(operation: str, chunks):
+    """Pass response chunks through while adding up the body size"""
+    size = 0
+    try:
+        async for chunk in chunks:
+            size += len(chunk)
+            yield chunk
+    finally:
+        record_response_bytes(operation, size)
@@ -0,0 +1,58 @@
+from collections import OrderedDict
+from typing import Hashable
+from multidict import CIMultiDict, CIMultiDictProxy
+from pydantic import BaseModel
+
+# Shared, read only headers for every OpenGIN call, aiohttp copies them into each request
+JSON_HEADERS = CIMultiDictProxy(CIMultiDict({"Content-Type": "application/json"}))
+
+
+def query_shape(model: BaseModel) -> tuple:
+    """Field values of a query model (nested models included), equal for equal queries"""
+    return tuple(
+        query_shape(value) if isinstance(value, BaseModel) else value
+        for value in model.__dict__.values()
+    )
+
+
+class PayloadCache:
+    """
+    Pre-encoded JSON request bodies for the Entity/Relation queries sent to OpenGIN.
+
+    Traffic is made of a small set of distinct query shapes (e.g. AS_APPOINTED / OUTGOING / activeAt),
+    so each shape is encoded once and the same bytes object is reused for every later call,
+    both as the request body and as part of the request key. The least recently used shapes are
+    dropped beyond `max_size`.
+    """
+
+    def __init__(self, max_size: int = 4096):
+        self.max_size = max_size
+        self._payloads: OrderedDict[Hashable, bytes] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._payloads)
+
+    def encode(self, model: BaseModel) -> bytes:
+        key = (type(model), query_shape(model))
+        payload = self._payloads.get(key)
+        if payload is not None:
+            self._payloads.move_to_end(key)
+            self.hits += 1
+            return payload
+
+        self.misses += 1
+        # field order is fixed by the model, so equal queries always encode to equal bytes
+        payload = model.model_dump_json().encode()
+        self._payloads[key] = payload
+        if len(self._payloads) > self.max_size:
+            self._payloads.popitem(last=False)
+        return payload
+
+    def clear(self):
+        self._payloads.clear()
+        self.hits = self.misses = 0
+
+
+request_payloads = PayloadCache()
@@ -0,0 +1,59 @@
+import asyncio
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+
+class IdentityMap:
+    """
+    Per-request map of upstream lookups to their results.
+
+    Each distinct key is loaded at most once for the lifetime of the map, concurrent callers
+    share the same load and every caller receives the very same result object (or exception).
+    A load that every caller gave up on is cancelled, and started again by the next caller.
+    """
+
+    def __init__(self):
+        self._loads: dict[Hashable, asyncio.Task] = {}
+        self._waiters: dict[Hashable, int] = {}
+        self.loads = 0
+        self.hits = 0
+
+    def __len__(self) -> int:
+        return len(self._loads)
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._loads.get(key)
+        if task is None or task.cancelled():
+            task = asyncio.ensure_future(loader())
+            self._loads[key] = task
+            self.loads += 1
+        else:
+            self.hits += 1
+
+        self._waiters[key] = self._waiters.get(key, 0) + 1
+        try:
+            # shield so a cancelled caller does not poison the entry for its siblings
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if not task.done() and self._waiters[key] == 1:
+                # last interested caller went away, stop the upstream work as well
+                task.cancel()
+            raise
+        finally:
+            self._waiters[key] -= 1
+
+
+current_identity_map: ContextVar[Optional[IdentityMap]] = ContextVar("current_identity_map", default=None)
+
+
+async def request_scope():
+    """FastAPI dependency that gives every API request its own identity map"""
+    current_identity_map.set(IdentityMap())
+
+
+async def load_once(key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+    """Run the loader through the current request's identity map, or directly outside of a request"""
+    identity_map = current_identity_map.get()
+    if identity_map is None:
+        return await loader()
+    return await identity_map.get_or_load(key, loader)
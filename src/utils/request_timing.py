@@ -0,0 +1,137 @@
+import asyncio
+import functools
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+from fastapi.routing import APIRoute
+
+# Server-Timing metric names and descriptions, in the order they are reported
+TIMING_DESCRIPTIONS = {
+    "throttle": "Waiting for a throttling slot",
+    "queue": "Waiting for an upstream connection slot",
+    "upstream": "Waiting on OpenGIN (summed over concurrent calls)",
+    "decode": "Decoding protobuf values",
+    "serialize": "Serializing the response",
+    "total": "Total",
+}
+
+
+class RequestTiming:
+    """
+    Where the time of one request went, filled in by the middleware, OpenGINService and Util.
+
+    Also carries whether the response was built from stale cached data because OpenGIN failed.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.durations: dict[str, float] = {}
+        self.upstream_calls = 0
+        self.upstream_errors = 0
+        self.upstream_bytes = 0
+        self.endpoint_finished: Optional[float] = None
+        self.degraded = False
+
+    def add(self, name: str, seconds: float):
+        self.durations[name] = self.durations.get(name, 0.0) + seconds
+
+    def server_timing(self) -> str:
+        durations = dict(self.durations, total=time.perf_counter() - self.started)
+        return ", ".join(
+            f'{name};dur={durations[name] * 1000:.1f};desc="{description}"'
+            for name, description in TIMING_DESCRIPTIONS.items()
+            if name in durations
+        )
+
+
+current_request_timing: ContextVar[Optional[RequestTiming]] = ContextVar("current_request_timing", default=None)
+
+
+def record(name: str, seconds: float):
+    """Add time to the current request, a no-op outside of a request"""
+    timing = current_request_timing.get()
+    if timing is not None:
+        timing.add(name, seconds)
+
+
+def record_upstream_call(seconds: float, failed: bool = False):
+    timing = current_request_timing.get()
+    if timing is not None:
+        timing.upstream_calls += 1
+        timing.upstream_errors += failed
+        timing.add("upstream", seconds)
+
+
+def record_upstream_bytes(size: int):
+    timing = current_request_timing.get()
+    if timing is not None:
+        timing.upstream_bytes += size
+
+
+def mark_degraded():
+    """Flag the current request as answered with stale data"""
+    timing = current_request_timing.get()
+    if timing is not None:
+        timing.degraded = True
+
+
+@contextmanager
+def measure(name: str):
+    """Context manager adding the time spent inside the block to the current request"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - started)
+
+
+def timed(name: str):
+    """Decorator adding the time spent in the wrapped function to the current request"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if current_request_timing.get() is None:
+                return fn(*args, **kwargs)
+            with measure(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class TimedRoute(APIRoute):
+    """
+    Route that reports how long FastAPI spent turning the endpoint's return value into a response
+    (response model validation, encoding and rendering) as the "serialize" timing.
+    """
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        # include_router builds the route again from the already wrapped endpoint
+        if asyncio.iscoroutinefunction(endpoint) and not getattr(endpoint, "marks_finish", False):
+            endpoint = self._mark_finish(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+    @staticmethod
+    def _mark_finish(endpoint):
+        @functools.wraps(endpoint)
+        async def timed_endpoint(*args, **kwargs):
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                timing = current_request_timing.get()
+                if timing is not None:
+                    timing.endpoint_finished = time.perf_counter()
+        timed_endpoint.marks_finish = True
+        return timed_endpoint
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def timed_handler(request):
+            response = await handler(request)
+            timing = current_request_timing.get()
+            if timing is not None and timing.endpoint_finished is not None:
+                timing.add("serialize", time.perf_counter() - timing.endpoint_finished)
+            return response
+
+        return timed_handler
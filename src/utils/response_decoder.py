@@ -0,0 +1,48 @@
+from typing import AsyncIterator, Optional
+from pydantic import BaseModel, TypeAdapter
+from src.models.organisation_schemas import Entity, Relation
+from src.utils.json_stream import iter_json_array, iter_json_object
+
+
+class EntitySearchResponse(BaseModel):
+    """Envelope returned by the OpenGIN entity search endpoint"""
+    body: Optional[list[Entity]] = None
+
+
+# Adapters are expensive to build, so they are created once and reused for every response.
+# validate_json parses and validates the raw bytes in one pass inside pydantic-core, which skips
+# building an intermediate dict and a per-item model_validate call.
+entity_search_adapter = TypeAdapter(EntitySearchResponse)
+relation_list_adapter = TypeAdapter(list[Relation])
+entity_list_adapter = TypeAdapter(list[Entity])
+
+
+def decode_entities(raw: bytes) -> list[Entity]:
+    """Decode an entity search response body, a missing or null body decodes to an empty list"""
+    return entity_search_adapter.validate_json(raw).body or []
+
+
+def decode_relations(raw: bytes) -> list[Relation]:
+    """Decode a relations response body"""
+    return relation_list_adapter.validate_json(raw)
+
+
+# Streaming variants used when OPENGIN_STREAMING_DECODE is on: items are validated as soon as they
+# have arrived, so the whole response body is never held in memory next to the decoded models.
+entity_adapter = TypeAdapter(Entity)
+relation_adapter = TypeAdapter(Relation)
+
+
+async def stream_entities(chunks: AsyncIterator[bytes]) -> list[Entity]:
+    """Decode an entity search response body from its chunks"""
+    return [entity_adapter.validate_python(item) async for item in iter_json_array(chunks, key="body")]
+
+
+async def stream_relations(chunks: AsyncIterator[bytes]) -> list[Relation]:
+    """Decode a relations response body from its chunks"""
+    return [relation_adapter.validate_python(item) async for item in iter_json_array(chunks)]
+
+
+async def stream_object(chunks: AsyncIterator[bytes]) -> dict:
+    """Decode a JSON object response body (metadata, attributes) from its chunks"""
+    return {key: value async for key, value in iter_json_object(chunks)}
@@ -0,0 +1,104 @@
+import functools
+import logging
+import time
+from src.core.config import settings
+from src.utils.metrics import Counter, Gauge, registry
+from src.exception.exceptions import BadRequestError, NotFoundError
+
+logger = logging.getLogger(__name__)
+
+
+class RetryBudget:
+    """
+    Process-wide token bucket that caps retries to a fraction of recent successful calls.
+
+    - every successful upstream attempt deposits `ratio` tokens
+    - the bucket also refills by `min_per_second` tokens per second so a quiet service can still retry
+    - every retry withdraws one token, when the bucket is empty the retry is denied
+    - the bucket never holds more than `max_tokens`, which bounds a retry burst after a quiet period
+    """
+
+    def __init__(self, ratio: float = 0.1, min_per_second: float = 1.0, max_tokens: float = 10.0, enabled: bool = True):
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.max_tokens = max_tokens
+        self.enabled = enabled
+        self.reset()
+
+    def reset(self):
+        self.tokens = self.max_tokens
+        self._refilled_at = time.monotonic()
+        self.deposits = 0
+        self.spent = 0
+        self.denied = 0
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = max(0.0, now - self._refilled_at)
+        self._refilled_at = now
+        self.tokens = min(self.max_tokens, self.tokens + elapsed * self.min_per_second)
+
+    def deposit(self):
+        """Record a successful upstream attempt"""
+        self.deposits += 1
+        self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        """Withdraw one token for a retry, returns False when the budget is exhausted"""
+        if not self.enabled:
+            self.spent += 1
+            return True
+
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            self.spent += 1
+            return True
+
+        self.denied += 1
+        logger.warning("Retry budget exhausted, failing without retry")
+        return False
+
+    def stats(self) -> dict:
+        return {
+            "tokens": self.tokens,
+            "deposits": self.deposits,
+            "spent": self.spent,
+            "denied": self.denied,
+        }
+
+    def tracked(self, fn):
+        """Decorator that deposits into the budget whenever an upstream attempt gets an answer"""
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            try:
+                result = await fn(*args, **kwargs)
+            except (NotFoundError, BadRequestError):
+                self.deposit()
+                raise
+            self.deposit()
+            return result
+        return wrapper
+
+
+retry_budget = RetryBudget(
+    ratio=settings.RETRY_BUDGET_RATIO,
+    min_per_second=settings.RETRY_BUDGET_MIN_PER_SECOND,
+    max_tokens=settings.RETRY_BUDGET_MAX_TOKENS,
+    enabled=settings.RETRY_BUDGET_ENABLED,
+)
+
+
+def collect_metrics():
+    tokens = Gauge("gi_retry_budget_tokens", "Retries currently available in the retry budget")
+    deposits = Counter("gi_retry_budget_deposits_total", "Successful upstream attempts deposited into the retry budget")
+    spent = Counter("gi_retry_budget_spent_total", "Retries allowed by the retry budget")
+    denied = Counter("gi_retry_budget_denied_total", "Retries denied because the retry budget was exhausted")
+    tokens.set(retry_budget.tokens)
+    deposits.inc(retry_budget.deposits)
+    spent.inc(retry_budget.spent)
+    denied.inc(retry_budget.denied)
+    return [tokens, deposits, spent, denied]
+
+
+registry.add_collector(collect_metrics)
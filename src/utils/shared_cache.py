@@ -0,0 +1,235 @@
+import asyncio
+import logging
+from typing import Optional, Protocol
+from urllib.parse import unquote, urlparse
+from src.core.config import settings
+from src.utils.cache import TTLCache
+from src.utils.disk_cache import DiskCache
+from src.utils.metrics import Counter, registry
+
+logger = logging.getLogger(__name__)
+
+
+class CacheStore(Protocol):
+    """
+    Byte store used as a read-through tier by OpenGINService (the disk cache and the shared caches).
+
+    Implementations treat their own failures as misses, a broken store never fails a request.
+    """
+
+    async def get(self, namespace: str, key: str) -> Optional[bytes]: ...
+
+    async def set(self, namespace: str, key: str, value: bytes, ttl: Optional[float] = None): ...
+
+    async def start(self): ...
+
+    async def close(self): ...
+
+
+class LocalSharedCache:
+    """
+    In-process stand-in for a shared cache, used in tests and for a single worker.
+
+    It is not shared between workers.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self.ttl = ttl
+        self._cache = TTLCache(max_size=max_size, ttl=ttl)
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    async def get(self, namespace: str, key: str) -> Optional[bytes]:
+        value = self._cache.get((namespace, key))
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(self, namespace: str, key: str, value: bytes, ttl: Optional[float] = None):
+        self._cache.set((namespace, key), value, ttl=ttl)
+
+    async def start(self):
+        pass
+
+    async def close(self):
+        self._cache.clear()
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "errors": self.errors}
+
+
+class RedisError(Exception):
+    """Error reply from a Redis compatible server"""
+
+
+class RedisSharedCache:
+    """
+    Shared cache on a Redis compatible server (Redis, Valkey, KeyDB, ...), speaking RESP directly over
+    asyncio streams so no client library is needed. Only GET and SET with an expiry are used.
+
+    Up to `pool_size` connections are kept open, a command that fails or is cancelled closes its connection.
+    Any error or a reply slower than `timeout` seconds counts as a miss.
+    """
+
+    def __init__(self, url: str, ttl: float, pool_size: int = 4, timeout: float = 0.5, prefix: str = "gi:"):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.password = unquote(parsed.password) if parsed.password else None
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.ttl = ttl
+        self.timeout = timeout
+        self.prefix = prefix
+        self._semaphore = asyncio.Semaphore(pool_size)
+        self._idle: list[tuple[asyncio.StreamReader, asyncio.StreamWriter]] = []
+
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    @staticmethod
+    def _encode(*parts: bytes | str) -> bytes:
+        encoded = [part.encode() if isinstance(part, str) else part for part in parts]
+        return b"*%d\r\n" % len(encoded) + b"".join(b"$%d\r\n%s\r\n" % (len(part), part) for part in encoded)
+
+    @staticmethod
+    def _integer(line: bytes) -> int:
+        try:
+            return int(line[1:-2])
+        except ValueError:
+            raise RedisError(f"Malformed reply {line!r}") from None
+
+    @classmethod
+    async def _read_reply(cls, reader: asyncio.StreamReader):
+        line = await reader.readline()
+        if not line.endswith(b"\r\n"):
+            raise ConnectionError("Connection closed by the cache server")
+        kind, payload = line[:1], line[1:-2]
+        if kind == b"+":
+            return payload
+        if kind == b"-":
+            raise RedisError(payload.decode(errors="replace"))
+        if kind == b":":
+            return cls._integer(line)
+        if kind == b"$":
+            length = cls._integer(line)
+            if length < 0:
+                return None
+            return (await reader.readexactly(length + 2))[:-2]
+        if kind == b"*":
+            length = cls._integer(line)
+            if length < 0:
+                return None
+            return [await cls._read_reply(reader) for _ in range(length)]
+        raise RedisError(f"Unexpected reply {line!r}")
+
+    async def _connect(self) -> tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        setup = []
+        if self.password:
+            setup.append(("AUTH", self.password))
+        if self.db:
+            setup.append(("SELECT", str(self.db)))
+        for command in setup:
+            writer.write(self._encode(*command))
+            await writer.drain()
+            await self._read_reply(reader)
+        return reader, writer
+
+    async def _command(self, *parts: bytes | str):
+        async with self._semaphore:
+            connection = self._idle.pop() if self._idle else await asyncio.wait_for(self._connect(), self.timeout)
+            reader, writer = connection
+            try:
+                writer.write(self._encode(*parts))
+                await writer.drain()
+                reply = await asyncio.wait_for(self._read_reply(reader), self.timeout)
+            except BaseException:
+                # the connection is in an unknown state now
+                writer.close()
+                raise
+            self._idle.append(connection)
+            return reply
+
+    def _key(self, namespace: str, key: str) -> str:
+        return f"{self.prefix}{namespace}:{key}"
+
+    async def get(self, namespace: str, key: str) -> Optional[bytes]:
+        try:
+            value = await self._command("GET", self._key(namespace, key))
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, RedisError) as e:
+            self.errors += 1
+            self.misses += 1
+            logger.warning(f"Shared cache GET failed: {str(e)}")
+            return None
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(self, namespace: str, key: str, value: bytes, ttl: Optional[float] = None):
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        try:
+            await self._command("SET", self._key(namespace, key), value, "PX", str(int(ttl * 1000)))
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, RedisError) as e:
+            self.errors += 1
+            logger.warning(f"Shared cache SET failed: {str(e)}")
+
+    async def start(self):
+        pass
+
+    async def close(self):
+        while self._idle:
+            _, writer = self._idle.pop()
+            writer.close()
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "errors": self.errors}
+
+
+def create_shared_cache() -> Optional[CacheStore]:
+    backend = settings.SHARED_CACHE_BACKEND.lower()
+    if backend == "none":
+        return None
+    if backend == "local":
+        return LocalSharedCache(max_size=settings.SHARED_CACHE_MAX_SIZE, ttl=settings.ENTITY_CACHE_TTL)
+    if backend == "sqlite":
+        # a file on a tmpfs such as /dev/shm keeps this in shared memory
+        return DiskCache(
+            path=settings.SHARED_CACHE_URL or "/dev/shm/gi_service_shared_cache.sqlite3",
+            max_bytes=settings.SHARED_CACHE_MAX_MB * 1024 * 1024,
+            ttl=settings.ENTITY_CACHE_TTL,
+        )
+    if backend == "redis":
+        return RedisSharedCache(
+            url=settings.SHARED_CACHE_URL or "redis://localhost:6379/0",
+            ttl=settings.ENTITY_CACHE_TTL,
+            pool_size=settings.SHARED_CACHE_POOL_SIZE,
+            timeout=settings.SHARED_CACHE_TIMEOUT,
+        )
+    raise ValueError(f"Unknown SHARED_CACHE_BACKEND '{settings.SHARED_CACHE_BACKEND}', expected none, local, sqlite or redis")
+
+
+shared_cache: Optional[CacheStore] = create_shared_cache()
+
+
+def collect_metrics():
+    if shared_cache is None:
+        return []
+    stats = shared_cache.stats()
+    hits = Counter("gi_shared_cache_hits_total", "Shared cache lookups answered by the shared cache")
+    misses = Counter("gi_shared_cache_misses_total", "Shared cache lookups that fell through")
+    errors = Counter("gi_shared_cache_errors_total", "Shared cache errors, treated as misses")
+    hits.inc(stats["hits"])
+    misses.inc(stats["misses"])
+    errors.inc(stats["errors"])
+    return [hits, misses, errors]
+
+
+registry.add_collector(collect_metrics)
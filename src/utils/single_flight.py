@@ -0,0 +1,76 @@
+import asyncio
+import contextvars
+from typing import Any, Awaitable, Callable, Hashable
+from src.exception.exceptions import GatewayTimeoutError
+from src.utils.bulkhead import Priority, current_priority
+from src.utils.deadline import SharedDeadline, current_deadline, deadline_at, remaining
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share the same key onto one in-flight task.
+
+    The first caller for a key starts the work; every caller that arrives while it is
+    still running awaits the same task and receives the same result (or exception).
+    The key is forgotten as soon as the task finishes, so nothing is cached here.
+
+    The shared task runs under the latest deadline of its callers (none once a caller without
+    one joins), each caller only waits for it as long as its own deadline allows
+    (GatewayTimeoutError after that), and the task is cancelled once no caller is left.
+    It runs at the first caller's bulkhead priority,
+    so an interactive caller does not join a flight started by a background refresh but starts its own.
+    """
+
+    def __init__(self):
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+        self._waiters: dict[asyncio.Task, int] = {}
+        self._priorities: dict[asyncio.Task, Priority] = {}
+        self._deadlines: dict[asyncio.Task, SharedDeadline] = {}
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    def _start(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        deadline = SharedDeadline(deadline_at())
+        context = contextvars.copy_context()
+        context.run(current_deadline.set, deadline)
+        task = asyncio.get_running_loop().create_task(fn(), context=context)
+        self._priorities[task] = current_priority.get()
+        self._deadlines[task] = deadline
+        self._inflight[key] = task
+        self._waiters[task] = 0
+        task.add_done_callback(lambda t, k=key: self._forget(k, t))
+        return task
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+        if task is None or self._priorities[task] > current_priority.get():
+            task = self._start(key, fn)
+        else:
+            self._deadlines[task].extend(deadline_at())
+
+        self._waiters[task] += 1
+        try:
+            # shield so one cancelled or timed out caller does not cancel the work shared with the others
+            async with asyncio.timeout(remaining()):
+                return await asyncio.shield(task)
+        except (asyncio.CancelledError, TimeoutError) as e:
+            if not task.done() and self._waiters.get(task) == 1:
+                # last interested caller went away, stop the upstream work as well
+                task.cancel()
+            if isinstance(e, TimeoutError):
+                raise GatewayTimeoutError("Request deadline exceeded") from e
+            raise
+        finally:
+            if task in self._waiters:
+                self._waiters[task] -= 1
+
+    def _forget(self, key: Hashable, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        self._waiters.pop(task, None)
+        self._priorities.pop(task, None)
+        self._deadlines.pop(task, None)
+        # mark the exception as retrieved when every waiter has already gone away
+        if not task.cancelled():
+            task.exception()
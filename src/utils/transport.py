@@ -0,0 +1,57 @@
+from typing import AsyncContextManager, Mapping, Optional, Protocol
+from src.core.config import settings
+from src.utils.fake_opengin import FakeOpenGIN
+from src.utils.http_client import HTTPClient, http_client
+
+
+class UpstreamResponse(Protocol):
+    """The part of an aiohttp ClientResponse that OpenGINService uses"""
+
+    status: int
+
+    async def read(self) -> bytes: ...
+
+    async def json(self): ...
+
+    def raise_for_status(self): ...
+
+
+class Transport(Protocol):
+    """
+    How OpenGINService reaches OpenGIN. Requests and responses follow aiohttp's ClientSession API,
+    `post`/`get` return an async context manager around the response.
+    """
+
+    def post(self, url: str, data: Optional[bytes] = None, headers: Optional[Mapping[str, str]] = None) -> AsyncContextManager[UpstreamResponse]: ...
+
+    def get(self, url: str, headers: Optional[Mapping[str, str]] = None) -> AsyncContextManager[UpstreamResponse]: ...
+
+
+class AiohttpTransport:
+    """Talks HTTP to OpenGIN through the shared aiohttp session of the HTTP client"""
+
+    def __init__(self, client: HTTPClient):
+        self.client = client
+
+    def post(self, url: str, data: Optional[bytes] = None, headers: Optional[Mapping[str, str]] = None):
+        return self.client.session.post(url, data=data, headers=headers)
+
+    def get(self, url: str, headers: Optional[Mapping[str, str]] = None):
+        return self.client.session.get(url, headers=headers)
+
+
+def create_transport() -> Transport:
+    backend = settings.OPENGIN_TRANSPORT.lower()
+    if backend == "http":
+        return AiohttpTransport(http_client)
+    if backend == "fake":
+        return FakeOpenGIN.from_file(
+            settings.OPENGIN_FAKE_GRAPH,
+            latency=settings.OPENGIN_FAKE_LATENCY_MS / 1000,
+            jitter=settings.OPENGIN_FAKE_JITTER_MS / 1000,
+            error_rate=settings.OPENGIN_FAKE_ERROR_RATE,
+        )
+    raise ValueError(f"Unknown OPENGIN_TRANSPORT '{settings.OPENGIN_TRANSPORT}', expected http or fake")
+
+
+transport: Transport = create_transport()
@@ -1,11 +1,12 @@
 import binascii
 import json
 import re
-from datetime import datetime, date
+from datetime import datetime, date, timezone
 from google.protobuf.wrappers_pb2 import StringValue
 from google.protobuf import struct_pb2
 from google.protobuf.json_format import MessageToDict
 from src.enums import KindMinorEnum
+from src.utils.request_timing import timed
 
 class Util:
     # helper: normalize timestamp
@@ -21,8 +22,10 @@ class Util:
             ts = time_stamp.strip()
 
             try:
-                # Convert to standard ISO with Z suffix
+                # Convert to standard ISO with Z suffix, a timestamp with an offset is moved to UTC first
                 dt = datetime.fromisoformat(ts.replace("Z", "+00:00"))
+                if dt.tzinfo is not None:
+                    dt = dt.astimezone(timezone.utc)
                 return dt.strftime("%Y-%m-%dT%H:%M:%SZ")
             except ValueError:
                 # Fallback for date without time component
@@ -33,7 +36,8 @@ class Util:
                 return f"{ts}Z"
 
     # helper: decode protobuf attribute name 
-    @staticmethod      
+    @staticmethod
+    @timed("decode")
     def decode_protobuf_attribute_name(name : str) -> str: 
             try:
                 data = json.loads(name)
@@ -151,6 +155,7 @@ class Util:
         return re.sub(r"-\d{4}$", "", name)
     
     @staticmethod
+    @timed("decode")
     def decode_response(response):
         """
         Decode the protobuf response and extract the data
@@ -2,6 +2,7 @@
 from src.services.data_service import DataService
 import pytest
 from aiohttp import ClientError
+from pydantic_core import to_json
 from unittest.mock import patch, PropertyMock, MagicMock
 from services.opengin_service import OpenGINService
 from src.utils.http_client import HTTPClient
@@ -9,16 +10,33 @@ from services.organisation_service import OrganisationService
 from unittest.mock import AsyncMock
 from src.utils.util_functions import Util
 from src.services.person_service import PersonService
+from src.utils.cache import entity_cache, relation_cache, negative_cache
+from src.utils.circuit_breaker import circuit_breakers
+from src.utils.retry_budget import retry_budget
+from src.utils.hedging import hedgers
+from src.utils.metrics import registry
 
 # MockResponse class to simulate aiohttp responses
+class MockStreamReader:
+    def __init__(self, data: bytes):
+        self._data = data
+
+    async def iter_chunked(self, size):
+        for start in range(0, len(self._data), size):
+            yield self._data[start:start + size]
+
 class MockResponse:
     def __init__(self, json_data, status=200):
         self._json_data = json_data
         self.status = status
+        self.content = MockStreamReader(to_json(json_data))
 
     async def json(self):
         return self._json_data
 
+    async def read(self):
+        return to_json(self._json_data)
+
     def raise_for_status(self):
         if self.status >= 400:
             raise ClientError("HTTP error")
@@ -29,6 +47,21 @@ class MockResponse:
     async def __aexit__(self, exc_type, exc, tb):
         pass
 
+# Reset the process wide caches so tests do not leak upstream results into each other
+@pytest.fixture(autouse=True)
+def clear_caches():
+    for cache in (entity_cache, relation_cache, negative_cache):
+        cache.clear()
+    for breaker in circuit_breakers.values():
+        breaker.reset()
+    retry_budget.reset()
+    for hedger in hedgers.values():
+        hedger.reset()
+    registry.reset()
+    yield
+    for cache in (entity_cache, relation_cache, negative_cache):
+        cache.clear()
+
 # Fixture for OpenGINService tests
 @pytest.fixture
 def mock_session():
@@ -47,7 +80,14 @@ def mock_service():
 # Fixtueres for OrganisationService tests
 @pytest.fixture
 def mock_opengin_service():
-    return AsyncMock(spec=OpenGINService)
+    service = AsyncMock(spec=OpenGINService)
+
+    # batched lookups run the real batching logic on top of the mocked get_entities
+    async def get_entities_many(entity_ids, concurrency=None):
+        return await OpenGINService.get_entities_many(service, entity_ids, concurrency)
+
+    service.get_entities_many.side_effect = get_entities_many
+    return service
 
 @pytest.fixture
 def organisation_service(mock_opengin_service):
@@ -0,0 +1,60 @@
+from src.utils.adaptive_limit import WINDOW_SAMPLES, AdaptiveLimit, limit_changes
+
+def run_window(limit: AdaptiveLimit, latency: float, errors: int = 0, in_flight: int = 100):
+    for index in range(WINDOW_SAMPLES):
+        limit.sample(latency, failed=index < errors, in_flight=in_flight)
+
+def test_limit_starts_at_the_maximum_and_stays_there_when_disabled():
+    limit = AdaptiveLimit(min_limit=10, max_limit=200)
+    run_window(limit, 0.1)
+    run_window(limit, 10.0, errors=WINDOW_SAMPLES)
+
+    assert limit.current == 200
+
+def test_limit_backs_off_when_latency_rises_above_the_baseline():
+    limit = AdaptiveLimit(min_limit=10, max_limit=200, tolerance=2.0, enabled=True)
+    run_window(limit, 0.1)
+    run_window(limit, 0.15)
+    assert limit.current == 200
+
+    run_window(limit, 0.5)
+    assert limit.current == 180
+    assert limit_changes.get(direction="decrease", reason="latency") == 1
+
+def test_limit_backs_off_on_upstream_errors():
+    limit = AdaptiveLimit(min_limit=10, max_limit=200, error_rate=0.1, enabled=True)
+    run_window(limit, 0.1, errors=WINDOW_SAMPLES // 10)
+    assert limit.current == 200
+
+    run_window(limit, 0.1, errors=WINDOW_SAMPLES // 2)
+    assert limit.current == 180
+    assert limit_changes.get(direction="decrease", reason="errors") == 1
+
+def test_limit_never_drops_below_the_minimum():
+    limit = AdaptiveLimit(min_limit=10, max_limit=20, enabled=True)
+    for _ in range(20):
+        run_window(limit, 0.1, errors=WINDOW_SAMPLES)
+
+    assert limit.current == 10
+
+def test_limit_grows_back_only_while_it_is_in_use():
+    limit = AdaptiveLimit(min_limit=10, max_limit=200, enabled=True)
+    run_window(limit, 0.1, errors=WINDOW_SAMPLES)
+    assert limit.current == 180
+
+    # a mostly idle service learns nothing about higher concurrency
+    run_window(limit, 0.1, in_flight=5)
+    assert limit.current == 180
+
+    run_window(limit, 0.1, in_flight=150)
+    run_window(limit, 0.1, in_flight=150)
+    assert limit.current == 182
+    assert limit_changes.get(direction="increase", reason="headroom") == 2
+
+def test_baseline_follows_faster_responses_quickly():
+    limit = AdaptiveLimit(min_limit=10, max_limit=200, enabled=True)
+    run_window(limit, 1.0)
+    run_window(limit, 0.1)
+    run_window(limit, 0.1)
+
+    assert limit.baseline < 0.4
@@ -0,0 +1,212 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from src.utils.admission import RouteCosts, WeightedSemaphore, route_cost
+
+@pytest.mark.asyncio
+async def test_weighted_semaphore_admits_by_cost():
+    semaphore = WeightedSemaphore(lambda: 4)
+    await semaphore.acquire(3)
+    await semaphore.acquire(1)
+
+    waiter = asyncio.ensure_future(semaphore.acquire(2))
+    await asyncio.sleep(0)
+    assert not waiter.done()
+
+    semaphore.release(1)
+    await asyncio.sleep(0)
+    assert not waiter.done()
+
+    semaphore.release(3)
+    await waiter
+    assert semaphore.in_use == 2
+    assert semaphore.holders == 1
+
+@pytest.mark.asyncio
+async def test_weighted_semaphore_keeps_arrival_order():
+    semaphore = WeightedSemaphore(lambda: 4)
+    await semaphore.acquire(3)
+    heavy = asyncio.ensure_future(semaphore.acquire(3))
+    await asyncio.sleep(0)
+
+    # would fit, but queues behind the earlier heavy waiter
+    cheap = asyncio.ensure_future(semaphore.acquire(1))
+    await asyncio.sleep(0)
+    assert not cheap.done()
+
+    semaphore.release(3)
+    await asyncio.gather(heavy, cheap)
+    assert semaphore.in_use == 4
+
+@pytest.mark.asyncio
+async def test_weighted_semaphore_admits_a_cost_above_capacity_when_idle():
+    semaphore = WeightedSemaphore(lambda: 2)
+    await semaphore.acquire(5)
+    assert semaphore.in_use == 5
+
+    waiter = asyncio.ensure_future(semaphore.acquire(1))
+    await asyncio.sleep(0)
+    assert not waiter.done()
+    semaphore.release(5)
+    await waiter
+
+@pytest.mark.asyncio
+async def test_cancelled_head_waiter_lets_the_next_ones_in():
+    semaphore = WeightedSemaphore(lambda: 4)
+    await semaphore.acquire(2)
+    heavy = asyncio.ensure_future(semaphore.acquire(4))
+    cheap = asyncio.ensure_future(semaphore.acquire(1))
+    await asyncio.sleep(0)
+
+    heavy.cancel()
+    await asyncio.gather(heavy, return_exceptions=True)
+    await cheap
+    assert semaphore.in_use == 3
+    assert len(semaphore) == 0
+
+def test_route_costs_parse_configured_costs():
+    assert RouteCosts.parse("") == {}
+    assert RouteCosts.parse(" /v1/person/all-presidents=40, /v1/a/{id}=2.5 ") == {
+        "/v1/person/all-presidents": 40.0,
+        "/v1/a/{id}": 2.5,
+    }
+    with pytest.raises(ValueError):
+        RouteCosts.parse("/v1/person/all-presidents")
+
+def test_route_template_is_resolved_from_the_application():
+    app = FastAPI()
+
+    @app.post("/v1/organisation/cabinet-flow/{president_id}")
+    async def cabinet_flow(president_id: str):
+        return {}
+
+    scope = {"type": "http", "method": "POST", "path": "/v1/organisation/cabinet-flow/gov_01", "app": app}
+    assert RouteCosts.route(scope) == "/v1/organisation/cabinet-flow/{president_id}"
+    assert RouteCosts.route(dict(scope, path="/v1/unknown")) is None
+    assert RouteCosts.route(dict(scope, method="GET")) is None
+
+def test_route_costs_learn_from_upstream_calls():
+    costs = RouteCosts({"/fixed": 80}, max_cost=50, enabled=True)
+    assert costs.cost("/fixed") == 50
+    assert costs.cost("/new") == 1
+    assert costs.cost(None) == 1
+
+    costs.observe("/new", 30)
+    assert costs.cost("/new") == 30
+    costs.observe("/new", 0)
+    assert costs.cost("/new") == pytest.approx(27)
+    assert route_cost.get(route="/new") == pytest.approx(27)
+
+    costs.observe("/fixed", 1)
+    assert costs.cost("/fixed") == 50
+
+def test_disabled_route_costs_price_everything_at_one():
+    costs = RouteCosts({"/fixed": 20}, max_cost=50)
+    costs.observe("/new", 30)
+
+    assert costs.cost("/fixed") == 1
+    assert costs.cost("/new") == 1
+
+@pytest.mark.asyncio
+async def test_queued_clients_take_turns():
+    semaphore = WeightedSemaphore(lambda: 1)
+    await semaphore.acquire(1)
+    admitted = []
+
+    async def wait(key: str):
+        await semaphore.acquire(1, key)
+        admitted.append(key)
+
+    scraper = [asyncio.ensure_future(wait("scraper")) for _ in range(6)]
+    users = [asyncio.ensure_future(wait(user)) for user in ("alice", "bob", "alice")]
+    await asyncio.sleep(0)
+    assert len(semaphore) == 9
+    assert semaphore.clients == 3
+
+    for _ in range(9):
+        semaphore.release(1)
+        await asyncio.sleep(0)
+
+    assert admitted == ["scraper", "alice", "bob", "scraper", "alice", "scraper", "scraper", "scraper", "scraper"]
+    await asyncio.gather(*scraper, *users)
+
+@pytest.mark.asyncio
+async def test_clients_share_units_not_requests():
+    semaphore = WeightedSemaphore(lambda: 2)
+    await semaphore.acquire(2)
+    admitted = []
+
+    async def wait(key: str, cost: float):
+        await semaphore.acquire(cost, key)
+        admitted.append(key)
+        await asyncio.sleep(0)
+        semaphore.release(cost)
+
+    tasks = [asyncio.ensure_future(wait("heavy", 2)) for _ in range(3)]
+    tasks += [asyncio.ensure_future(wait("light", 1)) for _ in range(6)]
+    await asyncio.sleep(0)
+    semaphore.release(2)
+    await asyncio.gather(*tasks)
+
+    # every client earns the same units per round, one heavy request goes in for every two light ones
+    assert admitted == ["light", "heavy", "light", "light", "heavy", "light", "light", "heavy", "light"]
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_leaves_its_client_queue():
+    semaphore = WeightedSemaphore(lambda: 1)
+    await semaphore.acquire(1)
+    first = asyncio.ensure_future(semaphore.acquire(1, "scraper"))
+    second = asyncio.ensure_future(semaphore.acquire(1, "user"))
+    await asyncio.sleep(0)
+
+    first.cancel()
+    semaphore.release(1)
+    await asyncio.gather(first, return_exceptions=True)
+    await second
+
+    assert semaphore.clients == 0
+    assert semaphore.holders == 1
+
+@pytest.mark.asyncio
+async def test_units_ahead_follow_round_robin():
+    semaphore = WeightedSemaphore(lambda: 1)
+    await semaphore.acquire(1)
+    tasks = [asyncio.ensure_future(semaphore.acquire(1, "scraper")) for _ in range(10)]
+    tasks.append(asyncio.ensure_future(semaphore.acquire(2, "user")))
+    await asyncio.sleep(0)
+
+    # a new user request only waits for as many scraper units as the user asks for
+    assert semaphore.units_ahead(1, "user") == 6
+    assert semaphore.units_ahead(1, "other") == 3
+    assert semaphore.units_ahead(1, "scraper") == 13
+
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    assert semaphore.units_ahead(1, "user") == 1
+
+@pytest.mark.asyncio
+async def test_overloaded_queue_serves_newest_first():
+    semaphore = WeightedSemaphore(lambda: 1, lifo_after=0.01)
+    await semaphore.acquire(1)
+    admitted = []
+
+    async def wait(index: int):
+        await semaphore.acquire(1)
+        admitted.append(index)
+
+    tasks = [asyncio.ensure_future(wait(index)) for index in range(3)]
+    await asyncio.sleep(0)
+    semaphore.release(1)
+    await asyncio.sleep(0)
+
+    await asyncio.sleep(0.02)
+    tasks += [asyncio.ensure_future(wait(index)) for index in range(3, 5)]
+    await asyncio.sleep(0)
+    for _ in range(4):
+        semaphore.release(1)
+        await asyncio.sleep(0)
+
+    await asyncio.gather(*tasks)
+    assert admitted == [0, 4, 3, 2, 1]
@@ -0,0 +1,116 @@
+import asyncio
+
+import pytest
+from src.utils.bulkhead import Bulkhead, Priority, current_priority
+from src.utils.background_refresh import BackgroundRefresher
+from src.utils.http_client import http_client
+from src.models.organisation_schemas import Entity
+from test.conftest import MockResponse
+
+async def hold(bulkhead: Bulkhead, order: list, name: str, release: asyncio.Event, priority=None):
+    async with bulkhead.slot(priority):
+        order.append(name)
+        await release.wait()
+
+@pytest.mark.asyncio
+async def test_bulkhead_caps_concurrent_calls():
+    bulkhead = Bulkhead("attributes", limit=2)
+    order, release = [], asyncio.Event()
+
+    tasks = [asyncio.create_task(hold(bulkhead, order, str(i), release)) for i in range(5)]
+    await asyncio.sleep(0)
+
+    assert order == ["0", "1"]
+    assert bulkhead.in_use == 2
+    assert bulkhead.waiting() == 3
+
+    release.set()
+    await asyncio.gather(*tasks)
+    assert order == ["0", "1", "2", "3", "4"]
+    assert bulkhead.in_use == 0
+
+@pytest.mark.asyncio
+async def test_interactive_calls_go_ahead_of_background_calls():
+    bulkhead = Bulkhead("relations", limit=1)
+    order, first, rest = [], asyncio.Event(), asyncio.Event()
+
+    running = asyncio.create_task(hold(bulkhead, order, "running", first))
+    await asyncio.sleep(0)
+    queued = [
+        asyncio.create_task(hold(bulkhead, order, "background 1", rest, Priority.BACKGROUND)),
+        asyncio.create_task(hold(bulkhead, order, "background 2", rest, Priority.BACKGROUND)),
+        asyncio.create_task(hold(bulkhead, order, "interactive", rest)),
+    ]
+    await asyncio.sleep(0)
+    assert bulkhead.waiting(Priority.BACKGROUND) == 2
+
+    first.set()
+    rest.set()
+    await asyncio.gather(running, *queued)
+
+    assert order == ["running", "interactive", "background 1", "background 2"]
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_gives_up_its_place():
+    bulkhead = Bulkhead("entities", limit=1)
+    order, release = [], asyncio.Event()
+
+    running = asyncio.create_task(hold(bulkhead, order, "running", release))
+    await asyncio.sleep(0)
+    cancelled = asyncio.create_task(hold(bulkhead, order, "cancelled", release))
+    waiting = asyncio.create_task(hold(bulkhead, order, "waiting", release))
+    await asyncio.sleep(0)
+
+    cancelled.cancel()
+    await asyncio.sleep(0)
+    release.set()
+    await asyncio.gather(running, waiting)
+
+    assert order == ["running", "waiting"]
+    assert bulkhead.in_use == 0
+    assert bulkhead.waiting() == 0
+
+@pytest.mark.asyncio
+async def test_disabled_bulkhead_lets_every_call_through():
+    bulkhead = Bulkhead("entities", limit=1, enabled=False)
+    order, release = [], asyncio.Event()
+
+    tasks = [asyncio.create_task(hold(bulkhead, order, str(i), release)) for i in range(3)]
+    await asyncio.sleep(0)
+
+    assert len(order) == 3
+    release.set()
+    await asyncio.gather(*tasks)
+
+@pytest.mark.asyncio
+async def test_background_refreshes_run_at_background_priority():
+    refresher = BackgroundRefresher()
+    seen = []
+
+    async def refresh():
+        seen.append(current_priority.get())
+
+    refresher.refresh("key", refresh)
+    await refresher.wait()
+
+    assert seen == [Priority.BACKGROUND]
+    assert current_priority.get() == Priority.INTERACTIVE
+
+@pytest.mark.asyncio
+async def test_busy_attribute_slots_do_not_block_entity_lookups(mock_service, mock_session):
+    mock_session.get.return_value = MockResponse({"value": "data"})
+    mock_session.post.return_value = MockResponse({"body": [{"id": "entity_123", "name": "Test Entity"}]})
+    attributes = http_client.bulkheads["attributes"]
+    for _ in range(attributes.limit):
+        await attributes.acquire()
+    try:
+        download = asyncio.create_task(mock_service.get_attributes("category_123", "dataset"))
+        entities = await asyncio.wait_for(mock_service.get_entities(Entity(id="entity_123")), timeout=1)
+        assert entities[0].name == "Test Entity"
+        assert not download.done()
+        assert attributes.waiting() == 1
+    finally:
+        for _ in range(attributes.limit):
+            attributes.release()
+
+    assert await download == {"value": "data"}
@@ -0,0 +1,120 @@
+from datetime import datetime, timezone
+from src.utils.cache import TTLCache, RelationTTLPolicy
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_cache_hit_and_miss_counters():
+    cache = TTLCache(max_size=10, ttl=60)
+
+    assert cache.get("entity_123") is None
+    cache.set("entity_123", "value")
+
+    assert cache.get("entity_123") == "value"
+    assert cache.hits == 1
+    assert cache.misses == 1
+
+def test_cache_entry_expires_after_ttl():
+    clock = FakeClock()
+    cache = TTLCache(max_size=10, ttl=60, clock=clock)
+    cache.set("entity_123", "value")
+
+    clock.now = 59
+    assert cache.get("entity_123") == "value"
+
+    clock.now = 60
+    assert cache.get("entity_123") is None
+    assert cache.expirations == 1
+    assert len(cache) == 0
+
+def test_cache_evicts_least_recently_used():
+    cache = TTLCache(max_size=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+
+    # touching a makes b the least recently used entry
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert "a" in cache
+    assert "b" not in cache
+    assert "c" in cache
+    assert cache.evictions == 1
+
+def test_cache_invalidate_and_clear():
+    cache = TTLCache(max_size=10, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+
+    assert cache.invalidate("a") is True
+    assert cache.invalidate("a") is False
+    assert cache.get("a") is None
+
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.stats()["misses"] == 0
+
+def test_cache_disabled_with_zero_size():
+    cache = TTLCache(max_size=0, ttl=60)
+    cache.set("a", 1)
+
+    assert cache.get("a") is None
+
+# Tests for the relation TTL policy
+def fixed_now():
+    return datetime(2024, 6, 1, tzinfo=timezone.utc)
+
+def test_relation_policy_gives_historical_dates_long_ttl():
+    policy = RelationTTLPolicy(historical_ttl=86400, current_ttl=300, historical_after_days=30, now=fixed_now)
+
+    assert policy.ttl_for("2015-01-01T00:00:00Z") == 86400
+
+def test_relation_policy_gives_recent_dates_short_ttl():
+    policy = RelationTTLPolicy(historical_ttl=86400, current_ttl=300, historical_after_days=30, now=fixed_now)
+
+    assert policy.ttl_for("2024-05-20T00:00:00Z") == 300
+    assert policy.ttl_for("2030-01-01T00:00:00Z") == 300
+
+def test_relation_policy_without_active_at_uses_short_ttl():
+    policy = RelationTTLPolicy(historical_ttl=86400, current_ttl=300, historical_after_days=30, now=fixed_now)
+
+    assert policy.ttl_for("") == 300
+    assert policy.ttl_for(None) == 300
+    assert policy.ttl_for("not-a-date") == 300
+
+def test_cache_invalidate_where():
+    cache = TTLCache(max_size=10, ttl=60)
+    cache.set(("entity_1", "AS_MINISTER"), 1)
+    cache.set(("entity_1", "AS_APPOINTED"), 2)
+    cache.set(("entity_2", "AS_MINISTER"), 3)
+
+    assert cache.invalidate_where(lambda key: key[0] == "entity_1") == 2
+    assert len(cache) == 1
+
+def test_cache_lookup_stale_windows():
+    clock = FakeClock()
+    cache = TTLCache(max_size=10, ttl=60, clock=clock, stale_while_revalidate=30, stale_if_error=120)
+    cache.set("entity_123", "value")
+
+    clock.now = 59
+    assert cache.lookup("entity_123").fresh
+
+    clock.now = 60
+    entry = cache.lookup("entity_123")
+    assert (entry.value, entry.fresh, entry.revalidate) == ("value", False, True)
+    assert cache.get("entity_123") is None
+    assert "entity_123" not in cache
+
+    clock.now = 90
+    entry = cache.lookup("entity_123")
+    assert (entry.value, entry.fresh, entry.revalidate) == ("value", False, False)
+
+    clock.now = 180
+    assert cache.lookup("entity_123") is None
+    assert cache.expirations == 1
+    assert cache.stale_hits == 1
+    assert len(cache) == 0
@@ -0,0 +1,121 @@
+import pytest
+from unittest.mock import patch
+from src.exception.exceptions import InternalServerError, NotFoundError, ServiceUnavailableError
+from src.utils.circuit_breaker import CircuitBreaker, CLOSED, OPEN, HALF_OPEN, circuit_breakers
+from src.models.organisation_schemas import Entity
+from test.conftest import MockResponse
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+async def succeed():
+    return "ok"
+
+async def fail():
+    raise InternalServerError("An unexpected error occurred")
+
+async def not_found():
+    raise NotFoundError("missing")
+
+@pytest.fixture
+def clock():
+    fake_clock = FakeClock()
+    with patch("src.utils.circuit_breaker.time.monotonic", fake_clock):
+        yield fake_clock
+
+@pytest.mark.asyncio
+async def test_breaker_opens_on_error_rate(clock):
+    breaker = CircuitBreaker("search", min_calls=4, error_rate_threshold=0.5)
+
+    for fn in (succeed, fail, succeed, fail):
+        try:
+            await breaker.call(fn)
+        except InternalServerError:
+            pass
+
+    assert breaker.state == OPEN
+    with pytest.raises(ServiceUnavailableError):
+        await breaker.call(succeed)
+    assert breaker.rejected == 1
+
+@pytest.mark.asyncio
+async def test_breaker_stays_closed_below_min_calls(clock):
+    breaker = CircuitBreaker("search", min_calls=4, error_rate_threshold=0.5)
+
+    for _ in range(3):
+        with pytest.raises(InternalServerError):
+            await breaker.call(fail)
+
+    assert breaker.state == CLOSED
+
+@pytest.mark.asyncio
+async def test_breaker_treats_not_found_as_success(clock):
+    breaker = CircuitBreaker("search", min_calls=2, error_rate_threshold=0.5)
+
+    for _ in range(4):
+        with pytest.raises(NotFoundError):
+            await breaker.call(not_found)
+
+    assert breaker.state == CLOSED
+
+@pytest.mark.asyncio
+async def test_breaker_opens_on_slow_calls(clock):
+    breaker = CircuitBreaker("search", min_calls=2, slow_call_seconds=1, slow_call_rate_threshold=1.0)
+
+    async def slow():
+        clock.now += 2
+        return "ok"
+
+    await breaker.call(slow)
+    await breaker.call(slow)
+
+    assert breaker.state == OPEN
+
+@pytest.mark.asyncio
+async def test_breaker_half_open_probes_close_the_circuit(clock):
+    breaker = CircuitBreaker("search", min_calls=1, error_rate_threshold=0.5, open_seconds=10, half_open_max_calls=2)
+    with pytest.raises(InternalServerError):
+        await breaker.call(fail)
+    assert breaker.state == OPEN
+
+    clock.now += 10
+    assert await breaker.call(succeed) == "ok"
+    assert breaker.state == HALF_OPEN
+    assert await breaker.call(succeed) == "ok"
+    assert breaker.state == CLOSED
+
+@pytest.mark.asyncio
+async def test_breaker_half_open_failure_reopens(clock):
+    breaker = CircuitBreaker("search", min_calls=1, error_rate_threshold=0.5, open_seconds=10)
+    with pytest.raises(InternalServerError):
+        await breaker.call(fail)
+
+    clock.now += 10
+    with pytest.raises(InternalServerError):
+        await breaker.call(fail)
+
+    assert breaker.state == OPEN
+    assert breaker.times_opened == 2
+
+def test_breaker_limits_half_open_probes(clock):
+    breaker = CircuitBreaker("search", open_seconds=10, half_open_max_calls=1)
+    breaker._transition(OPEN)
+    clock.now += 10
+
+    assert breaker.allow() is True
+    assert breaker.allow() is False
+
+@pytest.mark.asyncio
+async def test_open_breaker_fails_fast_without_upstream_call(mock_service, mock_session):
+    mock_session.post.return_value = MockResponse({"body": [{"id": "entity_123"}]})
+    circuit_breakers["search"]._transition(OPEN)
+
+    with pytest.raises(ServiceUnavailableError) as exc_info:
+        await mock_service.get_entities(Entity(id="entity_123"))
+
+    mock_session.post.assert_not_called()
+    assert 1 <= int(exc_info.value.headers["Retry-After"]) <= circuit_breakers["search"].open_seconds
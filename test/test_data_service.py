@@ -1,7 +1,9 @@
 import pytest
 import asyncio
-from src.exception.exceptions import InternalServerError, BadRequestError, NotFoundError
-from unittest.mock import patch
+from fastapi.testclient import TestClient
+from src.exception.exceptions import InternalServerError, BadRequestError, NotFoundError, ServiceUnavailableError, GatewayTimeoutError
+from unittest.mock import AsyncMock, patch
+from src.services.opengin_service import OpenGINService
 from src.models.organisation_schemas import Entity, Relation, Kind
 from src.enums import KindMajorEnum, KindMinorEnum, RelationNameEnum, RelationDirectionEnum
 
@@ -431,6 +433,28 @@ async def test_fetch_dataset_available_years_without_dataset_ids(data_service):
     assert "Dataset ID list is required" in str(exc_info.value)
 
 
+@pytest.mark.asyncio
+async def test_fetch_dataset_available_years_blank_dataset_ids(data_service, mock_opengin_service):
+    """Test fetch_dataset_available_years raises BadRequestError when no dataset id is left after stripping"""
+    with pytest.raises(BadRequestError) as exc_info:
+        await data_service.fetch_dataset_available_years(dataset_ids=[" ", ""])
+
+    assert "Dataset ID list is required" in str(exc_info.value)
+    mock_opengin_service.get_entities.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_fetch_dataset_available_years_ids_with_whitespace(data_service, mock_opengin_service):
+    """Test fetch_dataset_available_years looks up padded ids once and lists each dataset once"""
+    mock_opengin_service.get_entities.return_value = [
+        Entity(id="dataset_123", name="encoded_name", created="2023-06-15T00:00:00Z")
+    ]
+
+    with patch("src.utils.util_functions.Util.decode_protobuf_attribute_name", return_value="Dataset 2023"):
+        result = await data_service.fetch_dataset_available_years(dataset_ids=["dataset_123", " dataset_123 "])
+
+    assert result["years"] == [{"datasetId": "dataset_123", "year": "2023"}]
+    assert mock_opengin_service.get_entities.call_count == 1
+
 @pytest.mark.asyncio
 async def test_fetch_dataset_available_years_empty_dataset_ids(data_service):
     """Test fetch_dataset_available_years raises BadRequestError when dataset_ids is empty"""
@@ -1246,3 +1270,17 @@ async def test_fetch_dataset_root_multiple_relations_uses_first(data_service, mo
     assert result["id"] == department_id
     # Verify get_entities was called with the first relation's category_id
     mock_opengin_service.get_entities.assert_called_with(entity=Entity(id=category_id_1))
+
+@pytest.mark.parametrize("error, status_code", [
+    (ServiceUnavailableError("Upstream 'relations' is unavailable, please try again shortly", retry_after=15), 503),
+    (GatewayTimeoutError("Request deadline exceeded"), 504),
+])
+def test_dataset_root_route_keeps_upstream_unavailable_and_timeout_status(error, status_code):
+    from main import app
+
+    with patch.object(OpenGINService, "fetch_relation", AsyncMock(side_effect=error)):
+        response = TestClient(app).get("/v1/data/datasets/dataset_1/root")
+
+    assert response.status_code == status_code
+    assert response.json()["detail"] == error.detail
+    assert response.headers.get("retry-after") == (error.headers or {}).get("Retry-After")
@@ -0,0 +1,248 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from unittest.mock import patch
+from src.core.config import settings
+from src.exception.exceptions import GatewayTimeoutError, InternalServerError
+from src.middleware.deadline import DeadlineMiddleware, requests_abandoned
+from src.models.organisation_schemas import Entity
+from src.services.opengin_service import api_retry
+from src.services.organisation_service import OrganisationService
+from src.utils.deadline import allows_retry, bounded_backoff, deadline_exceeded, deadline_scope, remaining, within_deadline
+from src.utils.single_flight import SingleFlight
+from test.conftest import MockResponse
+
+@within_deadline("search")
+async def upstream_call(seconds: float):
+    await asyncio.sleep(seconds)
+    return "ok"
+
+@pytest.mark.asyncio
+async def test_calls_without_deadline_are_not_bounded():
+    assert remaining() is None
+    assert allows_retry()
+    assert await upstream_call(0) == "ok"
+
+@pytest.mark.asyncio
+async def test_call_running_past_the_deadline_is_cut_short():
+    with deadline_scope(0.05):
+        assert await upstream_call(0) == "ok"
+        with pytest.raises(GatewayTimeoutError):
+            await upstream_call(1)
+        # nothing is started once the budget is spent
+        with pytest.raises(GatewayTimeoutError):
+            await upstream_call(0)
+
+    assert deadline_exceeded.get(operation="search") == 2
+
+@pytest.mark.asyncio
+async def test_inner_scope_can_not_extend_the_deadline():
+    with deadline_scope(0.5):
+        with deadline_scope(10):
+            assert remaining() <= 0.5
+        assert not allows_retry()
+
+@pytest.mark.asyncio
+async def test_no_retry_when_the_deadline_leaves_no_room(mock_service, mock_session):
+    mock_session.get.side_effect = InternalServerError("Connection timeout")
+    mock_session.post.side_effect = InternalServerError("Connection timeout")
+
+    with deadline_scope(0.5), pytest.raises(InternalServerError):
+        await mock_service.get_metadata("entity_123")
+    # entity lookups run as single-flight calls, under the deadline of their caller as well
+    with deadline_scope(0.5), pytest.raises(InternalServerError):
+        await mock_service.get_entities(Entity(id="entity_123"))
+
+    mock_session.get.assert_called_once()
+    mock_session.post.assert_called_once()
+
+@pytest.mark.asyncio
+async def test_backoff_leaves_room_for_the_next_attempt():
+    assert list(bounded_backoff([0.5, 6.0])) == [0.5, 6.0]
+    with deadline_scope(3.0):
+        sleeps = list(bounded_backoff([0.5, 6.0]))
+    assert sleeps[0] == 0.5
+    assert 1.9 < sleeps[1] <= 2.0
+    with deadline_scope(0.5):
+        assert list(bounded_backoff([0.5])) == [0.0]
+
+@pytest.mark.asyncio
+async def test_shared_call_is_retried_while_any_caller_has_time_left():
+    single_flight = SingleFlight()
+    attempts = 0
+
+    @api_retry("search")
+    @within_deadline("search")
+    async def flaky():
+        nonlocal attempts
+        attempts += 1
+        await asyncio.sleep(0.05)
+        if attempts == 1:
+            raise InternalServerError("Connection timeout")
+        return "ok"
+
+    async def call(seconds: float):
+        with deadline_scope(seconds):
+            return await single_flight.do("key", flaky)
+
+    with patch("random.uniform", return_value=0.0):
+        with pytest.raises(InternalServerError):
+            await call(0.5)
+        assert attempts == 1
+
+        attempts = 0
+        short = asyncio.ensure_future(call(0.5))
+        await asyncio.sleep(0.01)
+        # the failed attempt is retried because the caller that joined has the time for it
+        assert await asyncio.gather(short, call(30)) == ["ok", "ok"]
+        assert attempts == 2
+
+@pytest.mark.asyncio
+async def test_shared_call_is_abandoned_once_its_only_caller_runs_out_of_time(mock_service, mock_session):
+    cancelled = asyncio.Event()
+
+    class HangingResponse(MockResponse):
+        async def __aenter__(self):
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+    mock_session.post.return_value = HangingResponse({"body": []})
+
+    with deadline_scope(0.2), pytest.raises(GatewayTimeoutError):
+        await mock_service.get_entities(Entity(id="entity_123"))
+    await asyncio.sleep(0.01)
+
+    assert cancelled.is_set()
+    assert len(mock_service.single_flight) == 0
+
+@pytest.mark.asyncio
+async def test_callers_sharing_an_upstream_call_each_wait_within_their_own_deadline():
+    single_flight = SingleFlight()
+
+    async def call(seconds: float):
+        with deadline_scope(seconds):
+            return await single_flight.do("key", lambda: upstream_call(0.5))
+
+    short = asyncio.ensure_future(call(0.2))
+    await asyncio.sleep(0.01)
+    results = await asyncio.gather(short, call(30), return_exceptions=True)
+
+    # the call started by the short request is not cut short by its deadline
+    assert isinstance(results[0], GatewayTimeoutError)
+    assert results[1] == "ok"
+    assert deadline_exceeded.get(operation="search") == 0
+
+def test_request_past_its_deadline_gets_504_and_its_fan_out_is_cancelled():
+    cancelled = []
+    app = FastAPI()
+
+    async def slow_lookup(index: int):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(index)
+            raise
+
+    @app.get("/slow")
+    async def slow():
+        await asyncio.gather(*[slow_lookup(index) for index in range(3)], return_exceptions=True)
+        return {"done": True}
+
+    @app.get("/fast")
+    async def fast():
+        return {"remaining": remaining()}
+
+    with patch.object(settings, "REQUEST_DEADLINE_SECONDS", 0.1):
+        app.add_middleware(DeadlineMiddleware)
+        client = TestClient(app)
+        response = client.get("/slow")
+        fast = client.get("/fast")
+
+    assert response.status_code == 504
+    assert sorted(cancelled) == [0, 1, 2]
+    assert requests_abandoned.get(reason="deadline") == 1
+    assert fast.status_code == 200
+    assert 0 < fast.json()["remaining"] <= 0.1
+
+@pytest.mark.asyncio
+async def test_client_disconnect_cancels_the_request():
+    started, cancelled, sent = asyncio.Event(), asyncio.Event(), []
+
+    async def app(scope, receive, send):
+        await receive()
+        started.set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    messages = [{"type": "http.request", "body": b"", "more_body": False}]
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        await started.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": "/slow", "headers": []}
+    await asyncio.wait_for(DeadlineMiddleware(app)(scope, receive, send), timeout=1)
+
+    assert cancelled.is_set()
+    assert sent == []
+    assert requests_abandoned.get(reason="disconnect") == 1
+
+@pytest.mark.asyncio
+async def test_client_disconnect_through_the_application_middleware_stack():
+    from main import app
+
+    started, cancelled, sent = asyncio.Event(), asyncio.Event(), []
+
+    async def slow_prime_minister(self, selected_date):
+        started.set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    messages = [{"type": "http.request", "body": b'{"date": "2020-01-01"}', "more_body": False}]
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        await started.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": "/v1/organisation/prime-minister",
+        "raw_path": b"/v1/organisation/prime-minister",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"content-type", b"application/json"), (b"host", b"testserver")],
+        "client": ("127.0.0.1", 50000),
+        "server": ("testserver", 80),
+    }
+    with patch.object(OrganisationService, "fetch_prime_minister", slow_prime_minister):
+        await asyncio.wait_for(app(scope, receive, send), timeout=1)
+
+    # cancelled quietly, nothing is sent to the gone client and no 500 is produced on the way out
+    assert cancelled.is_set()
+    assert sent == []
+    assert requests_abandoned.get(reason="disconnect") == 1
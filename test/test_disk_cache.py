@@ -0,0 +1,124 @@
+import asyncio
+import sqlite3
+
+import pytest
+from unittest.mock import patch
+from src.utils import disk_cache as disk_cache_module
+from src.utils.disk_cache import DiskCache
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+@pytest.fixture
+def cache(tmp_path, clock):
+    cache = DiskCache(path=str(tmp_path / "cache" / "opengin.sqlite3"), max_bytes=1000, ttl=60, compact_every=1000, clock=clock)
+    yield cache
+    cache._close()
+
+@pytest.mark.asyncio
+async def test_disk_cache_set_and_get(cache):
+    assert await cache.get("relations", "key") is None
+
+    await cache.set("relations", "key", b"value")
+
+    assert await cache.get("relations", "key") == b"value"
+    assert await cache.get("entities", "key") is None
+    assert (cache.hits, cache.misses, cache.writes) == (1, 2, 1)
+
+@pytest.mark.asyncio
+async def test_disk_cache_entry_expires(cache, clock):
+    await cache.set("relations", "key", b"value", ttl=10)
+
+    clock.now += 10
+
+    assert await cache.get("relations", "key") is None
+    assert await cache.usage() == {"entries": 0, "bytes": 0}
+
+@pytest.mark.asyncio
+async def test_disk_cache_survives_reopen(cache, tmp_path, clock):
+    await cache.set("relations", "key", b"value")
+    await cache.close()
+
+    reopened = DiskCache(path=cache.path, max_bytes=1000, ttl=60, clock=clock)
+    await reopened.start()
+
+    assert await reopened.get("relations", "key") == b"value"
+    reopened._close()
+
+@pytest.mark.asyncio
+async def test_disk_cache_wiped_on_schema_version_change(cache, clock):
+    await cache.set("relations", "key", b"value")
+    await cache.close()
+
+    with patch.object(disk_cache_module, "SCHEMA_VERSION", disk_cache_module.SCHEMA_VERSION + 1):
+        reopened = DiskCache(path=cache.path, max_bytes=1000, ttl=60, clock=clock)
+        assert await reopened.get("relations", "key") is None
+        reopened._close()
+
+    connection = sqlite3.connect(cache.path)
+    assert connection.execute("PRAGMA user_version").fetchone()[0] == disk_cache_module.SCHEMA_VERSION + 1
+    connection.close()
+
+@pytest.mark.asyncio
+async def test_disk_cache_compaction_drops_expired_then_least_recently_read(cache, clock):
+    await cache.set("relations", "expired", b"x" * 100, ttl=5)
+    for index in range(4):
+        clock.now += 1
+        await cache.set("relations", f"key_{index}", b"x" * 300)
+    clock.now += 1
+    await cache.get("relations", "key_0")
+
+    clock.now += 5
+    await cache.compact()
+
+    # 1200 bytes of live values against a 1000 byte limit, trimmed to 900 by dropping the oldest reads
+    assert await cache.get("relations", "key_0") is not None
+    assert await cache.get("relations", "key_1") is None
+    assert await cache.get("relations", "key_2") is not None
+    assert (await cache.usage())["bytes"] <= 900
+    assert cache.evictions == 1
+
+@pytest.mark.asyncio
+async def test_disk_cache_errors_are_misses(tmp_path, clock):
+    broken = tmp_path / "broken.sqlite3"
+    broken.write_bytes(b"not a database" * 100)
+    cache = DiskCache(path=str(broken), max_bytes=1000, ttl=60, clock=clock)
+
+    assert await cache.get("relations", "key") is None
+    await cache.set("relations", "key", b"value")
+    assert cache.errors == 2
+    assert cache.writes == 0
+
+@pytest.mark.asyncio
+async def test_disk_cache_file_system_errors_are_misses(tmp_path, clock):
+    (tmp_path / "not_a_directory").write_bytes(b"")
+    cache = DiskCache(path=str(tmp_path / "not_a_directory" / "cache.sqlite3"), max_bytes=1000, ttl=60, clock=clock)
+
+    assert await cache.get("relations", "key") is None
+    await cache.set("relations", "key", b"value")
+    assert cache.errors == 2
+    assert cache.writes == 0
+
+@pytest.mark.asyncio
+async def test_disk_cache_reads_do_not_wait_for_writes(cache, clock):
+    await cache.set("relations", "key", b"value")
+
+    # a write in progress holds the lock, a hit is still answered and its read time is kept for later
+    with cache._lock:
+        clock.now += 1
+        assert await asyncio.wait_for(cache.get("relations", "key"), timeout=1) == b"value"
+    assert cache._pending == {("relations", "key"): clock.now}
+
+    await cache.set("relations", "other", b"value")
+    assert cache._pending == {}
+    connection = sqlite3.connect(cache.path)
+    assert connection.execute("SELECT accessed_at FROM entries WHERE key = 'key'").fetchone()[0] == clock.now
+    connection.close()
@@ -0,0 +1,98 @@
+import asyncio
+import time
+
+import pytest
+from unittest.mock import patch
+from src.core.config import settings
+from src.exception.exceptions import InternalServerError, NotFoundError
+from src.models.organisation_schemas import Entity, Kind, Relation
+from src.services.data_service import DataService
+from src.services.organisation_service import OrganisationService
+from services.opengin_service import OpenGINService
+from src.utils.fake_opengin import FakeOpenGIN
+from src.utils.transport import create_transport
+from src.utils.util_functions import Util
+
+GRAPH = "benchmarks/fixtures/opengin_graph.json"
+
+@pytest.fixture
+def fake():
+    return FakeOpenGIN.from_file(GRAPH, seed=1)
+
+@pytest.fixture
+def fake_service(fake):
+    service = OpenGINService()
+    service.transport = fake
+    return service
+
+@pytest.mark.asyncio
+async def test_entity_search_by_id_and_kind(fake_service):
+    [government] = await fake_service.get_entities(Entity(id="gov_01"))
+    datasets = await fake_service.get_entities(Entity(kind=Kind(major="Dataset", minor="tabular")))
+
+    assert Util.decode_protobuf_attribute_name(government.name) == "Government of Sri Lanka"
+    assert len(datasets) == 4
+    with pytest.raises(NotFoundError):
+        await fake_service.get_entities(Entity(id="missing"))
+
+@pytest.mark.asyncio
+async def test_relations_are_filtered_by_direction_and_active_date(fake_service):
+    historical = await fake_service.fetch_relation("gov_01", Relation(name="AS_PRESIDENT", activeAt="2016-01-01T00:00:00Z", direction="OUTGOING"))
+    current = await fake_service.fetch_relation("person_president_2", Relation(name="AS_MINISTER", activeAt="2024-01-01T00:00:00Z", direction="OUTGOING"))
+    incoming = await fake_service.fetch_relation("ministry_2_1", Relation(name="AS_MINISTER", direction="INCOMING"))
+
+    assert [relation.relatedEntityId for relation in historical] == ["person_president_1"]
+    assert [relation.relatedEntityId for relation in current] == ["ministry_2_1", "ministry_2_2", "ministry_2_3"]
+    assert [relation.relatedEntityId for relation in incoming] == ["person_president_2"]
+
+@pytest.mark.asyncio
+async def test_attributes_metadata_and_missing_data(fake_service):
+    metadata = await fake_service.get_metadata("gov_01")
+    attributes = await fake_service.get_attributes("category_1", "topic_1_table_1")
+
+    assert metadata == {"description": "Root of the government structure"}
+    assert Util.transform_data_for_chart({"data": attributes})["data"]["columns"] == ["year", "value"]
+    with pytest.raises(NotFoundError):
+        await fake_service.get_attributes("person_1_2", "person_1_2_profile")
+    with pytest.raises(NotFoundError):
+        await fake_service.get_metadata("category_1")
+
+@pytest.mark.asyncio
+async def test_injected_errors_are_retried(fake, fake_service):
+    fake.fail_next("search", status=503)
+
+    with patch("asyncio.sleep"):
+        [government] = await fake_service.get_entities(Entity(id="gov_01"))
+
+    assert government.id == "gov_01"
+    assert fake.requests["search"] == 2
+
+@pytest.mark.asyncio
+async def test_error_rate_and_latency(fake_service):
+    failing = FakeOpenGIN.from_file(GRAPH, error_rate=1.0)
+    fake_service.transport = failing
+    with patch("asyncio.sleep"), pytest.raises(InternalServerError):
+        await fake_service.get_metadata("gov_01")
+
+    slow = FakeOpenGIN.from_file(GRAPH, latency=0.05)
+    fake_service.transport = slow
+    started = time.perf_counter()
+    await asyncio.gather(*[fake_service.get_attributes("category_1", f"topic_1_table_{i}") for i in (1, 2)])
+
+    assert 0.05 <= time.perf_counter() - started < 0.5
+    assert slow.max_in_flight == 2
+
+@pytest.mark.asyncio
+async def test_services_run_end_to_end_on_the_fake(fake_service):
+    organisation_service = OrganisationService(fake_service)
+    data_service = DataService(fake_service)
+
+    portfolios = await organisation_service.active_portfolio_list("person_president_2", "2024-01-01")
+    attributes = await data_service.fetch_data_attributes("dataset_2_1")
+
+    assert len(portfolios["portfolioList"]) == 3
+    assert attributes["data"]["rows"][0] == [2015, 0]
+
+def test_unknown_transport_is_rejected():
+    with patch.object(settings, "OPENGIN_TRANSPORT", "carrier-pigeon"), pytest.raises(ValueError):
+        create_transport()
@@ -0,0 +1,168 @@
+import asyncio
+import pytest
+from unittest.mock import patch
+from src.utils.bulkhead import Bulkhead
+from src.utils.hedging import Hedger, LatencyTracker, hedged, hedgers
+from src.utils.http_client import bulkheaded, http_client
+from src.models.organisation_schemas import Entity
+from test.conftest import MockResponse
+
+def warmed_up_hedger(**kwargs) -> Hedger:
+    hedger = Hedger("search", min_samples=5, enabled=True, **kwargs)
+    for _ in range(5):
+        hedger.latencies.record(0.01)
+    hedger.calls = 100
+    return hedger
+
+def test_latency_tracker_percentile():
+    tracker = LatencyTracker(window=10)
+    assert tracker.percentile(0.95) is None
+
+    for latency in range(1, 11):
+        tracker.record(latency / 10)
+
+    assert tracker.percentile(0.5) == 0.5
+    assert tracker.percentile(0.95) == 1.0
+    assert tracker.percentile(1.0) == 1.0
+
+@pytest.mark.asyncio
+async def test_hedger_does_not_hedge_fast_calls():
+    hedger = warmed_up_hedger()
+    calls = 0
+
+    async def fast():
+        nonlocal calls
+        calls += 1
+        return "ok"
+
+    assert await hedger.run(fast) == "ok"
+    assert calls == 1
+    assert hedger.hedges == 0
+
+@pytest.mark.asyncio
+async def test_hedger_sends_duplicate_for_slow_call_and_takes_first_answer():
+    hedger = warmed_up_hedger()
+    attempts = 0
+
+    async def first_slow():
+        nonlocal attempts
+        attempts += 1
+        if attempts == 1:
+            await asyncio.sleep(10)
+            return "slow"
+        return "fast"
+
+    assert await hedger.run(first_slow) == "fast"
+    assert attempts == 2
+    assert hedger.hedges == 1
+    assert hedger.hedge_wins == 1
+
+@pytest.mark.asyncio
+async def test_hedger_waits_for_other_request_when_first_answer_fails():
+    hedger = warmed_up_hedger()
+    attempts = 0
+
+    async def hedge_fails():
+        nonlocal attempts
+        attempts += 1
+        if attempts == 1:
+            await asyncio.sleep(0.05)
+            return "primary"
+        raise ValueError("hedge failed")
+
+    assert await hedger.run(hedge_fails) == "primary"
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("failing_attempt", [1, 2])
+async def test_hedger_returns_the_answer_when_both_requests_finish_together(failing_attempt):
+    hedger = warmed_up_hedger()
+    both_sent = asyncio.Event()
+    attempts = 0
+
+    async def one_fails():
+        nonlocal attempts
+        attempts += 1
+        attempt = attempts
+        if attempt == 2:
+            both_sent.set()
+        await both_sent.wait()
+        if attempt == failing_attempt:
+            raise ValueError("request failed")
+        return "answer"
+
+    async def failures_first(tasks, **kwargs):
+        done, pending = await real_wait(tasks, **kwargs)
+        return sorted(done, key=lambda task: task.exception() is None), pending
+
+    real_wait = asyncio.wait
+    with patch("src.utils.hedging.asyncio.wait", failures_first):
+        assert await hedger.run(one_fails) == "answer"
+    assert attempts == 2
+
+@pytest.mark.asyncio
+async def test_hedger_raises_when_every_request_fails():
+    hedger = warmed_up_hedger()
+
+    async def always_fails():
+        await asyncio.sleep(0.05)
+        raise ValueError("request failed")
+
+    with pytest.raises(ValueError):
+        await hedger.run(always_fails)
+    assert hedger.hedges == 1
+
+@pytest.mark.asyncio
+async def test_hedger_respects_max_ratio():
+    hedger = warmed_up_hedger(max_hedge_ratio=0.0)
+
+    async def slow():
+        await asyncio.sleep(0.05)
+        return "ok"
+
+    assert await hedger.run(slow) == "ok"
+    assert hedger.hedges == 0
+
+@pytest.mark.asyncio
+async def test_hedger_disabled_by_default_without_samples():
+    hedger = Hedger("search", enabled=True)
+
+    assert hedger.hedge_delay() is None
+
+@pytest.mark.asyncio
+async def test_service_records_latency_for_hedged_operations(mock_service, mock_session):
+    mock_session.post.return_value = MockResponse({"body": [{"id": "entity_123"}]})
+
+    await mock_service.get_entities(Entity(id="entity_123"))
+
+    assert hedgers["search"].calls == 1
+    assert len(hedgers["search"].latencies) == 1
+
+@pytest.mark.asyncio
+async def test_hedge_takes_a_bulkhead_slot_of_its_own():
+    bulkhead = Bulkhead("entities", limit=2)
+    in_use = []
+
+    @bulkheaded("search")
+    @hedged("search")
+    async def search():
+        in_use.append(bulkhead.in_use)
+        await asyncio.sleep(10 if len(in_use) == 1 else 0)
+        return "ok"
+
+    with patch.dict(http_client.bulkheads, {"entities": bulkhead}), \
+            patch.dict(hedgers, {"search": warmed_up_hedger()}):
+        assert await search() == "ok"
+        # the primary held one slot, the hedge ran in a second one
+        assert in_use == [1, 2]
+        assert bulkhead.in_use == 0
+
+        bulkhead.limit = 1
+        in_use.clear()
+        primary = asyncio.ensure_future(search())
+        await asyncio.sleep(0.05)
+        # no free slot, the hedge queues instead of running on the primary's slot
+        assert in_use == [1]
+        assert bulkhead.waiting() == 1
+        primary.cancel()
+        await asyncio.gather(primary, return_exceptions=True)
+        assert bulkhead.in_use == 0
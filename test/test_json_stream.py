@@ -0,0 +1,57 @@
+import json
+
+import pytest
+from src.utils.json_stream import iter_json_array, iter_json_object
+
+DOCUMENT = {
+    "meta": {"page": [1, 2, {"cursor": "]}"}]},
+    "body": [{"id": f"entity_{i}", "name": "Ministère \"Ü\"", "count": i * 1000 + 7, "values": [True, None, 1.5e3]} for i in range(20)],
+    "total": 123456,
+}
+RAW = json.dumps(DOCUMENT, ensure_ascii=False).encode()
+
+async def chunked(data: bytes, size: int):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+async def collect(iterator):
+    return [item async for item in iterator]
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64, len(RAW)])
+async def test_iter_json_array_under_key(size):
+    assert await collect(iter_json_array(chunked(RAW, size), key="body")) == DOCUMENT["body"]
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("size", [1, 5, 4096])
+async def test_iter_json_array_top_level(size):
+    raw = json.dumps(DOCUMENT["body"]).encode()
+
+    assert await collect(iter_json_array(chunked(raw, size))) == DOCUMENT["body"]
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("size", [1, 3, 4096])
+async def test_iter_json_object(size):
+    assert dict(await collect(iter_json_object(chunked(RAW, size)))) == DOCUMENT
+
+@pytest.mark.asyncio
+async def test_number_split_across_chunks():
+    # "12345" arrives as "12" + "345", the first chunk alone is a valid but wrong number
+    assert await collect(iter_json_array(chunked(b"[12345, 6]", 3))) == [12345, 6]
+
+@pytest.mark.asyncio
+async def test_missing_or_null_key_yields_nothing():
+    assert await collect(iter_json_array(chunked(b'{"wrong_body": [1, 2]}', 4), key="body")) == []
+    assert await collect(iter_json_array(chunked(b'{"body": null}', 4), key="body")) == []
+    assert await collect(iter_json_array(chunked(b'{}', 4), key="body")) == []
+
+@pytest.mark.asyncio
+async def test_empty_containers():
+    assert await collect(iter_json_array(chunked(b' [ ] ', 1))) == []
+    assert await collect(iter_json_object(chunked(b'{ }', 1))) == []
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("raw", [b'[1, 2', b'[1 2]', b'{"body": [1,}', b'', b'{"a" 1}'])
+async def test_invalid_json_raises(raw):
+    with pytest.raises(ValueError):
+        await collect(iter_json_array(chunked(raw, 2), key="body" if raw.startswith(b"{") else None))
@@ -0,0 +1,103 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from unittest.mock import AsyncMock, patch
+from google.api_core.exceptions import InternalServerError
+from src.exception.exceptions import NotFoundError
+from src.middleware.throttling import ThrottlingMiddleware
+from src.models.organisation_schemas import Entity
+from src.routers.metrics_router import router as metrics_router
+from src.utils.metrics import Counter, Gauge, Histogram, MetricsRegistry, upstream_latency, upstream_requests, upstream_response_bytes, upstream_retries
+from test.conftest import MockResponse
+
+def test_counter_and_gauge_render_prometheus_text():
+    counter = Counter("requests_total", "Requests", ["status"])
+    counter.inc(status="ok")
+    counter.inc(2, status="ok")
+    gauge = Gauge("in_flight", "In flight")
+    gauge.set(3)
+    gauge.dec()
+
+    assert counter.render() == '# HELP requests_total Requests\n# TYPE requests_total counter\nrequests_total{status="ok"} 3'
+    assert gauge.render() == "# HELP in_flight In flight\n# TYPE in_flight gauge\nin_flight 2"
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("latency_seconds", "Latency", ["operation"], buckets=[0.1, 1])
+    for value in (0.05, 0.5, 5):
+        histogram.observe(value, operation="search")
+
+    lines = histogram.render().splitlines()[2:]
+
+    assert lines == [
+        'latency_seconds_bucket{operation="search",le="0.1"} 1',
+        'latency_seconds_bucket{operation="search",le="1"} 2',
+        'latency_seconds_bucket{operation="search",le="+Inf"} 3',
+        'latency_seconds_sum{operation="search"} 5.55',
+        'latency_seconds_count{operation="search"} 3',
+    ]
+
+def test_label_values_are_escaped():
+    counter = Counter("paths_total", "Paths", ["path"])
+    counter.inc(path='a"b\\c\nd')
+
+    assert counter.render().splitlines()[-1] == 'paths_total{path="a\\"b\\\\c\\nd"} 1'
+
+def test_registry_renders_collectors_and_returns_existing_metrics():
+    registry = MetricsRegistry()
+    first = registry.counter("calls_total", "Calls")
+    collected = Gauge("queue_size", "Queue size")
+    collected.set(7)
+    registry.add_collector(lambda: [collected])
+
+    assert registry.counter("calls_total", "Calls") is first
+    assert registry.render().endswith("queue_size 7\n")
+
+@pytest.mark.asyncio
+async def test_upstream_attempts_are_counted_by_status(mock_service, mock_session):
+    mock_session.post.return_value = MockResponse({"body": [Entity(id="entity_123", name="Test Entity")]})
+    await mock_service.get_entities(Entity(id="entity_123"))
+
+    mock_session.post.return_value = MockResponse({"body": []})
+    with pytest.raises(NotFoundError):
+        await mock_service.get_entities(Entity(id="entity_456"))
+
+    assert upstream_requests.get(operation="search", status="ok") == 1
+    assert upstream_requests.get(operation="search", status="not_found") == 1
+    assert upstream_latency.count(operation="search") == 2
+    assert upstream_response_bytes.count(operation="search") == 2
+    assert upstream_response_bytes.sum(operation="search") > 0
+
+@pytest.mark.asyncio
+async def test_upstream_retries_are_counted(mock_service, mock_session):
+    mock_session.post.side_effect = [InternalServerError("Connection timeout"), MockResponse({"body": [Entity(id="entity_123")]})]
+
+    with patch("asyncio.sleep", new_callable=AsyncMock):
+        await mock_service.get_entities(Entity(id="entity_123"))
+
+    assert upstream_retries.get(operation="search") == 1
+    assert upstream_requests.get(operation="search", status="error") == 1
+    assert upstream_requests.get(operation="search", status="ok") == 1
+
+def test_metrics_endpoint_exports_component_and_throttling_metrics():
+    app = FastAPI()
+    app.add_middleware(ThrottlingMiddleware)
+    app.include_router(metrics_router)
+
+    @app.get("/ping")
+    async def ping():
+        return {}
+
+    client = TestClient(app)
+    client.get("/ping")
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    assert "gi_throttle_queue_wait_seconds_count 1" in body
+    assert "gi_throttle_in_flight 0" in body
+    assert 'gi_circuit_breaker_state{operation="search"} 0' in body
+    assert "gi_retry_budget_tokens" in body
+    assert 'gi_hedging_calls_total{operation="relations"}' in body
+    assert 'gi_cache_entries{cache="entity"}' in body
+    assert 'gi_http_pool_connections{state="limit"}' in body
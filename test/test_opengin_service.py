@@ -1,11 +1,21 @@
+import asyncio
+import json
 
 import pytest
 from src.enums.relationEnum import RelationDirectionEnum
 from src.enums.relationEnum import RelationNameEnum
 from src.models.organisation_schemas import Kind
-from src.exception.exceptions import NotFoundError, BadRequestError
+from src.exception.exceptions import NotFoundError, BadRequestError, InternalServerError
 from src.models.organisation_schemas import Entity, Relation
 from test.conftest import MockResponse
+from services.opengin_service import OpenGINService
+from unittest.mock import patch
+from src.utils.cache import TTLCache, negative_cache_hits
+from src.utils.disk_cache import DiskCache
+from src.utils.shared_cache import LocalSharedCache
+from src.utils.request_scope import IdentityMap, current_identity_map
+from src.core.config import settings
+from src.utils.request_timing import RequestTiming, current_request_timing
 
 # Test get entity
 @pytest.mark.asyncio
@@ -171,3 +181,401 @@ async def test_get_metadata_empty_response(mock_service, mock_session):
     mock_session.get.assert_called_once()
 
 
+
+# Tests for request coalescing
+@pytest.mark.asyncio
+async def test_get_entities_coalesces_concurrent_calls(mock_service, mock_session):
+    mock_session.post.return_value = MockResponse({"body": [{"id": "entity_123", "name": "Test Entity"}]})
+
+    results = await asyncio.gather(*[mock_service.get_entities(Entity(id="entity_123")) for _ in range(5)])
+
+    assert all(result[0].id == "entity_123" for result in results)
+    mock_session.post.assert_called_once()
+
+@pytest.mark.asyncio
+async def test_fetch_relation_coalesces_concurrent_calls(mock_service, mock_session):
+    mock_session.post.return_value = MockResponse([{"id": "relation_123", "relatedEntityId": "entity_456"}])
+    relation = Relation(name=RelationNameEnum.AS_APPOINTED.value, activeAt="2022-01-01T00:00:00Z", direction=RelationDirectionEnum.OUTGOING.value)
+
+    results = await asyncio.gather(
+        mock_service.fetch_relation("entity_123", relation=relation),
+        mock_service.fetch_relation(" entity_123 ", relation=relation.model_copy()),
+        mock_service.fetch_relation("entity_999", relation=relation),
+    )
+
+    assert [result[0].relatedEntityId for result in results] == ["entity_456"] * 3
+    assert mock_session.post.call_count == 2
+
+# Tests for the entity cache
+@pytest.mark.asyncio
+async def test_get_entities_serves_id_lookups_from_cache(mock_service, mock_session):
+    mock_session.post.return_value = MockResponse({"body": [{"id": "entity_123", "name": "Test Entity"}]})
+
+    first = await mock_service.get_entities(Entity(id="entity_123"))
+    second = await OpenGINService().get_entities(Entity(id="entity_123"))
+
+    assert first == second
+    mock_session.post.assert_called_once()
+    assert mock_service.entity_cache.hits == 1
+
+@pytest.mark.asyncio
+async def test_get_entities_does_not_cache_kind_searches(mock_service, mock_session):
+    mock_session.post.return_value = MockResponse({"body": [{"id": "entity_123", "name": "Test Entity"}]})
+    entity = Entity(id="entity_123", kind=Kind(major="Organisation", minor="department"))
+
+    await mock_service.get_entities(entity)
+    await mock_service.get_entities(entity)
+
+    assert mock_session.post.call_count == 2
+    assert len(mock_service.entity_cache) == 0
+
+@pytest.mark.asyncio
+async def test_invalidate_entity_forces_upstream_lookup(mock_service, mock_session):
+    mock_session.post.return_value = MockResponse({"body": [{"id": "entity_123", "name": "Test Entity"}]})
+
+    await mock_service.get_entities(Entity(id="entity_123"))
+    assert mock_service.invalidate_entity("entity_123") is True
+    await mock_service.get_entities(Entity(id="entity_123"))
+
+    assert mock_session.post.call_count == 2
+
+# Tests for the relation cache
+@pytest.mark.asyncio
+async def test_fetch_relation_serves_repeated_queries_from_cache(mock_service, mock_session):
+    mock_session.post.return_value = MockResponse([{"id": "relation_123", "relatedEntityId": "entity_456"}])
+
+    first = await mock_service.fetch_relation("entity_123", relation=Relation(name=RelationNameEnum.AS_MINISTER.value, activeAt="2015-01-01", direction=RelationDirectionEnum.OUTGOING.value))
+    # same date in a different format normalizes to the same cache key
+    second = await mock_service.fetch_relation("entity_123", relation=Relation(name=RelationNameEnum.AS_MINISTER.value, activeAt="2015-01-01T00:00:00Z", direction=RelationDirectionEnum.OUTGOING.value))
+
+    assert first == second
+    mock_session.post.assert_called_once()
+
+@pytest.mark.asyncio
+async def test_fetch_relation_cache_keeps_timestamps_with_an_offset_apart(mock_service, mock_session):
+    mock_session.post.return_value = MockResponse([])
+
+    # 05:30 in UTC+05:30 is midnight UTC, a different instant than 05:30 UTC
+    await mock_service.fetch_relation("entity_123", relation=Relation(name=RelationNameEnum.AS_MINISTER.value, activeAt="2024-01-01T05:30:00+05:30", direction=RelationDirectionEnum.OUTGOING.value))
+    await mock_service.fetch_relation("entity_123", relation=Relation(name=RelationNameEnum.AS_MINISTER.value, activeAt="2024-01-01T05:30:00Z", direction=RelationDirectionEnum.OUTGOING.value))
+    assert mock_session.post.call_count == 2
+
+    # the same instant written in UTC is served from the cache
+    await mock_service.fetch_relation("entity_123", relation=Relation(name=RelationNameEnum.AS_MINISTER.value, activeAt="2024-01-01T00:00:00Z", direction=RelationDirectionEnum.OUTGOING.value))
+    assert mock_session.post.call_count == 2
+
+@pytest.mark.asyncio
+async def test_fetch_relation_cache_uses_policy_ttl(mock_service, mock_session):
+    mock_session.post.return_value = MockResponse([])
+    relation = Relation(name=RelationNameEnum.AS_MINISTER.value, activeAt="2015-01-01", direction=RelationDirectionEnum.OUTGOING.value)
+
+    with patch.object(mock_service.relation_cache, "set") as mock_set:
+        await mock_service.fetch_relation("entity_123", relation=relation)
+
+    assert mock_set.call_args.kwargs["ttl"] == mock_service.relation_ttl_policy.historical_ttl
+
+@pytest.mark.asyncio
+async def test_invalidate_relations(mock_service, mock_session):
+    mock_session.post.return_value = MockResponse([])
+    relation = Relation(name=RelationNameEnum.AS_MINISTER.value, direction=RelationDirectionEnum.OUTGOING.value)
+
+    await mock_service.fetch_relation("entity_123", relation=relation)
+    assert mock_service.invalidate_relations("entity_123") == 1
+    await mock_service.fetch_relation("entity_123", relation=relation)
+
+    assert mock_session.post.call_count == 2
+
+# Tests for the request scoped identity map
+@pytest.mark.asyncio
+async def test_identity_map_dedupes_lookups_with_caching_disabled(mock_service, mock_session):
+    mock_session.post.return_value = MockResponse({"body": [{"id": "entity_123", "name": "Test Entity"}]})
+    mock_service.entity_cache = TTLCache(max_size=0, ttl=0)
+    token = current_identity_map.set(IdentityMap())
+    try:
+        first = await mock_service.get_entities(Entity(id="entity_123"))
+        second = await mock_service.get_entities(Entity(id="entity_123"))
+    finally:
+        current_identity_map.reset(token)
+
+    assert first is second
+    mock_session.post.assert_called_once()
+
+@pytest.mark.asyncio
+async def test_identity_map_dedupes_attribute_lookups(mock_service, mock_session):
+    mock_session.get.return_value = MockResponse({"value": "data"})
+    token = current_identity_map.set(IdentityMap())
+    try:
+        await mock_service.get_attributes("category_123", "dataset")
+        await mock_service.get_attributes("category_123", "dataset")
+        await mock_service.get_metadata("category_123")
+    finally:
+        current_identity_map.reset(token)
+
+    assert mock_session.get.call_count == 2
+
+# Tests for get_entities_many
+@pytest.mark.asyncio
+async def test_get_entities_many_dedupes_ids(mock_service, mock_session):
+    def respond(url, data, headers):
+        entity_id = json.loads(data)["id"]
+        return MockResponse({"body": [{"id": entity_id, "name": f"name of {entity_id}"}]})
+
+    mock_session.post.side_effect = respond
+
+    result = await mock_service.get_entities_many(["entity_1", "entity_2", "entity_1", " entity_2 ", "", None])
+
+    # keyed by the ids as given, so callers find the results under their own ids
+    assert list(result.keys()) == ["entity_1", "entity_2", " entity_2 "]
+    assert result["entity_1"].name == "name of entity_1"
+    assert result[" entity_2 "] is result["entity_2"]
+    assert mock_session.post.call_count == 2
+
+@pytest.mark.asyncio
+async def test_get_entities_many_reports_per_id_errors(mock_service, mock_session):
+    def respond(url, data, headers):
+        entity_id = json.loads(data)["id"]
+        if entity_id == "missing":
+            return MockResponse({"body": []})
+        return MockResponse({"body": [{"id": entity_id}]})
+
+    mock_session.post.side_effect = respond
+
+    result = await mock_service.get_entities_many(["entity_1", "missing"])
+
+    assert result["entity_1"].id == "entity_1"
+    assert isinstance(result["missing"], NotFoundError)
+
+@pytest.mark.asyncio
+async def test_get_entities_many_caps_concurrency(mock_service):
+    in_flight = 0
+    max_in_flight = 0
+
+    async def get_entities(entity):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.001)
+        in_flight -= 1
+        return [Entity(id=entity.id)]
+
+    with patch.object(mock_service, "get_entities", side_effect=get_entities):
+        result = await mock_service.get_entities_many([f"entity_{i}" for i in range(20)], concurrency=3)
+
+    assert len(result) == 20
+    assert max_in_flight == 3
+
+@pytest.mark.asyncio
+async def test_get_entities_many_empty_input(mock_service, mock_session):
+    assert await mock_service.get_entities_many([]) == {}
+    mock_session.post.assert_not_called()
+
+# Test streaming decode
+@pytest.mark.asyncio
+async def test_streaming_decode_entities_and_relations(mock_service, mock_session):
+    with patch.object(settings, "OPENGIN_STREAMING_DECODE", True), patch.object(settings, "OPENGIN_STREAM_CHUNK_SIZE", 4):
+        mock_session.post.return_value = MockResponse({"body": [Entity(id="entity_123", name="Test Entity")]})
+        entities = await mock_service.get_entities(Entity(id="entity_123"))
+
+        mock_session.post.return_value = MockResponse([Relation(id="relation_123", name="AS_MINISTER", direction="OUTGOING")])
+        relations = await mock_service.fetch_relation("entity_123", Relation(name="AS_MINISTER"))
+
+    assert entities == [Entity(id="entity_123", name="Test Entity")]
+    assert relations == [Relation(id="relation_123", name="AS_MINISTER", direction="OUTGOING")]
+
+@pytest.mark.asyncio
+async def test_streaming_decode_attributes(mock_service, mock_session):
+    attributes = {"start": "2024-01-01", "value": '{"columns": ["a"], "rows": [[1]]}'}
+    mock_session.get.return_value = MockResponse(attributes)
+
+    with patch.object(settings, "OPENGIN_STREAMING_DECODE", True), patch.object(settings, "OPENGIN_STREAM_CHUNK_SIZE", 4):
+        result = await mock_service.get_attributes("category_123", "dataset")
+
+    assert result == attributes
+
+# Test stale-while-revalidate and stale-if-error
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def stale_cache(mock_service):
+    clock = FakeClock()
+    mock_service.entity_cache = TTLCache(max_size=10, ttl=60, clock=clock, stale_while_revalidate=30, stale_if_error=300)
+    return clock
+
+@pytest.mark.asyncio
+async def test_stale_entity_is_served_while_one_background_refresh_runs(mock_service, mock_session, stale_cache):
+    mock_session.post.return_value = MockResponse({"body": [Entity(id="entity_123", name="Old Name")]})
+    await mock_service.get_entities(Entity(id="entity_123"))
+
+    stale_cache.now = 70
+    mock_session.post.return_value = MockResponse({"body": [Entity(id="entity_123", name="New Name")]})
+    results = await asyncio.gather(*[mock_service.get_entities(Entity(id="entity_123")) for _ in range(3)])
+    await mock_service.background_refresher.wait()
+
+    assert all(result == [Entity(id="entity_123", name="Old Name")] for result in results)
+    assert mock_session.post.call_count == 2
+    assert await mock_service.get_entities(Entity(id="entity_123")) == [Entity(id="entity_123", name="New Name")]
+
+@pytest.mark.asyncio
+async def test_stale_entity_is_served_when_upstream_fails(mock_service, mock_session, stale_cache):
+    timing = RequestTiming()
+    token = current_request_timing.set(timing)
+    try:
+        mock_session.post.return_value = MockResponse({"body": [Entity(id="entity_123", name="Old Name")]})
+        await mock_service.get_entities(Entity(id="entity_123"))
+
+        stale_cache.now = 200
+        with patch.object(mock_service, "_get_entities", side_effect=InternalServerError("OpenGIN down")):
+            result = await mock_service.get_entities(Entity(id="entity_123"))
+    finally:
+        current_request_timing.reset(token)
+
+    assert result == [Entity(id="entity_123", name="Old Name")]
+    assert timing.degraded
+    assert mock_service.entity_cache.stale_on_error == 1
+
+@pytest.mark.asyncio
+async def test_stale_entity_is_not_served_for_not_found(mock_service, mock_session, stale_cache):
+    mock_session.post.return_value = MockResponse({"body": [Entity(id="entity_123", name="Old Name")]})
+    await mock_service.get_entities(Entity(id="entity_123"))
+
+    stale_cache.now = 200
+    mock_session.post.return_value = MockResponse({"body": []})
+    with pytest.raises(NotFoundError):
+        await mock_service.get_entities(Entity(id="entity_123"))
+
+@pytest.mark.asyncio
+async def test_background_refresh_drops_entity_gone_upstream(mock_service, mock_session, stale_cache):
+    mock_session.post.return_value = MockResponse({"body": [Entity(id="entity_123", name="Old Name")]})
+    await mock_service.get_entities(Entity(id="entity_123"))
+
+    stale_cache.now = 70
+    mock_session.post.return_value = MockResponse({"body": []})
+    await mock_service.get_entities(Entity(id="entity_123"))
+    await mock_service.background_refresher.wait()
+
+    assert mock_service.entity_cache.lookup("entity_123") is None
+
+# Test persistent disk cache
+@pytest.mark.asyncio
+async def test_historical_relation_is_served_from_disk_after_restart(mock_service, mock_session, tmp_path):
+    mock_service.disk_cache = DiskCache(path=str(tmp_path / "opengin.sqlite3"), max_bytes=1_000_000, ttl=3600)
+    relation = Relation(name="AS_MINISTER", activeAt="2015-01-01T00:00:00Z")
+    mock_session.post.return_value = MockResponse([Relation(id="relation_123", name="AS_MINISTER", relatedEntityId="entity_456")])
+
+    first = await mock_service.fetch_relation("entity_123", relation)
+    mock_service.relation_cache.clear()
+    second = await mock_service.fetch_relation("entity_123", relation)
+
+    assert first == second == [Relation(id="relation_123", name="AS_MINISTER", relatedEntityId="entity_456")]
+    assert mock_session.post.call_count == 1
+    mock_service.disk_cache._close()
+
+@pytest.mark.asyncio
+async def test_current_relation_and_live_entity_are_not_written_to_disk(mock_service, mock_session, tmp_path):
+    mock_service.disk_cache = DiskCache(path=str(tmp_path / "opengin.sqlite3"), max_bytes=1_000_000, ttl=3600)
+    mock_session.post.return_value = MockResponse([Relation(id="relation_123", name="AS_MINISTER")])
+    await mock_service.fetch_relation("entity_123", Relation(name="AS_MINISTER"))
+
+    mock_session.post.return_value = MockResponse({"body": [Entity(id="entity_123", name="Live")]})
+    await mock_service.get_entities(Entity(id="entity_123"))
+
+    mock_session.post.return_value = MockResponse({"body": [Entity(id="entity_456", name="Gone", terminated="2019-01-01T00:00:00Z")]})
+    await mock_service.get_entities(Entity(id="entity_456"))
+
+    assert mock_service.disk_cache.writes == 1
+    assert await mock_service.disk_cache.get("entities", '"entity_456"') is not None
+    mock_service.disk_cache._close()
+
+# Test shared cache between workers
+@pytest.mark.asyncio
+async def test_shared_cache_answers_lookups_made_by_another_worker(mock_session):
+    shared = LocalSharedCache(max_size=10, ttl=60)
+    workers = [OpenGINService(), OpenGINService()]
+    for worker in workers:
+        # every worker process has its own memory caches
+        worker.entity_cache = TTLCache(max_size=10, ttl=60)
+        worker.relation_cache = TTLCache(max_size=10, ttl=60)
+        worker.shared_cache = shared
+
+    mock_session.post.return_value = MockResponse({"body": [Entity(id="entity_123", name="Test Entity")]})
+    first = await workers[0].get_entities(Entity(id="entity_123"))
+    second = await workers[1].get_entities(Entity(id="entity_123"))
+
+    mock_session.post.return_value = MockResponse([Relation(id="relation_123", name="AS_MINISTER")])
+    await workers[0].fetch_relation("entity_123", Relation(name="AS_MINISTER"))
+    relations = await workers[1].fetch_relation("entity_123", Relation(name="AS_MINISTER"))
+
+    assert first == second == [Entity(id="entity_123", name="Test Entity")]
+    assert relations == [Relation(id="relation_123", name="AS_MINISTER")]
+    assert mock_session.post.call_count == 2
+    assert shared.hits == 2
+
+# Tests for the negative cache
+@pytest.mark.asyncio
+async def test_missing_attributes_are_remembered(mock_service, mock_session):
+    mock_session.get.return_value = MockResponse({}, status=404)
+
+    for _ in range(3):
+        with pytest.raises(NotFoundError):
+            await mock_service.get_attributes("person_123", "person_123_profile")
+
+    mock_session.get.assert_called_once()
+    assert negative_cache_hits.get(operation="attributes", status=404) == 2
+    # the exception itself is not kept alive by the cache
+    key = mock_service.request_key("attributes", "person_123", "person_123_profile")
+    assert mock_service.negative_cache.get(key) == (
+        NotFoundError, 404, "Read API Error: Attributes not found for category id person_123 and dataset name person_123_profile"
+    )
+
+@pytest.mark.asyncio
+async def test_bad_request_and_missing_relation_are_remembered(mock_service, mock_session):
+    mock_session.post.return_value = MockResponse({}, status=400)
+    relation = Relation(name=RelationNameEnum.AS_MINISTER.value, direction=RelationDirectionEnum.OUTGOING.value)
+
+    for _ in range(2):
+        with pytest.raises(BadRequestError):
+            await mock_service.fetch_relation("entity_123", relation=relation)
+
+    mock_session.post.assert_called_once()
+    assert mock_service.invalidate_relations("entity_123") == 0
+    mock_session.post.return_value = MockResponse([{"id": "relation_123", "relatedEntityId": "entity_456"}])
+    result = await mock_service.fetch_relation("entity_123", relation=relation)
+
+    assert result[0].relatedEntityId == "entity_456"
+
+@pytest.mark.asyncio
+async def test_missing_entity_expires_and_can_be_invalidated(mock_service, mock_session):
+    clock = FakeClock()
+    mock_service.negative_cache = TTLCache(max_size=10, ttl=60, clock=clock)
+    mock_session.post.return_value = MockResponse({"body": []})
+
+    with pytest.raises(NotFoundError):
+        await mock_service.get_entities(Entity(id="entity_123"))
+    with pytest.raises(NotFoundError):
+        await mock_service.get_entities(Entity(id="entity_123"))
+    assert mock_session.post.call_count == 1
+
+    clock.now += 61
+    with pytest.raises(NotFoundError):
+        await mock_service.get_entities(Entity(id="entity_123"))
+    assert mock_session.post.call_count == 2
+
+    assert mock_service.invalidate_entity("entity_123") is True
+    mock_session.post.return_value = MockResponse({"body": [{"id": "entity_123", "name": "Test Entity"}]})
+    result = await mock_service.get_entities(Entity(id="entity_123"))
+
+    assert result[0].name == "Test Entity"
+
+@pytest.mark.asyncio
+async def test_upstream_errors_are_not_remembered(mock_service, mock_session):
+    mock_session.get.return_value = MockResponse({}, status=500)
+
+    with patch("asyncio.sleep"), pytest.raises(InternalServerError):
+        await mock_service.get_metadata("entity_123")
+
+    assert len(mock_service.negative_cache) == 0
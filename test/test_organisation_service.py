@@ -1,6 +1,8 @@
 import pytest
 from src.enums.relationEnum import RelationNameEnum, RelationDirectionEnum
-from src.exception.exceptions import InternalServerError, BadRequestError
+from fastapi.testclient import TestClient
+from src.exception.exceptions import InternalServerError, BadRequestError, ServiceUnavailableError, GatewayTimeoutError
+from src.services.opengin_service import OpenGINService
 from src.utils.util_functions import Util
 from unittest.mock import AsyncMock, patch, MagicMock
 from src.models.organisation_schemas import Entity, Relation
@@ -978,3 +980,17 @@ async def test_multiple_departments_aggregation(organisation_service):
 
     # Dependency should be called once per date
     assert organisation_service.get_ministers_and_departments.call_count == 2
+
+@pytest.mark.parametrize("error, status_code", [
+    (ServiceUnavailableError("Upstream 'relations' is unavailable, please try again shortly", retry_after=15), 503),
+    (GatewayTimeoutError("Request deadline exceeded"), 504),
+])
+def test_prime_minister_route_keeps_upstream_unavailable_and_timeout_status(error, status_code):
+    from main import app
+
+    with patch.object(OpenGINService, "fetch_relation", AsyncMock(side_effect=error)):
+        response = TestClient(app).post("/v1/organisation/prime-minister", json={"date": "2020-01-01"})
+
+    assert response.status_code == status_code
+    assert response.json()["detail"] == error.detail
+    assert response.headers.get("retry-after") == (error.headers or {}).get("Retry-After")
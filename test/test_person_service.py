@@ -1,8 +1,12 @@
 import pytest
+from fastapi.testclient import TestClient
 from unittest.mock import AsyncMock, patch
 from src.models.organisation_schemas import Entity, Relation
 from src.models.person_schemas import PersonResponse
-from src.exception.exceptions import BadRequestError, InternalServerError, NotFoundError
+from src.exception.exceptions import BadRequestError, InternalServerError, NotFoundError, ServiceUnavailableError, GatewayTimeoutError
+from src.services.opengin_service import OpenGINService
+from src.services.person_service import PersonService
+from src.utils.circuit_breaker import OPEN, circuit_breakers
 from datetime import date
 from src.enums import KindMinorEnum
 
@@ -595,6 +599,18 @@ async def test_fetch_person_profile_internal_error(
     with pytest.raises(InternalServerError):
         await person_service.fetch_person_profile("person_123")
 
+@pytest.mark.asyncio
+async def test_fetch_person_profile_falls_back_to_name_when_attributes_breaker_is_open(mock_session):
+    opengin_service = OpenGINService()
+    circuit_breakers["attributes"]._transition(OPEN)
+
+    with patch.object(opengin_service, "get_entities", AsyncMock(return_value=[Entity(id="person_123", name="encoded_name")])), \
+            patch("src.services.person_service.Util.decode_protobuf_attribute_name", return_value="Person Name"):
+        result = await PersonService(opengin_service).fetch_person_profile("person_123")
+
+    assert result == PersonResponse(name="Person Name")
+    mock_session.get.assert_not_called()
+
 # --- Tests for fetch_all_presidents ---
 
 @pytest.mark.asyncio
@@ -634,6 +650,40 @@ async def test_fetch_all_presidents_success(person_service, mock_opengin_service
         assert "per_gzt" in term2_gazettes[0]["ids"]
 
 
+@pytest.mark.asyncio
+async def test_fetch_all_presidents_names_president_ids_with_whitespace(person_service, mock_opengin_service):
+
+    mock_opengin_service.fetch_relation.return_value = [
+        Relation(relatedEntityId=" p1 ", startTime="2020-01-01T00:00:00Z", endTime=""),
+    ]
+
+    mock_opengin_service.get_entities.side_effect = [
+        [],
+        [],
+        [Entity(id="p1", name="President One")] # president name fetch
+    ]
+
+    with patch("src.services.person_service.Util.decode_protobuf_attribute_name", side_effect=lambda x: x):
+        result = await person_service.fetch_all_presidents()
+
+    assert [president["name"] for president in result["presidents"]] == ["President One"]
+
+
+@pytest.mark.parametrize("error, status_code", [
+    (ServiceUnavailableError("Upstream 'relations' is unavailable, please try again shortly", retry_after=15), 503),
+    (GatewayTimeoutError("Request deadline exceeded"), 504),
+])
+def test_all_presidents_route_keeps_upstream_unavailable_and_timeout_status(error, status_code):
+    from main import app
+
+    with patch.object(OpenGINService, "fetch_relation", AsyncMock(side_effect=error)), \
+            patch.object(OpenGINService, "get_entities", AsyncMock(return_value=[])):
+        response = TestClient(app).get("/v1/person/all-presidents")
+
+    assert response.status_code == status_code
+    assert response.json()["detail"] == error.detail
+    assert response.headers.get("retry-after") == (error.headers or {}).get("Retry-After")
+
 @pytest.mark.asyncio
 async def test_fetch_all_presidents_no_data(person_service, mock_opengin_service):
     mock_opengin_service.fetch_relation.return_value = []
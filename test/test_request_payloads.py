@@ -0,0 +1,36 @@
+import json
+
+from src.models.organisation_schemas import Entity, Kind, Relation
+from src.utils.request_payloads import PayloadCache
+
+def test_equal_queries_share_one_encoded_payload():
+    payloads = PayloadCache()
+
+    first = payloads.encode(Relation(name="AS_APPOINTED", activeAt="2024-01-01T00:00:00Z", direction="OUTGOING"))
+    second = payloads.encode(Relation(name="AS_APPOINTED", activeAt="2024-01-01T00:00:00Z", direction="OUTGOING"))
+
+    assert first is second
+    assert json.loads(first) == Relation(name="AS_APPOINTED", activeAt="2024-01-01T00:00:00Z", direction="OUTGOING").model_dump(mode="json")
+    assert (payloads.hits, payloads.misses) == (1, 1)
+
+def test_nested_fields_and_model_type_are_part_of_the_shape():
+    payloads = PayloadCache()
+
+    department = payloads.encode(Entity(kind=Kind(major="Organisation", minor="department")))
+    minister = payloads.encode(Entity(kind=Kind(major="Organisation", minor="minister")))
+
+    assert json.loads(department)["kind"]["minor"] == "department"
+    assert json.loads(minister)["kind"]["minor"] == "minister"
+    assert payloads.encode(Relation(id="x")) != payloads.encode(Entity(id="x"))
+
+def test_least_recently_used_shapes_are_dropped():
+    payloads = PayloadCache(max_size=2)
+
+    payloads.encode(Entity(id="1"))
+    payloads.encode(Entity(id="2"))
+    payloads.encode(Entity(id="1"))
+    payloads.encode(Entity(id="3"))
+    payloads.encode(Entity(id="1"))
+
+    assert len(payloads) == 2
+    assert payloads.misses == 3
@@ -0,0 +1,97 @@
+import asyncio
+import pytest
+from fastapi import FastAPI, Depends
+from fastapi.testclient import TestClient
+from src.utils.request_scope import IdentityMap, current_identity_map, load_once, request_scope
+
+@pytest.mark.asyncio
+async def test_identity_map_loads_each_key_once():
+    identity_map = IdentityMap()
+    calls = 0
+
+    async def loader():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0)
+        return ["entity"]
+
+    results = await asyncio.gather(*[identity_map.get_or_load("key", loader) for _ in range(3)])
+    later = await identity_map.get_or_load("key", loader)
+
+    assert calls == 1
+    assert all(result is results[0] for result in results)
+    assert later is results[0]
+    assert identity_map.loads == 1
+    assert identity_map.hits == 3
+
+@pytest.mark.asyncio
+async def test_identity_map_remembers_failures():
+    identity_map = IdentityMap()
+    calls = 0
+
+    async def loader():
+        nonlocal calls
+        calls += 1
+        raise ValueError("not found")
+
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            await identity_map.get_or_load("key", loader)
+
+    assert calls == 1
+
+@pytest.mark.asyncio
+async def test_load_once_without_request_scope_calls_loader_every_time():
+    calls = 0
+
+    async def loader():
+        nonlocal calls
+        calls += 1
+        return calls
+
+    assert await load_once("key", loader) == 1
+    assert await load_once("key", loader) == 2
+
+def test_request_scope_dependency_gives_each_request_its_own_map():
+    app = FastAPI(dependencies=[Depends(request_scope)])
+    calls = 0
+
+    async def loader():
+        nonlocal calls
+        calls += 1
+        return calls
+
+    @app.get("/")
+    async def endpoint():
+        results = await asyncio.gather(*[load_once("key", loader) for _ in range(3)])
+        return {"results": results}
+
+    client = TestClient(app)
+
+    assert client.get("/").json() == {"results": [1, 1, 1]}
+    assert client.get("/").json() == {"results": [2, 2, 2]}
+    assert current_identity_map.get() is None
+
+@pytest.mark.asyncio
+async def test_identity_map_cancels_a_load_nobody_waits_for():
+    identity_map = IdentityMap()
+    started, cancelled = asyncio.Event(), asyncio.Event()
+
+    async def loader():
+        started.set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    callers = [asyncio.create_task(identity_map.get_or_load("key", loader)) for _ in range(2)]
+    await started.wait()
+    callers[0].cancel()
+    await asyncio.sleep(0)
+    assert not cancelled.is_set()
+
+    callers[1].cancel()
+    await asyncio.gather(*callers, return_exceptions=True)
+    await asyncio.sleep(0)
+    assert cancelled.is_set()
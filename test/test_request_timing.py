@@ -0,0 +1,115 @@
+import asyncio
+import re
+
+import pytest
+from fastapi import APIRouter, FastAPI, Query
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+from src.middleware.server_timing import ServerTimingMiddleware
+from src.middleware.throttling import ThrottlingMiddleware
+from src.models.organisation_schemas import Entity
+from src.utils.request_timing import RequestTiming, TimedRoute, current_request_timing, measure, record, timed
+from src.utils.util_functions import Util
+from test.conftest import MockResponse
+
+def timings(header: str) -> dict:
+    return {name: float(duration) for name, duration in re.findall(r"(\w+);dur=([\d.]+)", header)}
+
+def test_recording_outside_a_request_is_a_no_op():
+    record("upstream", 1.0)
+
+    with measure("decode"):
+        pass
+
+    assert current_request_timing.get() is None
+
+def test_server_timing_header_lists_known_timings_in_order():
+    timing = RequestTiming()
+    timing.add("serialize", 0.002)
+    timing.add("upstream", 0.1)
+    timing.add("upstream", 0.05)
+
+    header = timing.server_timing()
+
+    assert list(timings(header)) == ["upstream", "serialize", "total"]
+    assert timings(header)["upstream"] == 150.0
+    assert 'desc="Serializing the response"' in header
+
+def test_timed_decorator_adds_to_the_current_request():
+    @timed("decode")
+    def decode():
+        return "value"
+
+    timing = RequestTiming()
+    token = current_request_timing.set(timing)
+    try:
+        assert decode() == "value"
+    finally:
+        current_request_timing.reset(token)
+
+    assert timing.durations["decode"] >= 0
+
+class Item(BaseModel):
+    name: str
+
+def test_headers_report_upstream_decode_throttle_and_serialize(mock_service, mock_session):
+    name = '{"typeUrl": "type.googleapis.com/google.protobuf.StringValue", "value": "0a0b4d696e6973747279"}'
+    mock_session.post.return_value = MockResponse({"body": [Entity(id="entity_123", name=name)]})
+
+    router = APIRouter(route_class=TimedRoute)
+
+    @router.get("/item", response_model=list[Item])
+    async def item(entity_id: str = Query(...)):
+        entities = await mock_service.get_entities(Entity(id=entity_id))
+        return [Item(name=Util.decode_protobuf_attribute_name(entity.name)) for entity in entities]
+
+    app = FastAPI()
+    app.include_router(router)
+    app.add_middleware(ThrottlingMiddleware)
+    app.add_middleware(ServerTimingMiddleware)
+    client = TestClient(app)
+
+    response = client.get("/item", params={"entity_id": "entity_123"})
+
+    assert response.json() == [{"name": "Ministry"}]
+    assert set(timings(response.headers["Server-Timing"])) == {"throttle", "upstream", "decode", "serialize", "total"}
+    assert response.headers["X-Upstream-Calls"] == "1"
+    assert int(response.headers["X-Upstream-Bytes"]) > 0
+
+    # the entity is cached now, so the second request makes no upstream calls
+    cached = client.get("/item", params={"entity_id": "entity_123"})
+
+    assert cached.headers["X-Upstream-Calls"] == "0"
+    assert "upstream" not in timings(cached.headers["Server-Timing"])
+
+@pytest.mark.asyncio
+async def test_headers_go_out_with_the_response_start_and_the_body_streams_through():
+    second_chunk = asyncio.Event()
+    sent = []
+
+    async def app(scope, receive, send):
+        record("upstream", 0.01)
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"text/plain")]})
+        await send({"type": "http.response.body", "body": b"first", "more_body": True})
+        await second_chunk.wait()
+        await send({"type": "http.response.body", "body": b"second"})
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": "/stream", "headers": []}
+    request = asyncio.ensure_future(ServerTimingMiddleware(app)(scope, receive, send))
+    await asyncio.sleep(0.01)
+
+    headers = dict(sent[0]["headers"])
+    assert headers[b"content-type"] == b"text/plain"
+    assert "upstream" in timings(headers[b"server-timing"].decode())
+    assert headers[b"x-upstream-calls"] == b"0"
+    assert [message.get("body") for message in sent[1:]] == [b"first"]
+
+    second_chunk.set()
+    await request
+    assert sent[-1]["body"] == b"second"
@@ -0,0 +1,42 @@
+import pytest
+from pydantic import ValidationError
+from src.models.organisation_schemas import Entity, Kind, Relation
+from src.utils.response_decoder import decode_entities, decode_relations, stream_entities, stream_relations, stream_object
+
+ENTITY_BODY = b'{"body": [{"id": "entity_123", "name": "Test Entity", "kind": {"major": "Organisation", "minor": "department"}, "created": "2020-01-01T00:00:00Z", "extra": 1}]}'
+RELATION_BODY = b'[{"id": "relation_123", "name": "AS_MINISTER", "relatedEntityId": "entity_456", "direction": "OUTGOING", "extra": 1}]'
+
+def test_decode_entities():
+    result = decode_entities(ENTITY_BODY)
+
+    assert result == [Entity(id="entity_123", name="Test Entity", kind=Kind(major="Organisation", minor="department"), created="2020-01-01T00:00:00Z")]
+    assert isinstance(result[0].kind, Kind)
+
+def test_decode_entities_without_body():
+    assert decode_entities(b'{"wrong_body": []}') == []
+    assert decode_entities(b'{"body": null}') == []
+
+def test_decode_relations():
+    result = decode_relations(RELATION_BODY)
+
+    assert result == [Relation(id="relation_123", name="AS_MINISTER", relatedEntityId="entity_456", direction="OUTGOING")]
+
+def test_untrusted_decode_validates():
+    with pytest.raises(ValidationError):
+        decode_relations(b'[{"id": 123}]')
+
+async def chunked(data: bytes, size: int = 8):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+@pytest.mark.asyncio
+async def test_stream_decoding_matches_buffered_decoding():
+    assert await stream_entities(chunked(ENTITY_BODY)) == decode_entities(ENTITY_BODY)
+    assert await stream_entities(chunked(b'{"body": null}')) == []
+    assert await stream_relations(chunked(RELATION_BODY)) == decode_relations(RELATION_BODY)
+    assert await stream_object(chunked(b'{"value": "[1, 2]", "columns": ["a"]}')) == {"value": "[1, 2]", "columns": ["a"]}
+
+@pytest.mark.asyncio
+async def test_stream_decoding_validates():
+    with pytest.raises(ValidationError):
+        await stream_relations(chunked(b'[{"id": 123}]'))
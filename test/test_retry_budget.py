@@ -0,0 +1,113 @@
+import pytest
+from unittest.mock import AsyncMock, patch
+from google.api_core.exceptions import InternalServerError as GoogleInternalServerError
+from google.api_core.exceptions import RetryError
+from src.exception.exceptions import InternalServerError, NotFoundError
+from src.utils.retry_budget import RetryBudget, retry_budget
+from src.models.organisation_schemas import Entity
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock():
+    fake_clock = FakeClock()
+    with patch("src.utils.retry_budget.time.monotonic", fake_clock):
+        yield fake_clock
+
+def test_budget_denies_retries_when_exhausted(clock):
+    budget = RetryBudget(ratio=0.1, min_per_second=0, max_tokens=2)
+
+    assert budget.try_spend() is True
+    assert budget.try_spend() is True
+    assert budget.try_spend() is False
+    assert budget.spent == 2
+    assert budget.denied == 1
+
+def test_budget_refills_from_successful_calls(clock):
+    budget = RetryBudget(ratio=0.5, min_per_second=0, max_tokens=2)
+    budget.tokens = 0
+
+    budget.deposit()
+    assert budget.try_spend() is False
+    budget.deposit()
+    assert budget.try_spend() is True
+
+def test_budget_refills_over_time_up_to_max(clock):
+    budget = RetryBudget(ratio=0.1, min_per_second=1, max_tokens=3)
+    budget.tokens = 0
+
+    clock.now += 100
+    for _ in range(3):
+        assert budget.try_spend() is True
+    assert budget.try_spend() is False
+
+def test_disabled_budget_always_allows(clock):
+    budget = RetryBudget(max_tokens=0, min_per_second=0, enabled=False)
+
+    assert budget.try_spend() is True
+
+@pytest.mark.asyncio
+async def test_tracked_deposits_on_answers(clock):
+    budget = RetryBudget(ratio=0.5, min_per_second=0, max_tokens=10)
+    budget.tokens = 0
+
+    @budget.tracked
+    async def found():
+        return "ok"
+
+    @budget.tracked
+    async def missing():
+        raise NotFoundError("missing")
+
+    @budget.tracked
+    async def broken():
+        raise InternalServerError("boom")
+
+    await found()
+    with pytest.raises(NotFoundError):
+        await missing()
+    with pytest.raises(InternalServerError):
+        await broken()
+
+    assert budget.deposits == 2
+    assert budget.tokens == 1.0
+
+@pytest.mark.asyncio
+async def test_exhausted_budget_fails_without_retry(mock_service, mock_session):
+    retry_budget.tokens = 0
+    mock_session.post.side_effect = GoogleInternalServerError("Network error")
+
+    with patch.object(retry_budget, "min_per_second", 0):
+        with patch("asyncio.sleep", new_callable=AsyncMock) as mock_sleep:
+            with pytest.raises(InternalServerError):
+                await mock_service.get_entities(Entity(id="entity_123"))
+
+    assert mock_session.post.call_count == 1
+    assert mock_sleep.call_count == 0
+    assert retry_budget.denied == 1
+
+@pytest.mark.asyncio
+async def test_retry_stopped_by_the_timeout_does_not_spend_a_token(mock_service, mock_session):
+    mock_session.post.side_effect = GoogleInternalServerError("Network error")
+    clock = 0.0
+
+    def slow_clock():
+        # every reading is 20 seconds later, past the 10 second retry timeout
+        nonlocal clock
+        clock += 20
+        return clock
+
+    with patch("time.monotonic", slow_clock):
+        with patch("asyncio.sleep", new_callable=AsyncMock) as mock_sleep:
+            with pytest.raises(RetryError):
+                await mock_service.get_entities(Entity(id="entity_123"))
+
+    assert mock_session.post.call_count == 1
+    assert mock_sleep.call_count == 0
+    assert retry_budget.spent == 0
+    assert retry_budget.denied == 0
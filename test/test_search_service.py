@@ -1,6 +1,7 @@
 import pytest
+from fastapi.testclient import TestClient
 from unittest.mock import patch, AsyncMock
-from src.exception.exceptions import BadRequestError
+from src.exception.exceptions import BadRequestError, ServiceUnavailableError, GatewayTimeoutError
 from src.models.organisation_schemas import Entity, Kind
 from src.models.search_schemas import SearchResponse
 from src.services.search_service import SearchService
@@ -290,6 +291,20 @@ async def test_unified_search_handles_partial_failures(search_service, mock_open
     assert result.total == 1
     assert result.results[0].type == KindMinorEnum.DEPARTMENT.value
 
+@pytest.mark.parametrize("error, status_code", [
+    (ServiceUnavailableError("Upstream 'search' is unavailable, please try again shortly", retry_after=15), 503),
+    (GatewayTimeoutError("Request deadline exceeded"), 504),
+])
+def test_search_route_reports_an_upstream_outage_instead_of_no_matches(error, status_code):
+    from main import app
+
+    with patch.object(OpenGINService, "get_entities", AsyncMock(side_effect=error)):
+        response = TestClient(app).get("/v1/search", params={"search_query": "health"})
+
+    assert response.status_code == status_code
+    assert response.json()["detail"] == error.detail
+    assert response.headers.get("retry-after") == (error.headers or {}).get("Retry-After")
+
 #tests for entity_specific_search
 
 @pytest.mark.asyncio
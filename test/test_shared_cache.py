@@ -0,0 +1,131 @@
+import asyncio
+
+import pytest
+from src.utils.shared_cache import LocalSharedCache, RedisSharedCache
+
+class FakeRedis:
+    """Local stand-in for a Redis compatible server, understands AUTH, SELECT, GET and SET ... PX"""
+
+    def __init__(self, password=None, delay=0.0):
+        self.password = password
+        self.delay = delay
+        self.data: dict[bytes, bytes] = {}
+        self.commands: list[list[bytes]] = []
+        self.connections = 0
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle, "127.0.0.1", 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def handle(self, reader, writer):
+        self.connections += 1
+        try:
+            while True:
+                header = await reader.readline()
+                if not header:
+                    break
+                parts = []
+                for _ in range(int(header[1:-2])):
+                    length = int((await reader.readline())[1:-2])
+                    parts.append((await reader.readexactly(length + 2))[:-2])
+                self.commands.append(parts)
+                await asyncio.sleep(self.delay)
+                writer.write(self.reply(parts))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    def reply(self, parts):
+        command = parts[0].upper()
+        if command == b"AUTH":
+            return b"+OK\r\n" if parts[1].decode() == self.password else b"-WRONGPASS invalid password\r\n"
+        if command == b"SELECT":
+            return b"+OK\r\n"
+        if command == b"SET":
+            self.data[parts[1]] = parts[2]
+            return b"+OK\r\n"
+        if command == b"GET":
+            value = self.data.get(parts[1])
+            return b"$-1\r\n" if value is None else b"$%d\r\n%s\r\n" % (len(value), value)
+        return b"-ERR unknown command\r\n"
+
+@pytest.mark.asyncio
+async def test_local_shared_cache_set_and_get():
+    cache = LocalSharedCache(max_size=10, ttl=60)
+
+    assert await cache.get("entities", "entity_123") is None
+    await cache.set("entities", "entity_123", b"value")
+
+    assert await cache.get("entities", "entity_123") == b"value"
+    assert cache.stats() == {"hits": 1, "misses": 1, "errors": 0}
+
+@pytest.mark.asyncio
+async def test_redis_shared_cache_round_trip():
+    server = await FakeRedis(password="secret").start()
+    cache = RedisSharedCache(url=f"redis://:secret@127.0.0.1:{server.port}/2", ttl=60)
+    try:
+        assert await cache.get("entities", "entity_123") is None
+        await cache.set("entities", "entity_123", b"\x00binary\r\nvalue", ttl=1.5)
+        value = await cache.get("entities", "entity_123")
+    finally:
+        await cache.close()
+        await server.stop()
+
+    assert value == b"\x00binary\r\nvalue"
+    assert server.commands[0] == [b"AUTH", b"secret"]
+    assert server.commands[1] == [b"SELECT", b"2"]
+    assert [b"SET", b"gi:entities:entity_123", b"\x00binary\r\nvalue", b"PX", b"1500"] in server.commands
+    # the connection is reused between commands
+    assert server.connections == 1
+
+@pytest.mark.asyncio
+async def test_redis_shared_cache_errors_are_misses():
+    server = await FakeRedis(password="secret").start()
+    wrong_password = RedisSharedCache(url=f"redis://:wrong@127.0.0.1:{server.port}/0", ttl=60)
+    await server.stop()
+    unreachable = RedisSharedCache(url=f"redis://127.0.0.1:{server.port}/0", ttl=60)
+
+    assert await unreachable.get("entities", "entity_123") is None
+    await unreachable.set("entities", "entity_123", b"value")
+    assert unreachable.errors == 2
+
+    server = await FakeRedis(password="secret").start()
+    wrong_password.port = server.port
+    try:
+        assert await wrong_password.get("entities", "entity_123") is None
+    finally:
+        await server.stop()
+    assert wrong_password.errors == 1
+
+@pytest.mark.asyncio
+async def test_redis_shared_cache_slow_reply_is_a_miss():
+    server = await FakeRedis(delay=0.2).start()
+    cache = RedisSharedCache(url=f"redis://127.0.0.1:{server.port}/0", ttl=60, timeout=0.05)
+    try:
+        assert await cache.get("entities", "entity_123") is None
+    finally:
+        await cache.close()
+        await server.stop()
+
+    assert cache.errors == 1
+
+@pytest.mark.asyncio
+async def test_redis_shared_cache_malformed_reply_is_a_miss():
+    server = await FakeRedis().start()
+    server.reply = lambda parts: b"$abc\r\n"
+    cache = RedisSharedCache(url=f"redis://127.0.0.1:{server.port}/0", ttl=60)
+    try:
+        assert await cache.get("entities", "entity_123") is None
+        await cache.set("entities", "entity_123", b"value")
+    finally:
+        await cache.close()
+        await server.stop()
+
+    assert cache.errors == 2
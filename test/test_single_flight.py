@@ -0,0 +1,110 @@
+import asyncio
+import contextvars
+import pytest
+from src.utils.bulkhead import Priority, current_priority
+from src.utils.single_flight import SingleFlight
+
+@pytest.mark.asyncio
+async def test_single_flight_coalesces_concurrent_calls():
+    single_flight = SingleFlight()
+    calls = 0
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0)
+        return "result"
+
+    results = await asyncio.gather(*[single_flight.do("key", work) for _ in range(5)])
+
+    assert results == ["result"] * 5
+    assert calls == 1
+    assert len(single_flight) == 0
+
+@pytest.mark.asyncio
+async def test_single_flight_different_keys_run_separately():
+    single_flight = SingleFlight()
+    calls = []
+
+    async def work(key):
+        calls.append(key)
+        return key
+
+    results = await asyncio.gather(
+        single_flight.do("a", lambda: work("a")),
+        single_flight.do("b", lambda: work("b")),
+    )
+
+    assert results == ["a", "b"]
+    assert sorted(calls) == ["a", "b"]
+
+@pytest.mark.asyncio
+async def test_single_flight_shares_exceptions():
+    single_flight = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0)
+        raise ValueError("upstream failed")
+
+    results = await asyncio.gather(*[single_flight.do("key", work) for _ in range(3)], return_exceptions=True)
+
+    assert all(isinstance(result, ValueError) for result in results)
+    assert len(single_flight) == 0
+
+@pytest.mark.asyncio
+async def test_single_flight_does_not_cache_after_completion():
+    single_flight = SingleFlight()
+    calls = 0
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        return calls
+
+    assert await single_flight.do("key", work) == 1
+    assert await single_flight.do("key", work) == 2
+
+@pytest.mark.asyncio
+async def test_single_flight_cancelled_waiter_does_not_cancel_others():
+    single_flight = SingleFlight()
+    release = asyncio.Event()
+
+    async def work():
+        await release.wait()
+        return "done"
+
+    first = asyncio.create_task(single_flight.do("key", work))
+    second = asyncio.create_task(single_flight.do("key", work))
+    await asyncio.sleep(0)
+
+    first.cancel()
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await second == "done"
+    with pytest.raises(asyncio.CancelledError):
+        await first
+
+@pytest.mark.asyncio
+async def test_interactive_caller_does_not_join_a_background_flight():
+    single_flight = SingleFlight()
+    release = asyncio.Event()
+    priorities = []
+
+    async def work():
+        priorities.append(current_priority.get())
+        await release.wait()
+        return current_priority.get()
+
+    context = contextvars.Context()
+    context.run(current_priority.set, Priority.BACKGROUND)
+    background = asyncio.create_task(single_flight.do("key", work), context=context)
+    await asyncio.sleep(0)
+    interactive = [asyncio.ensure_future(single_flight.do("key", work)) for _ in range(2)]
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await background == Priority.BACKGROUND
+    assert await asyncio.gather(*interactive) == [Priority.INTERACTIVE] * 2
+    assert priorities == [Priority.BACKGROUND, Priority.INTERACTIVE]
+    assert len(single_flight) == 0
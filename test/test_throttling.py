@@ -0,0 +1,304 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from unittest.mock import patch
+from src.core.config import settings
+from src.middleware.throttling import ThrottlingMiddleware, throttle_capacity, throttle_in_flight, throttle_queue_wait, throttle_rejected, throttle_shed
+from src.utils.deadline import deadline_scope
+from src.utils.adaptive_limit import WINDOW_SAMPLES
+from src.utils.request_timing import RequestTiming, current_request_timing, record_upstream_call
+
+def http_scope(path: str = "/v1/test") -> dict:
+    return {"type": "http", "method": "GET", "path": path, "headers": []}
+
+async def receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+def collector(sent: list):
+    async def send(message):
+        sent.append(message)
+    return send
+
+def throttled(app, max_concurrent: int = 1, timeout: float = 0.05) -> ThrottlingMiddleware:
+    with patch.object(settings, "THROTTLING_MAX_CONCURRENT", max_concurrent), \
+            patch.object(settings, "THROTTLING_TIMEOUT", timeout):
+        return ThrottlingMiddleware(app)
+
+def blocking_app(release: asyncio.Event):
+    async def app(scope, receive, send):
+        await release.wait()
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+    return app
+
+@pytest.mark.asyncio
+async def test_request_waiting_past_the_timeout_gets_429():
+    release = asyncio.Event()
+    middleware = throttled(blocking_app(release))
+    first_sent, second_sent = [], []
+
+    first = asyncio.ensure_future(middleware(http_scope(), receive, collector(first_sent)))
+    await asyncio.sleep(0)
+    await middleware(http_scope(), receive, collector(second_sent))
+
+    assert second_sent[0]["status"] == 429
+    assert b"Server is busy" in second_sent[1]["body"]
+    assert throttle_rejected.get() == 1
+
+    release.set()
+    await first
+    assert first_sent[0]["status"] == 200
+    assert throttle_in_flight.get() == 0
+
+@pytest.mark.asyncio
+async def test_queued_request_runs_once_a_slot_frees_up():
+    release = asyncio.Event()
+    middleware = throttled(blocking_app(release), timeout=1)
+    first_sent, second_sent = [], []
+
+    first = asyncio.ensure_future(middleware(http_scope(), receive, collector(first_sent)))
+    second = asyncio.ensure_future(middleware(http_scope(), receive, collector(second_sent)))
+    await asyncio.sleep(0.01)
+    assert throttle_in_flight.get() == 1
+
+    release.set()
+    await asyncio.gather(first, second)
+
+    assert first_sent[0]["status"] == 200
+    assert second_sent[0]["status"] == 200
+    assert throttle_rejected.get() == 0
+    assert throttle_queue_wait.count() == 2
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_is_not_throttled():
+    release = asyncio.Event()
+    middleware = throttled(blocking_app(release), timeout=0.01)
+    blocked = asyncio.ensure_future(middleware(http_scope(), receive, collector([])))
+    await asyncio.sleep(0)
+
+    async def scrape():
+        sent = []
+        await middleware(http_scope(settings.METRICS_PATH), receive, collector(sent))
+        return sent
+
+    scraping = asyncio.ensure_future(scrape())
+    await asyncio.sleep(0.05)
+    release.set()
+    sent = await scraping
+    await blocked
+
+    assert sent[0]["status"] == 200
+    assert throttle_rejected.get() == 0
+    assert throttle_queue_wait.count() == 1
+
+@pytest.mark.asyncio
+async def test_streamed_body_chunks_pass_through_as_they_are_produced():
+    second_chunk = asyncio.Event()
+    sent = []
+
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"first", "more_body": True})
+        await second_chunk.wait()
+        await send({"type": "http.response.body", "body": b"second", "more_body": False})
+
+    middleware = throttled(app)
+    request = asyncio.ensure_future(middleware(http_scope(), receive, collector(sent)))
+    await asyncio.sleep(0.01)
+
+    # the first chunk reached the server while the endpoint is still producing the body
+    assert [message.get("body") for message in sent] == [None, b"first"]
+    assert throttle_in_flight.get() == 1
+
+    second_chunk.set()
+    await request
+    assert sent[-1]["body"] == b"second"
+    assert throttle_in_flight.get() == 0
+
+@pytest.mark.asyncio
+async def test_adaptive_limit_lowers_concurrency_when_upstream_fails():
+    timing = RequestTiming()
+    token = current_request_timing.set(timing)
+
+    async def failing_app(scope, receive, send):
+        record_upstream_call(0.01, failed=True)
+        await send({"type": "http.response.start", "status": 502, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    try:
+        with patch.object(settings, "THROTTLING_ADAPTIVE_ENABLED", True), \
+                patch.object(settings, "THROTTLING_MIN_CONCURRENT", 1):
+            middleware = throttled(failing_app, max_concurrent=4)
+        for _ in range(WINDOW_SAMPLES):
+            await middleware(http_scope(), receive, collector([]))
+    finally:
+        current_request_timing.reset(token)
+
+    assert middleware.limit.current == 3
+    assert throttle_capacity.get() == 3
+
+@pytest.mark.asyncio
+async def test_lowered_limit_holds_back_queued_requests():
+    release = asyncio.Event()
+    middleware = throttled(blocking_app(release), max_concurrent=2, timeout=1)
+    first = asyncio.ensure_future(middleware(http_scope(), receive, collector([])))
+    second = asyncio.ensure_future(middleware(http_scope(), receive, collector([])))
+    await asyncio.sleep(0.01)
+
+    middleware.limit.limit = 1
+    third = asyncio.ensure_future(middleware(http_scope(), receive, collector([])))
+    await asyncio.sleep(0.01)
+    assert middleware.in_flight == 2
+
+    release.set()
+    await asyncio.gather(first, second, third)
+    assert middleware.in_flight == 0
+    assert not len(middleware.slots)
+
+@pytest.mark.asyncio
+async def test_burst_of_heavy_requests_leaves_room_for_cheap_ones():
+    app = FastAPI()
+    app.get("/heavy")(lambda: None)
+    app.get("/cheap")(lambda: None)
+    release = asyncio.Event()
+
+    with patch.object(settings, "THROTTLING_WEIGHTED_ENABLED", True), \
+            patch.object(settings, "THROTTLING_ROUTE_COSTS", "/heavy=4"), \
+            patch.object(settings, "THROTTLING_HEAVY_SHARE", 0.5):
+        middleware = throttled(blocking_app(release), max_concurrent=10, timeout=1)
+
+    def request(path: str):
+        return asyncio.ensure_future(middleware(dict(http_scope(path), app=app), receive, collector([])))
+
+    heavy = [request("/heavy") for _ in range(5)]
+    await asyncio.sleep(0.01)
+    # only one heavy request fits in half of the limit, the others queue among themselves
+    assert middleware.slots.in_use == 4
+    assert len(middleware.heavy_slots) == 4
+
+    cheap = [request("/cheap") for _ in range(6)]
+    await asyncio.sleep(0.01)
+    assert middleware.in_flight == 7
+    assert middleware.slots.in_use == 10
+
+    release.set()
+    await asyncio.gather(*heavy, *cheap)
+    assert middleware.slots.in_use == 0
+    assert middleware.heavy_slots.in_use == 0
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("fair_queuing", [True, False])
+async def test_scraping_burst_does_not_hold_back_other_clients(fair_queuing):
+    started = []
+
+    async def app(scope, receive, send):
+        started.append(scope["client"][0])
+        await asyncio.sleep(0.001)
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    with patch.object(settings, "THROTTLING_FAIR_QUEUING_ENABLED", fair_queuing):
+        middleware = throttled(app, max_concurrent=2, timeout=5)
+
+    def request(client: str):
+        scope = dict(http_scope(), client=(client, 50000))
+        return asyncio.ensure_future(middleware(scope, receive, collector([])))
+
+    scraper = [request("10.0.0.1") for _ in range(40)]
+    await asyncio.sleep(0)
+    users = [request(client) for client in ("10.0.0.2", "10.0.0.3") for _ in range(3)]
+    await asyncio.gather(*scraper, *users)
+
+    user_starts = [index for index, client in enumerate(started) if client != "10.0.0.1"]
+    assert len(user_starts) == 6
+    if fair_queuing:
+        # the users' requests are interleaved with the scraper's instead of waiting for all of them
+        assert max(user_starts) <= 12
+    else:
+        assert min(user_starts) >= 40
+
+def test_client_key_comes_from_the_configured_header():
+    with patch.object(settings, "THROTTLING_CLIENT_HEADER", "X-Forwarded-For"):
+        middleware = throttled(blocking_app(asyncio.Event()))
+    scope = dict(http_scope(), client=("10.0.0.9", 50000))
+
+    assert middleware.client_key(scope) == "10.0.0.9"
+    # the leftmost entry is whatever the client sent, the proxy appended the address it saw
+    scope["headers"] = [(b"x-forwarded-for", b"203.0.113.7, 198.51.100.4")]
+    assert middleware.client_key(scope) == "198.51.100.4"
+
+    with patch.object(settings, "THROTTLING_CLIENT_HEADER", "X-Forwarded-For"), \
+            patch.object(settings, "THROTTLING_CLIENT_HEADER_HOPS", 2):
+        behind_two_proxies = throttled(blocking_app(asyncio.Event()))
+    scope["headers"] = [(b"x-forwarded-for", b"203.0.113.7, 198.51.100.4"), (b"x-forwarded-for", b"10.0.0.1")]
+    assert behind_two_proxies.client_key(scope) == "198.51.100.4"
+    scope["headers"] = [(b"x-forwarded-for", b"198.51.100.4")]
+    assert behind_two_proxies.client_key(scope) == "198.51.100.4"
+
+    with patch.object(settings, "THROTTLING_FAIR_QUEUING_ENABLED", False):
+        assert throttled(blocking_app(asyncio.Event())).client_key(scope) is None
+
+@pytest.mark.asyncio
+async def test_request_is_shed_when_the_expected_wait_is_too_long():
+    release = asyncio.Event()
+    middleware = throttled(blocking_app(release), max_concurrent=1, timeout=2)
+    middleware.service_time = 1.0
+    queued = [asyncio.ensure_future(middleware(http_scope(), receive, collector([]))) for _ in range(3)]
+    await asyncio.sleep(0.01)
+    assert middleware.expected_wait() == 3
+
+    sent = []
+    await middleware(http_scope(), receive, collector(sent))
+
+    assert sent[0]["status"] == 429
+    assert (b"retry-after", b"3") in sent[0]["headers"]
+    assert throttle_shed.get() == 1
+    assert throttle_queue_wait.count() == 1
+
+    release.set()
+    await asyncio.gather(*queued)
+    assert throttle_rejected.get() == 0
+
+@pytest.mark.asyncio
+async def test_shedding_uses_what_is_left_of_the_deadline():
+    release = asyncio.Event()
+    middleware = throttled(blocking_app(release), max_concurrent=1, timeout=30)
+    middleware.service_time = 1.0
+    blocked = asyncio.ensure_future(middleware(http_scope(), receive, collector([])))
+    await asyncio.sleep(0.01)
+
+    sent = []
+    with deadline_scope(0.5):
+        await middleware(http_scope(), receive, collector(sent))
+    release.set()
+    await blocked
+
+    assert sent[0]["status"] == 429
+    assert throttle_shed.get() == 1
+
+@pytest.mark.asyncio
+async def test_service_time_is_learned_from_completed_requests():
+    release = asyncio.Event()
+    release.set()
+    middleware = throttled(blocking_app(release))
+    assert middleware.service_time is None
+    assert middleware.expected_wait() == 0
+
+    await middleware(http_scope(), receive, collector([]))
+    assert 0 <= middleware.service_time < 0.1
+
+    with patch.object(settings, "THROTTLING_SHED_ENABLED", False):
+        middleware = throttled(blocking_app(asyncio.Event()), timeout=0.01)
+    middleware.service_time = 100.0
+    blocked = asyncio.ensure_future(middleware(http_scope(), receive, collector([])))
+    await asyncio.sleep(0)
+    sent = []
+    await middleware(http_scope(), receive, collector(sent))
+    blocked.cancel()
+    await asyncio.gather(blocked, return_exceptions=True)
+
+    # not shed, rejected after the timeout with the estimate as Retry-After
+    assert throttle_shed.get() == 0
+    assert throttle_rejected.get() == 1
+    assert (b"retry-after", b"100") in sent[0]["headers"]